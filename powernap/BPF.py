@@ -0,0 +1,145 @@
+#    Minimal classic BPF socket filter builder
+#    Copyright (C) 2026 Daniel Collins <solemnwarning@solemnwarning.net>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, version 3 of the License.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import ctypes
+import socket
+import struct
+
+# Socket options (from asm-generic/socket.h)
+SO_ATTACH_FILTER = 26
+SO_DETACH_FILTER = 27
+
+# Instruction classes and modes (from linux/filter.h)
+BPF_LD  = 0x00
+BPF_ALU = 0x04
+BPF_JMP = 0x05
+BPF_RET = 0x06
+
+BPF_W   = 0x00
+BPF_H   = 0x08
+BPF_B   = 0x10
+BPF_ABS = 0x20
+BPF_LEN = 0x80
+
+BPF_AND = 0x50
+BPF_JEQ = 0x10
+BPF_JGE = 0x30
+BPF_K   = 0x00
+
+# Offset of the network (IP) header for loads, packet offsets are otherwise
+# relative to the transport header for UDP sockets.
+SKF_NET_OFF = -0x100000
+
+# Offset of the payload in a packet received by a UDP socket.
+UDP_PAYLOAD = 8
+
+# struct sock_filter
+SOCK_FILTER = struct.Struct("=HBBI")
+
+# struct sock_fprog
+SOCK_FPROG = struct.Struct("HP")
+
+ACCEPT = 0xFFFFFFFF
+REJECT = 0
+
+_LOAD_SIZES = { 4: BPF_W, 2: BPF_H, 1: BPF_B }
+
+# A condition is an (offset, size, value, mask) tuple which is true when the
+# size byte big endian integer at offset in the packet ANDed with mask is
+# equal to value.
+
+# Returns a list of conditions which are true if the packet has the given bytes
+# at offset.
+def match_bytes(offset, data):
+    conditions = []
+
+    while data:
+        size = 4 if len(data) >= 4 else (2 if len(data) >= 2 else 1)
+
+        conditions.append((offset, size, int.from_bytes(data[:size], "big"), None))
+
+        offset += size
+        data = data[size:]
+
+    return conditions
+
+# Returns a condition which is true if the packet is at least length bytes long
+# (see compile_filter()).
+def match_min_length(length):
+    return (length - 1, 1, 0, 0)
+
+# Returns a condition which is true if the packet came from an address in an
+# (IPv4) ipaddress.IPv4Network.
+def match_ipv4_source(network):
+    return (SKF_NET_OFF + 12, 4, int(network.network_address), int(network.netmask))
+
+def _insn(code, jt, jf, k):
+    return SOCK_FILTER.pack(code, jt, jf, k & 0xFFFFFFFF)
+
+# Compiles a filter which accepts any packet matching all of the conditions in
+# any of the given blocks.
+#
+# Loading past the end of the packet makes the kernel drop it without running
+# the rest of the program, so each block starts by checking the packet is long
+# enough for all of its conditions, and moves on to the next block if not.
+def compile_filter(blocks):
+    program = []
+
+    for block in blocks:
+        block_insns = []
+
+        min_length = max([ offset + size for offset, size, value, mask in block if offset >= 0 ], default = 0)
+
+        if min_length > 0:
+            block_insns.append([ BPF_LD | BPF_W | BPF_LEN, 0, 0, 0 ])
+            block_insns.append([ BPF_JMP | BPF_JGE | BPF_K, 0, None, min_length ])
+
+        for offset, size, value, mask in block:
+            block_insns.append([ BPF_LD | _LOAD_SIZES[size] | BPF_ABS, 0, 0, offset ])
+
+            if mask is not None:
+                block_insns.append([ BPF_ALU | BPF_AND | BPF_K, 0, 0, mask ])
+
+            block_insns.append([ BPF_JMP | BPF_JEQ | BPF_K, 0, None, value ])
+
+        block_insns.append([ BPF_RET | BPF_K, 0, 0, ACCEPT ])
+
+        # On failure, each comparison jumps to the start of the next block.
+        for i, insn in enumerate(block_insns):
+            if insn[2] is None:
+                insn[2] = len(block_insns) - i - 1
+
+        if len(block_insns) > 256:
+            raise ValueError("Filter block too long")
+
+        program += block_insns
+
+    program.append([ BPF_RET | BPF_K, 0, 0, REJECT ])
+
+    return b"".join(_insn(*insn) for insn in program)
+
+# Attaches a compiled filter to a socket, replacing any existing one.
+def attach_filter(sock, program):
+    buf = ctypes.create_string_buffer(program, len(program))
+    fprog = SOCK_FPROG.pack(len(program) // SOCK_FILTER.size, ctypes.addressof(buf))
+
+    sock.setsockopt(socket.SOL_SOCKET, SO_ATTACH_FILTER, fprog)
+
+def detach_filter(sock):
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, SO_DETACH_FILTER, 0)
+    except OSError:
+        # No filter attached.
+        pass
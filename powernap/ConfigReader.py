@@ -13,6 +13,8 @@
 #    You should have received a copy of the GNU General Public License
 #    along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import ipaddress
+import multiprocessing
 import pytimeparse
 import re
 
@@ -23,6 +25,36 @@ class ParseError(Exception):
 
 COMMENT = re.compile("^#");
 
+# Byte rate, e.g. "512", "64k", "1.5MB/s" or "10MiB/s"
+RATE = re.compile("^(\\d+(?:\\.\\d+)?)([kKmMgG]?)(?:i?B)?(?:/s)?$")
+# Size in bytes, e.g. "512", "64k" or "1MiB"
+SIZE = re.compile("^(\\d+(?:\\.\\d+)?)([kKmMgG]?)(?:i?B)?$")
+PERCENTAGE = re.compile("^(\\d+(?:\\.\\d+)?)%?$")
+
+RATE_MULTIPLIERS = { "": 1, "K": 1024, "M": 1024 * 1024, "G": 1024 * 1024 * 1024 }
+
+# "<regex> [above <rate>] [window <duration>]"
+PROCESS_IO_OPTIONS = re.compile("^(.*?)(?:(?:^|\\s+)above\\s+(\\S+))?(?:(?:^|\\s+)window\\s+(\\S+))?$")
+
+# "<regex> above <rate> [ignore-multicast]"
+NET_OPTIONS = re.compile("^(.*?)(?:^|\\s+)above\\s+(\\S+)(\\s+ignore-multicast)?$")
+
+# "<regex> above <percent>"
+PROCESS_CPU_OPTIONS = re.compile("^(.*?)(?:^|\\s+)above\\s+(\\S+)$")
+
+# "[port <port>] [from <networks>]"
+PORT_MONITOR_OPTIONS = re.compile("^(?:port (\\d+))?(?:(?:^|\\s+)from (\\S+))?$")
+
+# Port number or range, e.g. "80" or "8000-8100"
+PORT_RANGE = re.compile("^(\\d+)(?:-(\\d+))?$")
+
+# Short time duration, e.g. "500us", "150ms" or "2s"
+SHORT_DURATION = re.compile("^(\\d+(?:\\.\\d+)?)(us|ms|s)$")
+SHORT_DURATION_MULTIPLIERS = { "us": 1, "ms": 1000, "s": 1000000 }
+
+# "[some|full] [<stall> per <window>]"
+PRESSURE_OPTIONS = re.compile("^(?:(some|full)(?:\\s+|$))?(?:(\\S+)\\s+per\\s+(\\S+))?$")
+
 # Splits the given string on whitespace, returning the first word and the rest of the string.
 #
 # _shift_word("hello world") => [ "hello", "world" ]
@@ -100,15 +132,25 @@ class ConfigReader:
         monitor_type, monitor_parameters = _shift_word(parameters)
 
         valid_monitors = {
+            "audio":       self._parse_audio_monitor,
+            "cgroup":      self._parse_cgroup_monitor,
             "console":     self._parse_console_monitor,
             "disk":        self._parse_disk_monitor,
+            "inhibit":     self._parse_inhibit_monitor,
+            "irq":         self._parse_irq_monitor,
             "keyboard":    self._parse_keyboard_monitor,
             "load":        self._parse_load_monitor,
             "mouse":       self._parse_mouse_monitor,
+            "net":         self._parse_net_monitor,
+            "nfsd":        self._parse_nfsd_monitor,
+            "path":        self._parse_path_monitor,
             "powerwake":   self._parse_port_monitor_func("powerwake", 57748),
+            "pressure":    self._parse_pressure_monitor,
             "process":     self._parse_process_monitor,
+            "process-cpu": self._parse_process_cpu_monitor,
             "process-io":  self._parse_process_io_monitor,
-            "tcp":         self._parse_port_monitor_func("tcp", None),
+            "system-io":   self._parse_system_io_monitor,
+            "tcp":         self._parse_tcp_monitor,
             "users":       self._parse_users_monitor,
             "udp":         self._parse_port_monitor_func("udp", None),
             "wol":         self._parse_port_monitor_func("wol", None),
@@ -119,6 +161,49 @@ class ConfigReader:
         else:
             raise ParseError(f"Unknown monitor type {monitor_type}")
 
+    def _parse_cgroup_monitor(self, monitor_parameters):
+        path, monitor_parameters = _shift_word(monitor_parameters)
+        resource, monitor_parameters = _shift_word(monitor_parameters)
+
+        if path == "":
+            raise ParseError(f"Expected cgroup path after 'cgroup'")
+
+        path = path.strip("/")
+
+        if path == "" or ".." in path.split("/"):
+            raise ParseError(f"Invalid cgroup path '{path}'")
+
+        if resource == "populated":
+            if monitor_parameters != "":
+                raise ParseError(f"Unexpected '{monitor_parameters}' after 'populated'")
+
+            return { "type": "cgroup-populated", "path": path }
+
+        if resource != "cpu" and resource != "io":
+            raise ParseError(f"Expected 'cpu', 'io' or 'populated' after '{path}'")
+
+        above, monitor_parameters = _shift_word(monitor_parameters)
+        threshold, monitor_parameters = _shift_word(monitor_parameters)
+
+        if above != "above":
+            raise ParseError(f"Expected 'above' after '{resource}'")
+
+        if resource == "cpu":
+            threshold = self._parse_percentage(threshold, "above")
+        else:
+            threshold = self._parse_rate(threshold, "above")
+
+        if monitor_parameters != "":
+            raise ParseError(f"Unexpected '{monitor_parameters}' after cgroup threshold")
+
+        return { "type": "cgroup", "path": path, "resource": resource, "threshold": threshold }
+
+    def _parse_audio_monitor(self, monitor_parameters):
+        if monitor_parameters != "":
+            raise ParseError(f"Unexpected '{monitor_parameters}' after 'audio'")
+
+        return { "type": "audio" }
+
     def _parse_console_monitor(self, monitor_parameters):
         if monitor_parameters != "":
             raise ParseError(f"Unexpected '{monitor_parameters}' after 'console'")
@@ -131,6 +216,26 @@ class ConfigReader:
 
         return { "type": "disk", "device": monitor_parameters }
 
+    def _parse_inhibit_monitor(self, monitor_parameters):
+        if monitor_parameters == "":
+            return { "type": "inhibit" }
+
+        if not monitor_parameters.startswith("/"):
+            raise ParseError(f"Expected an absolute directory path after 'inhibit'")
+
+        return { "type": "inhibit", "directory": monitor_parameters }
+
+    def _parse_irq_monitor(self, monitor_parameters):
+        if monitor_parameters == "":
+            raise ParseError(f"Expected a regular expression after 'irq'")
+
+        try:
+            regex = re.compile(monitor_parameters)
+        except re.error as e:
+            raise ParseError(f"Invalid regular expression after 'irq': {e}")
+
+        return { "type": "irq", "regex": regex }
+
     def _parse_keyboard_monitor(self, monitor_parameters):
         if monitor_parameters != "":
             raise ParseError(f"Unexpected '{monitor_parameters}' after 'keyboard'")
@@ -152,9 +257,140 @@ class ConfigReader:
         elif monitor_parameters == "n":
             return { "type": "load", "threshold": "n" }
 
+        elif monitor_parameters.startswith("utilisation ") or monitor_parameters == "utilisation":
+            return self._parse_load_utilisation(_shift_word(monitor_parameters)[1])
+
         else:
             raise ParseError(f"Expected number after 'load'")
 
+    def _parse_load_utilisation(self, monitor_parameters):
+        x, monitor_parameters = _shift_word(monitor_parameters)
+        threshold, monitor_parameters = _shift_word(monitor_parameters)
+
+        if x != "above":
+            raise ParseError(f"Expected 'above <percentage or number of cores>' after 'utilisation'")
+
+        monitor = { "type": "load", "mode": "utilisation" }
+
+        if threshold.endswith("%"):
+            monitor["threshold"] = self._parse_percentage(threshold, "above")
+            monitor["percent"] = True
+
+        elif threshold == "n":
+            monitor["threshold"] = "n"
+
+        elif re.compile("^\\d+(\\.\\d+)?$").match(threshold):
+            monitor["threshold"] = float(threshold)
+
+        else:
+            raise ParseError(f"Expected a percentage (e.g. 50%) or number of cores after 'above'")
+
+        while monitor_parameters != "":
+            x, monitor_parameters = _shift_word(monitor_parameters)
+
+            if x == "window":
+                if "window" in monitor:
+                    raise ParseError(f"Duplicate window options for 'load'")
+
+                value, monitor_parameters = _shift_word(monitor_parameters)
+                monitor["window"] = self._parse_time_duration(value, "window")
+
+            elif x == "per-cpu":
+                monitor["per_cpu"] = True
+
+            else:
+                raise ParseError(f"Unknown option {x} for 'load'")
+
+        # The threshold has to be exceeded, so it can't be all of the CPU time
+        # there is. Each CPU is compared on its own with per-cpu, so that can't
+        # use more than one core.
+        if monitor.get("per_cpu", False):
+            if monitor.get("percent", False):
+                if monitor["threshold"] >= 100:
+                    raise ParseError(f"Threshold must be below 100% with 'per-cpu'")
+
+            elif monitor["threshold"] == "n" or monitor["threshold"] >= 1:
+                raise ParseError(f"Threshold must be below 1 core with 'per-cpu'")
+
+        else:
+            cpu_count = multiprocessing.cpu_count()
+
+            if monitor.get("percent", False):
+                if monitor["threshold"] >= 100:
+                    raise ParseError(f"Threshold must be below 100%")
+
+            elif monitor["threshold"] == "n" or monitor["threshold"] >= cpu_count:
+                raise ParseError(f"Threshold must be below the number of CPUs ({cpu_count})")
+
+        return monitor
+
+    def _parse_net_monitor(self, monitor_parameters):
+        m = NET_OPTIONS.match(monitor_parameters)
+        if not m:
+            raise ParseError(f"Expected '<regex> above <rate>' after 'net'")
+
+        if m.group(1) == "":
+            raise ParseError(f"Expected a regular expression after 'net'")
+
+        try:
+            regex = re.compile(m.group(1))
+        except re.error as e:
+            raise ParseError(f"Invalid regular expression after 'net': {e}")
+
+        monitor = { "type": "net", "regex": regex, "threshold": self._parse_rate(m.group(2), "above") }
+
+        if m.group(3) is not None:
+            monitor["ignore_multicast"] = True
+
+        return monitor
+
+    def _parse_nfsd_monitor(self, monitor_parameters):
+        if monitor_parameters == "":
+            return { "type": "nfsd" }
+
+        m = re.compile("^above (\\d+(?:\\.\\d+)?)(?:/s)?$").match(monitor_parameters)
+        if not m:
+            raise ParseError(f"Expected 'above <operations per second>' after 'nfsd'")
+
+        return { "type": "nfsd", "threshold": float(m.group(1)) }
+
+    def _parse_path_monitor(self, monitor_parameters):
+        if not monitor_parameters.startswith("/"):
+            raise ParseError(f"Expected an absolute directory path after 'path'")
+
+        return { "type": "path", "path": monitor_parameters }
+
+    def _parse_pressure_monitor(self, monitor_parameters):
+        resource, monitor_parameters = _shift_word(monitor_parameters)
+
+        if resource != "cpu" and resource != "io" and resource != "memory":
+            raise ParseError(f"Expected 'cpu', 'io' or 'memory' after 'pressure'")
+
+        m = PRESSURE_OPTIONS.match(monitor_parameters)
+        if not m:
+            raise ParseError(f"Expected '[some|full] [<stall time> per <window>]' after '{resource}'")
+
+        monitor = { "type": "pressure", "resource": resource }
+
+        if m.group(1) is not None:
+            monitor["kind"] = m.group(1)
+
+        if m.group(2) is not None:
+            stall = self._parse_short_duration(m.group(2), m.group(1) or resource)
+            window = self._parse_short_duration(m.group(3), "per")
+
+            # Limits imposed by the kernel.
+            if window < 500000 or window > 10000000:
+                raise ParseError(f"Window must be between 500ms and 10s")
+
+            if stall <= 0 or stall > window:
+                raise ParseError(f"Stall time must be greater than zero and no longer than the window")
+
+            monitor["stall"] = stall
+            monitor["window"] = window
+
+        return monitor
+
     def _parse_process_monitor(self, monitor_parameters):
         if monitor_parameters == "":
             raise ParseError(f"Expected a regular expression after 'process'")
@@ -168,6 +404,19 @@ class ConfigReader:
         return { "type": "process", "regex": proc_re }
 
     def _parse_process_io_monitor(self, monitor_parameters):
+        monitor = { "type": "process-io" }
+
+        # The regular expression may contain spaces, so look for any options
+        # at the end of the line.
+        m = PROCESS_IO_OPTIONS.match(monitor_parameters)
+        monitor_parameters = m.group(1)
+
+        if m.group(2) is not None:
+            monitor["threshold"] = self._parse_rate(m.group(2), "above")
+
+        if m.group(3) is not None:
+            monitor["window"] = self._parse_time_duration(m.group(3), "window")
+
         if monitor_parameters == "":
             raise ParseError(f"Expected a regular expression after 'process-io'")
 
@@ -177,7 +426,88 @@ class ConfigReader:
         except re.error as e:
             raise ParseError(f"Invalid regular expression after 'process-io': {e}")
 
-        return { "type": "process-io", "regex": proc_re }
+        monitor["regex"] = proc_re
+
+        return monitor
+
+    def _parse_process_cpu_monitor(self, monitor_parameters):
+        m = PROCESS_CPU_OPTIONS.match(monitor_parameters)
+        if not m:
+            raise ParseError(f"Expected '<regular expression> above <percentage>' after 'process-cpu'")
+
+        if m.group(1) == "":
+            raise ParseError(f"Expected a regular expression after 'process-cpu'")
+
+        proc_re = None
+        try:
+            proc_re = re.compile(m.group(1))
+        except re.error as e:
+            raise ParseError(f"Invalid regular expression after 'process-cpu': {e}")
+
+        threshold = self._parse_percentage(m.group(2), "above")
+
+        return { "type": "process-cpu", "regex": proc_re, "threshold": threshold }
+
+    def _parse_system_io_monitor(self, monitor_parameters):
+        monitor = { "type": "system-io" }
+
+        thresholds = {
+            "above":        "threshold",
+            "device-above": "device_threshold",
+            "paging-above": "paging_threshold",
+            "swap-above":   "swap_threshold",
+        }
+
+        while monitor_parameters != "":
+            x, monitor_parameters = _shift_word(monitor_parameters)
+            value, monitor_parameters = _shift_word(monitor_parameters)
+
+            if x in thresholds:
+                key = thresholds[x]
+            elif x == "include" or x == "exclude":
+                key = x
+            else:
+                raise ParseError(f"Unknown option {x} for 'system-io'")
+
+            if key in monitor:
+                raise ParseError(f"Duplicate {x} options for 'system-io'")
+
+            if key == "include" or key == "exclude":
+                if value == "":
+                    raise ParseError(f"Expected a regular expression after '{x}'")
+
+                try:
+                    monitor[key] = re.compile(value)
+                except re.error as e:
+                    raise ParseError(f"Invalid regular expression after '{x}': {e}")
+
+            else:
+                monitor[key] = self._parse_rate(value, x)
+
+        return monitor
+
+    def _parse_tcp_monitor(self, monitor_parameters):
+        x, monitor_parameters = _shift_word(monitor_parameters)
+        port_list, monitor_parameters = _shift_word(monitor_parameters)
+
+        if x != "port" or port_list == "":
+            raise ParseError(f"Expected 'port <port numbers>' after 'tcp'")
+
+        monitor = { "type": "tcp", "ports": self._parse_port_list(port_list) }
+
+        if monitor_parameters != "":
+            x, monitor_parameters = _shift_word(monitor_parameters)
+            min_bytes, monitor_parameters = _shift_word(monitor_parameters)
+
+            if x != "min-bytes":
+                raise ParseError(f"Unexpected '{x}' after '{port_list}'")
+
+            monitor["min_bytes"] = int(self._parse_size(min_bytes, "min-bytes"))
+
+            if monitor_parameters != "":
+                raise ParseError(f"Unexpected '{monitor_parameters}' after '{min_bytes}'")
+
+        return monitor
 
     def _parse_users_monitor(self, monitor_parameters):
         next_word, monitor_parameters = _shift_word(monitor_parameters)
@@ -201,17 +531,20 @@ class ConfigReader:
 
     def _parse_port_monitor_func(self, monitor_type, default_port):
         def func(monitor_parameters):
-            m = re.compile("^port (\\d+)$").match(monitor_parameters)
+            m = PORT_MONITOR_OPTIONS.match(monitor_parameters)
 
-            if m:
-                port = int(m.group(1))
+            if m and (m.group(1) != None or default_port != None):
+                port = int(m.group(1)) if m.group(1) != None else default_port
 
                 if port > 65535:
                     raise ParseError(f"Invalid port number {port}")
 
-                return { "type": monitor_type, "port": port }
-            elif monitor_parameters == "" and default_port != None:
-                return { "type": monitor_type, "port": 57748 }
+                monitor = { "type": monitor_type, "port": port }
+
+                if m.group(2) != None:
+                    monitor["sources"] = self._parse_network_list(m.group(2))
+
+                return monitor
             else:
                 raise ParseError(f"Expected 'port <port number>' after '{monitor_type}'")
 
@@ -254,6 +587,81 @@ class ConfigReader:
 
         return action
 
+    # Parses a list of ports and port ranges, e.g. "22,80,8000-8100", returning
+    # a list of (first, last) tuples.
+    def _parse_port_list(self, p):
+        ports = []
+
+        for r in p.split(","):
+            m = PORT_RANGE.match(r)
+
+            if not m:
+                raise ParseError(f"Expected a port number or range (e.g. 8000-8100), got '{r}'")
+
+            first = int(m.group(1))
+            last = int(m.group(2)) if m.group(2) is not None else first
+
+            if first > 65535 or last > 65535:
+                raise ParseError(f"Invalid port number {max(first, last)}")
+
+            if first > last:
+                raise ParseError(f"Invalid port range {r}")
+
+            ports.append((first, last))
+
+        return ports
+
+    # Parses a list of IPv4 networks, e.g. "192.168.0.0/24,10.1.2.3", returning
+    # a list of ipaddress.IPv4Network objects.
+    def _parse_network_list(self, n):
+        networks = []
+
+        for x in n.split(","):
+            try:
+                network = ipaddress.ip_network(x, strict = False)
+            except ValueError:
+                raise ParseError(f"Invalid network '{x}' after 'from'")
+
+            if network.version != 4:
+                raise ParseError(f"Only IPv4 networks are supported after 'from'")
+
+            networks.append(network)
+
+        return networks
+
+    def _parse_rate(self, r, preceeded_by):
+        m = RATE.match(r)
+
+        if not m:
+            raise ParseError(f"Expected a rate (e.g. 64k or 1MB/s) after '{preceeded_by}'")
+
+        return float(m.group(1)) * RATE_MULTIPLIERS[m.group(2).upper()]
+
+    def _parse_size(self, s, preceeded_by):
+        m = SIZE.match(s)
+
+        if not m:
+            raise ParseError(f"Expected a size (e.g. 4k or 1MB) after '{preceeded_by}'")
+
+        return float(m.group(1)) * RATE_MULTIPLIERS[m.group(2).upper()]
+
+    def _parse_percentage(self, p, preceeded_by):
+        m = PERCENTAGE.match(p)
+
+        if not m:
+            raise ParseError(f"Expected a percentage (e.g. 50%) after '{preceeded_by}'")
+
+        return float(m.group(1))
+
+    # Returns the duration in microseconds.
+    def _parse_short_duration(self, d, preceeded_by):
+        m = SHORT_DURATION.match(d)
+
+        if not m:
+            raise ParseError(f"Expected a time duration (e.g. 150ms) after '{preceeded_by}'")
+
+        return int(float(m.group(1)) * SHORT_DURATION_MULTIPLIERS[m.group(2)])
+
     def _parse_time_duration(self, d, preceeded_by):
         if d == "":
             raise ParseError(f"Expected a time duration (e.g. 1m) after '{preceeded_by}'")
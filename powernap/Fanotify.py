@@ -0,0 +1,104 @@
+#    Minimal fanotify(7) wrapper
+#    Copyright (C) 2026 Daniel Collins <solemnwarning@solemnwarning.net>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, version 3 of the License.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import ctypes
+import os
+import struct
+
+# fanotify_init() flags (from linux/fanotify.h)
+FAN_CLOEXEC      = 0x00000001
+FAN_NONBLOCK     = 0x00000002
+FAN_CLASS_NOTIF  = 0x00000000
+
+# fanotify_mark() flags
+FAN_MARK_ADD        = 0x00000001
+FAN_MARK_REMOVE     = 0x00000002
+FAN_MARK_MOUNT      = 0x00000010
+FAN_MARK_FLUSH      = 0x00000080
+FAN_MARK_FILESYSTEM = 0x00000100
+
+# Event masks
+FAN_ACCESS         = 0x00000001
+FAN_MODIFY         = 0x00000002
+FAN_CLOSE_WRITE    = 0x00000008
+FAN_CLOSE_NOWRITE  = 0x00000010
+FAN_OPEN           = 0x00000020
+FAN_Q_OVERFLOW     = 0x00004000
+FAN_EVENT_ON_CHILD = 0x08000000
+FAN_ONDIR          = 0x40000000
+
+FAN_NOFD = -1
+
+# struct fanotify_event_metadata
+FANOTIFY_EVENT_METADATA = struct.Struct("=IBBHQii")
+
+AT_FDCWD = -100
+
+_libc = ctypes.CDLL(None, use_errno = True)
+
+_libc.fanotify_init.argtypes = [ ctypes.c_uint, ctypes.c_uint ]
+_libc.fanotify_mark.argtypes = [ ctypes.c_int, ctypes.c_uint, ctypes.c_uint64, ctypes.c_int, ctypes.c_char_p ]
+
+def _check(ret, path = None):
+    if ret < 0:
+        e = ctypes.get_errno()
+        raise OSError(e, os.strerror(e), path)
+
+    return ret
+
+class Fanotify:
+    # Raises OSError if fanotify isn't available (or we aren't allowed to use
+    # it, it normally needs CAP_SYS_ADMIN).
+    def __init__(self, flags = FAN_CLASS_NOTIF):
+        self._fd = _check(_libc.fanotify_init(flags | FAN_CLOEXEC | FAN_NONBLOCK, os.O_RDONLY | os.O_LARGEFILE))
+
+    def __del__(self):
+        self.close()
+
+    def fileno(self):
+        return self._fd
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def mark(self, flags, mask, path = None):
+        _check(_libc.fanotify_mark(self._fd, flags, mask, AT_FDCWD,
+            (os.fsencode(path) if path is not None else None)), path)
+
+    # Returns a list of (mask, fd, pid) tuples for any pending events, or an
+    # empty list if there are none. The caller is responsible for closing the
+    # file descriptors.
+    def read_events(self):
+        events = []
+
+        while True:
+            try:
+                data = os.read(self._fd, 8192)
+            except BlockingIOError:
+                break
+
+            offset = 0
+            while (offset + FANOTIFY_EVENT_METADATA.size) <= len(data):
+                event_len, vers, reserved, metadata_len, mask, fd, pid = FANOTIFY_EVENT_METADATA.unpack_from(data, offset)
+
+                if event_len < FANOTIFY_EVENT_METADATA.size:
+                    break
+
+                events.append((mask, fd, pid))
+                offset += event_len
+
+        return events
@@ -0,0 +1,107 @@
+#    Minimal inotify(7) wrapper
+#    Copyright (C) 2026 Daniel Collins <solemnwarning@solemnwarning.net>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, version 3 of the License.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import ctypes
+import errno
+import os
+import struct
+
+# Event masks (from linux/inotify.h)
+IN_ACCESS        = 0x00000001
+IN_MODIFY        = 0x00000002
+IN_ATTRIB        = 0x00000004
+IN_CLOSE_WRITE   = 0x00000008
+IN_CLOSE_NOWRITE = 0x00000010
+IN_OPEN          = 0x00000020
+IN_MOVED_FROM    = 0x00000040
+IN_MOVED_TO      = 0x00000080
+IN_CREATE        = 0x00000100
+IN_DELETE        = 0x00000200
+IN_DELETE_SELF   = 0x00000400
+IN_MOVE_SELF     = 0x00000800
+
+IN_UNMOUNT       = 0x00002000
+IN_Q_OVERFLOW    = 0x00004000
+IN_IGNORED       = 0x00008000
+
+IN_ONLYDIR       = 0x01000000
+IN_DONT_FOLLOW   = 0x02000000
+IN_EXCL_UNLINK   = 0x04000000
+IN_ISDIR         = 0x40000000
+
+IN_CLOSE = IN_CLOSE_WRITE | IN_CLOSE_NOWRITE
+IN_MOVE  = IN_MOVED_FROM | IN_MOVED_TO
+
+# struct inotify_event (without the trailing name)
+INOTIFY_EVENT = struct.Struct("=iIII")
+
+_libc = ctypes.CDLL(None, use_errno = True)
+
+def _check(ret, path = None):
+    if ret < 0:
+        e = ctypes.get_errno()
+        raise OSError(e, os.strerror(e), path)
+
+    return ret
+
+class Inotify:
+    def __init__(self):
+        self._fd = _check(_libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC))
+
+    def __del__(self):
+        self.close()
+
+    def fileno(self):
+        return self._fd
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    # Adds (or updates) a watch, returns the watch descriptor.
+    def add_watch(self, path, mask):
+        return _check(_libc.inotify_add_watch(self._fd, os.fsencode(path), ctypes.c_uint32(mask)), path)
+
+    def rm_watch(self, wd):
+        try:
+            _check(_libc.inotify_rm_watch(self._fd, wd))
+        except OSError as e:
+            # Watch was already removed by the kernel (file deleted)
+            if e.errno != errno.EINVAL:
+                raise
+
+    # Returns a list of (wd, mask, cookie, name) tuples for any pending events,
+    # or an empty list if there are none.
+    def read_events(self):
+        events = []
+
+        while True:
+            try:
+                data = os.read(self._fd, 65536)
+            except BlockingIOError:
+                break
+
+            offset = 0
+            while (offset + INOTIFY_EVENT.size) <= len(data):
+                wd, mask, cookie, name_len = INOTIFY_EVENT.unpack_from(data, offset)
+                offset += INOTIFY_EVENT.size
+
+                name = data[offset:(offset + name_len)].rstrip(b"\0")
+                offset += name_len
+
+                events.append((wd, mask, cookie, os.fsdecode(name)))
+
+        return events
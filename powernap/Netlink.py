@@ -0,0 +1,88 @@
+#    Netlink message helpers
+#    Copyright (C) 2026 Daniel Collins <solemnwarning@solemnwarning.net>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, version 3 of the License.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import struct
+
+# Netlink protocols (from linux/netlink.h)
+NETLINK_ROUTE     = 0
+NETLINK_SOCK_DIAG = 4
+NETLINK_CONNECTOR = 11
+
+# Standard message types
+NLMSG_NOOP    = 1
+NLMSG_ERROR   = 2
+NLMSG_DONE    = 3
+NLMSG_OVERRUN = 4
+
+# Message flags
+NLM_F_REQUEST = 0x001
+NLM_F_MULTI   = 0x002
+NLM_F_ACK     = 0x004
+NLM_F_ROOT    = 0x100
+NLM_F_MATCH   = 0x200
+NLM_F_DUMP    = NLM_F_ROOT | NLM_F_MATCH
+
+# struct nlmsghdr
+NLMSGHDR = struct.Struct("=IHHII")
+
+# struct nlattr
+NLATTR = struct.Struct("=HH")
+
+def _align(length):
+    return (length + 3) & ~3
+
+# Builds a netlink message with the given type, flags and payload.
+def pack_message(msg_type, flags, seq, payload):
+    return NLMSGHDR.pack(NLMSGHDR.size + len(payload), msg_type, flags, seq, 0) + payload
+
+# Builds a netlink attribute (for appending to a message payload).
+def pack_attr(attr_type, payload):
+    attr = NLATTR.pack(NLATTR.size + len(payload), attr_type) + payload
+    return attr + (b"\0" * (_align(len(attr)) - len(attr)))
+
+# Iterates over the netlink messages in a buffer returned by recv(), yielding
+# a (type, flags, payload) tuple for each one. Payloads are memoryview slices
+# of the buffer.
+def iter_messages(data):
+    data = memoryview(data)
+    offset = 0
+
+    while (offset + NLMSGHDR.size) <= len(data):
+        msg_len, msg_type, msg_flags, msg_seq, msg_pid = NLMSGHDR.unpack_from(data, offset)
+
+        if msg_len < NLMSGHDR.size or (offset + msg_len) > len(data):
+            break
+
+        yield msg_type, msg_flags, data[(offset + NLMSGHDR.size):(offset + msg_len)]
+
+        offset += _align(msg_len)
+
+# Iterates over the attributes in a message payload, yielding a (type, payload)
+# tuple for each one.
+def iter_attrs(data, offset = 0):
+    while (offset + NLATTR.size) <= len(data):
+        attr_len, attr_type = NLATTR.unpack_from(data, offset)
+
+        if attr_len < NLATTR.size or (offset + attr_len) > len(data):
+            break
+
+        # Mask off NLA_F_NESTED and NLA_F_NET_BYTEORDER
+        yield attr_type & 0x3FFF, data[(offset + NLATTR.size):(offset + attr_len)]
+
+        offset += _align(attr_len)
+
+# Returns the (negative) errno from an NLMSG_ERROR payload.
+def error_code(payload):
+    return struct.unpack_from("=i", payload)[0]
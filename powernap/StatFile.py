@@ -0,0 +1,57 @@
+#    Cached file descriptors for frequently read kernel statistics files
+#    Copyright (C) 2026 Daniel Collins <solemnwarning@solemnwarning.net>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, version 3 of the License.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+
+# A file under /proc or /sys which is read over and over again.
+#
+# The file is kept open and read from the start using pread(), which saves
+# looking up the path and allocating a new file object on every read. If a
+# read fails (e.g. because the process or device went away), the file is
+# closed and the next read will try opening the path again.
+#
+class StatFile:
+    def __init__(self, path, bufsize = 4096):
+        self.path = path
+        self._fd = None
+        self._bufsize = bufsize
+
+    def __del__(self):
+        self.close()
+
+    # Returns the contents of the file, or None if it couldn't be read.
+    def read(self):
+        try:
+            if self._fd is None:
+                self._fd = os.open(self.path, os.O_RDONLY | os.O_CLOEXEC)
+
+            while True:
+                data = os.pread(self._fd, self._bufsize, 0)
+
+                if len(data) < self._bufsize:
+                    return data
+
+                # File is bigger than we expected, grow the buffer and try
+                # again so we get a consistent snapshot in one read.
+                self._bufsize *= 2
+
+        except OSError:
+            self.close()
+            return None
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
@@ -0,0 +1,139 @@
+#    powernapd plugin - Monitors for sound being played
+#    Copyright (C) 2026 Daniel Collins <solemnwarning@solemnwarning.net>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, version 3 of the License.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import glob
+import os
+from logging import error, debug, info, warn
+
+from ..Inotify import Inotify, IN_CREATE, IN_DELETE, IN_DELETE_SELF, IN_IGNORED, IN_MOVED_TO, IN_MOVED_FROM, IN_ONLYDIR, IN_Q_OVERFLOW
+from ..StatFile import StatFile
+
+PCM_STATUS_GLOB = "/proc/asound/card*/pcm*p/sub*/status"
+SOUND_DEVICE_DIR = "/dev/snd"
+
+# Returns True if the status file of a PCM substream says it is playing.
+def parse_pcm_status(data):
+    for line in data.splitlines():
+        if line.startswith(b"state:"):
+            state = line[6:].strip()
+
+            # DRAINING is when the last of the sound is being played out.
+            return state == b"RUNNING" or state == b"DRAINING"
+
+    # A closed substream just says "closed".
+    return False
+
+# Monitor plugin
+#   looks for sound being played through any ALSA playback device. This
+#   includes sound played through a sound server (PulseAudio, PipeWire, ...)
+#   which will only keep the device running while something is playing.
+#
+#   The status files of all playback substreams are found at startup and
+#   kept open, they are found again when a sound card is added or removed
+#   (which we watch /dev/snd for).
+class AudioMonitor:
+
+    # Initialise
+    def __init__(self):
+        self._type = "audio"
+        self._status_files = {} # path => StatFile
+
+        self._inotify = None
+        self._wd = None
+        self._waiting = False
+
+    def start(self):
+        self._inotify = Inotify()
+        self._watch()
+        self._find_substreams()
+
+    def stop(self):
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+
+        for status_file in self._status_files.values():
+            status_file.close()
+
+        self._status_files = {}
+
+    def active(self):
+        if self._inotify is not None:
+            events = self._inotify.read_events()
+
+            if events:
+                for wd, mask, cookie, name in events:
+                    if (mask & IN_Q_OVERFLOW) or (wd == self._wd and (mask & (IN_DELETE_SELF | IN_IGNORED))) \
+                        or (wd == self._wd and self._waiting and name == os.path.basename(SOUND_DEVICE_DIR)):
+
+                        self._watch()
+                        break
+
+                self._find_substreams()
+
+        for path, status_file in self._status_files.items():
+            data = status_file.read()
+
+            if data is not None and parse_pcm_status(data):
+                debug('    %s - %s is playing' % (self._type, path))
+                return True
+
+        return False
+
+    def _find_substreams(self):
+        paths = glob.glob(PCM_STATUS_GLOB)
+        status_files = {}
+
+        for path in paths:
+            status_files[path] = self._status_files.pop(path, None) or StatFile(path)
+
+        # Close any files for substreams which have gone away.
+        for status_file in self._status_files.values():
+            status_file.close()
+
+        self._status_files = status_files
+
+    # Watches /dev/snd for sound devices being added or removed, or /dev for
+    # /dev/snd being created if there are no sound cards yet.
+    def _watch(self):
+        if self._wd is not None:
+            self._inotify.rm_watch(self._wd)
+            self._wd = None
+
+        try:
+            self._wd = self._inotify.add_watch(SOUND_DEVICE_DIR, IN_CREATE | IN_DELETE | IN_MOVED_TO | IN_MOVED_FROM | IN_DELETE_SELF | IN_ONLYDIR)
+            self._waiting = False
+
+        except FileNotFoundError:
+            try:
+                self._wd = self._inotify.add_watch(os.path.dirname(SOUND_DEVICE_DIR), IN_CREATE | IN_MOVED_TO | IN_ONLYDIR)
+                self._waiting = True
+
+            except OSError as e:
+                error("Unable to watch %s: %s" % (os.path.dirname(SOUND_DEVICE_DIR), str(e)))
+                return
+
+            # Make sure it wasn't created before we started watching.
+            if os.path.isdir(SOUND_DEVICE_DIR):
+                self._watch()
+
+        except OSError as e:
+            error("Unable to watch %s: %s" % (SOUND_DEVICE_DIR, str(e)))
+
+# ###########################################################################
+# Editor directives
+# ###########################################################################
+
+# vim:sts=4:ts=4:sw=4:et
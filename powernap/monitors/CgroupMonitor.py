@@ -0,0 +1,103 @@
+#    powernapd plugin - Monitors resource usage of a cgroup
+#    Copyright (C) 2026 Daniel Collins <solemnwarning@solemnwarning.net>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, version 3 of the License.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import time
+from logging import error, debug, info, warn
+
+from ..StatFile import StatFile
+
+CGROUP_ROOT = "/sys/fs/cgroup"
+
+# Returns the total CPU time (in microseconds) from a cpu.stat file.
+def parse_cpu_stat(data):
+    for line in data.splitlines():
+        if line.startswith(b"usage_usec "):
+            return int(line[11:])
+
+    return None
+
+# Returns the total bytes read and written by all devices from an io.stat file.
+def parse_io_stat(data):
+    total = 0
+
+    for line in data.splitlines():
+        for field in line.split()[1:]:
+            if field.startswith(b"rbytes=") or field.startswith(b"wbytes="):
+                total += int(field[7:])
+
+    return total
+
+# Monitor plugin
+#   looks at the CPU or I/O counters of a (cgroup v2) control group, such as a
+#   systemd service or slice. The kernel maintains the counters for all
+#   processes in the group, so this doesn't need to look at any processes.
+#
+#   CPU thresholds are a percentage of one CPU core, I/O thresholds are in
+#   bytes per second.
+class CgroupMonitor:
+
+    # Initialise
+    def __init__(self, path, resource, threshold):
+        self._type = "cgroup"
+        self._path = path
+        self._resource = resource
+        self._threshold = threshold
+
+        if resource == "cpu":
+            self._stat_file = StatFile(os.path.join(CGROUP_ROOT, path, "cpu.stat"))
+            self._parse = parse_cpu_stat
+            self._scale = 100.0 / 1000000.0 # usec/sec => percent
+        else:
+            self._stat_file = StatFile(os.path.join(CGROUP_ROOT, path, "io.stat"))
+            self._parse = parse_io_stat
+            self._scale = 1.0
+
+        self._counter = None
+        self._sampled_at = None
+
+    def start(self):
+        pass
+
+    def stop(self):
+        self._stat_file.close()
+
+    def active(self):
+        now = time.monotonic()
+
+        # The cgroup won't exist while the unit isn't running, that's fine.
+        data = self._stat_file.read()
+        counter = self._parse(data) if data is not None else None
+
+        ret = False
+
+        if (counter is not None and self._counter is not None
+            and counter >= self._counter and now > self._sampled_at):
+
+            rate = (counter - self._counter) / (now - self._sampled_at) * self._scale
+            debug('    %s - %s %s rate %.1f' % (self._type, self._path, self._resource, rate))
+
+            ret = rate > self._threshold
+
+        self._counter = counter
+        self._sampled_at = now
+
+        return ret
+
+# ###########################################################################
+# Editor directives
+# ###########################################################################
+
+# vim:sts=4:ts=4:sw=4:et
@@ -0,0 +1,159 @@
+#    powernapd plugin - Monitors a cgroup for running processes
+#    Copyright (C) 2026 Daniel Collins <solemnwarning@solemnwarning.net>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, version 3 of the License.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+from logging import error, debug, info, warn
+
+from ..Inotify import Inotify, IN_MODIFY, IN_DELETE_SELF, IN_IGNORED, IN_CREATE, IN_MOVED_TO, IN_ONLYDIR, IN_Q_OVERFLOW
+from ..StatFile import StatFile
+from .CgroupMonitor import CGROUP_ROOT
+
+# Returns True if a cgroup.events file says the cgroup (or any of its
+# descendants) has processes in it.
+def parse_cgroup_events(data):
+    for line in data.splitlines():
+        if line.startswith(b"populated "):
+            return line[10:].strip() == b"1"
+
+    return False
+
+# Monitor plugin
+#   looks for any processes running in a (cgroup v2) control group or any of
+#   its descendants, e.g. running VMs or containers under machine.slice.
+#
+#   Rather than polling, the cgroup.events file is watched using inotify and
+#   only read when the kernel says it has changed. If the cgroup doesn't exist
+#   (yet), we watch for it to be created instead.
+class CgroupPopulatedMonitor:
+
+    # Initialise
+    def __init__(self, path):
+        self._type = "cgroup-populated"
+        self._path = path
+        self._events_file = StatFile(os.path.join(CGROUP_ROOT, path, "cgroup.events"))
+
+        self._inotify = None
+        self._wd = None
+        self._waiting = False
+
+        self._populated = False
+        self._changed = False
+
+    def start(self):
+        self._inotify = Inotify()
+        self._watch()
+        self._update()
+
+    def stop(self):
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+
+        self._events_file.close()
+
+    def active(self):
+        if self._inotify is None:
+            return False
+
+        events = self._inotify.read_events()
+
+        if events:
+            rewatch = False
+
+            for wd, mask, cookie, name in events:
+                if mask & IN_Q_OVERFLOW:
+                    rewatch = True
+
+                elif wd == self._wd:
+                    if self._waiting or (mask & (IN_DELETE_SELF | IN_IGNORED)):
+                        # The cgroup (or one of its parents) was created, or
+                        # the cgroup was removed.
+                        rewatch = True
+
+            if rewatch:
+                self._watch()
+
+            self._update()
+
+        # A cgroup which was populated at any point since the last check
+        # counts as activity, even if it isn't any more.
+        ret = self._populated or self._changed
+        self._changed = False
+
+        return ret
+
+    def _update(self):
+        data = self._events_file.read()
+        populated = data is not None and parse_cgroup_events(data)
+
+        if populated != self._populated:
+            debug('    %s - %s populated is now %d' % (self._type, self._path, populated))
+
+            self._populated = populated
+            self._changed = True
+
+    # Watches the cgroup.events file, or the closest existing parent directory
+    # if the cgroup doesn't exist yet.
+    def _watch(self):
+        if self._wd is not None:
+            self._inotify.rm_watch(self._wd)
+            self._wd = None
+
+        parts = self._path.split("/")
+
+        while True:
+            try:
+                self._wd = self._inotify.add_watch(
+                    os.path.join(CGROUP_ROOT, self._path, "cgroup.events"), IN_MODIFY | IN_DELETE_SELF)
+                self._waiting = False
+
+                return
+
+            except FileNotFoundError:
+                pass
+
+            for n in range(len(parts) - 1, -1, -1):
+                try:
+                    self._wd = self._inotify.add_watch(
+                        os.path.join(CGROUP_ROOT, *parts[:n]), IN_CREATE | IN_MOVED_TO | IN_ONLYDIR)
+                    self._waiting = True
+
+                    break
+
+                except FileNotFoundError:
+                    continue
+
+            if self._wd is None:
+                error("Unable to watch cgroup %s" % self._path)
+                return
+
+            # Make sure the cgroup wasn't created before we started watching.
+            if not os.path.exists(os.path.join(CGROUP_ROOT, self._path)):
+                return
+
+            self._inotify.rm_watch(self._wd)
+            self._wd = None
+
+            # The directory exists but has no cgroup.events file, so it isn't
+            # a cgroup v2 cgroup and never will be.
+            if not os.path.exists(os.path.join(CGROUP_ROOT, self._path, "cgroup.events")):
+                error("%s is not a cgroup v2 cgroup, unable to watch it" % os.path.join(CGROUP_ROOT, self._path))
+                return
+
+# ###########################################################################
+# Editor directives
+# ###########################################################################
+
+# vim:sts=4:ts=4:sw=4:et
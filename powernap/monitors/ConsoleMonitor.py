@@ -17,28 +17,20 @@
 #    You should have received a copy of the GNU General Public License
 #    along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-import os, re, subprocess, time
+import os, re
 from logging import error, debug, info, warn
-from pathlib import(Path)
+
+from .IRQMonitor import IRQMonitor
+
+# Interrupt handlers of the PS/2 keyboard/mouse controller.
+CONSOLE_IRQS = re.compile("^(i8042|keyboard|mouse)$")
 
 # Check /dev/*, such that we don't powernap the system if someone
 # is actively using a terminal device
 def get_console_activity():
     ptmx = "/dev/ptmx"
     time = os.stat(ptmx).st_mtime
-    irqs = get_interrupts()
-    return time, irqs
-
-# Obtain the interrupts at any given point in time
-def get_interrupts():
-    interrupts = 0
-    for irq in os.listdir("/sys/kernel/irq/"):
-        source = Path("/sys/kernel/irq/" + irq + "/actions").read_text()
-        if source == "i8042" or source == "keyboard" or source == "mouse":
-            counts = Path("/sys/kernel/irq/" + irq + "/per_cpu_count").read_text().split(",")
-            for i in counts:
-                interrupts += int(i)
-    return interrupts
+    return time
 
 class ConsoleMonitor():
 
@@ -46,17 +38,20 @@ class ConsoleMonitor():
     def __init__(self):
         self._type = "console"
         self._absent_seconds = 0
-        self._time, self._irqs = get_console_activity()
+        self._time = get_console_activity()
+        self._irqs = IRQMonitor(CONSOLE_IRQS)
 
     # Check for PIDs
     def active(self):
-        cur_time, cur_irqs = get_console_activity()
-        if cur_time > self._time or cur_irqs > self._irqs:
-                self._irqs = cur_irqs
+        cur_time = get_console_activity()
+        irqs_active = self._irqs.active()
+        if cur_time > self._time or irqs_active:
                 self._time = cur_time
                 return True
         return False
 
     def start(self):
-        pass
+        self._irqs.start()
 
+    def stop(self):
+        self._irqs.stop()
@@ -15,49 +15,151 @@
 #
 #    You should have received a copy of the GNU General Public License
 #    along with this program.  If not, see <http://www.gnu.org/licenses/>.
-import re, subprocess
+import errno
+import fcntl
+import os
+import time
 from logging import error, debug, info, warn
 
+from .DiskStats import DISK_STATS
+
+# HDIO_DRIVE_CMD ioctl and the ATA commands for checking the power mode (see
+# linux/hdreg.h and hdparm).
+HDIO_DRIVE_CMD         = 0x031f
+ATA_OP_CHECKPOWERMODE1 = 0xe5
+ATA_OP_CHECKPOWERMODE2 = 0x98
+
+# How long the I/O counters of a spinning drive must be quiet before we ask it
+# whether it has gone into standby (and how often we ask after that).
+POWER_QUERY_INTERVAL = 60
+
+# Asks a drive what power mode it is in, without waking it up.
+#
+# Returns True if the drive is active/idle, False if it is in standby or
+# sleeping, or None if the drive doesn't support the query.
+#
+def query_power_mode(path):
+    try:
+        fd = os.open(path, os.O_RDONLY | os.O_NONBLOCK | os.O_CLOEXEC)
+    except OSError as e:
+        warn("Unable to open %s: %s" % (path, str(e)))
+        return None
+
+    try:
+        for command in (ATA_OP_CHECKPOWERMODE1, ATA_OP_CHECKPOWERMODE2):
+            args = bytearray([ command, 0, 0, 0 ])
+
+            try:
+                fcntl.ioctl(fd, HDIO_DRIVE_CMD, args)
+            except OSError as e:
+                if e.errno == errno.EIO:
+                    # A sleeping drive doesn't answer at all.
+                    return False
+
+                if e.errno == errno.ENOTTY or e.errno == errno.EINVAL or e.errno == errno.EOPNOTSUPP:
+                    return None
+
+                continue
+
+            # Sector count is 0x00 in standby, 0x80 when idle and 0xFF when
+            # active (or idle).
+            return args[2] != 0x00
+
+        return None
+
+    finally:
+        os.close(fd)
+
 # Monitor plugin
 #   looks for disks that are active/idle.  Useful for sleeping only when
 #   specified disks are in standby
+#
+#   Any change in the I/O counters of the disk means it is active. Once the
+#   counters have been quiet for a while, we ask the drive whether it has gone
+#   into standby yet. A drive in standby can't do any I/O without spinning up
+#   (which would show up in the counters), so it is only queried again after
+#   it has been seen doing I/O.
+#
+#   Drives which can't report their power mode (e.g. NVMe or virtual disks)
+#   are active only while they are doing I/O.
 
 class DiskMonitor ():
 
     # Initialise
-    def __init__(self, device):
+    def __init__(self, device, stats = DISK_STATS, query_power_mode = query_power_mode):
         self._type = "disk"
         self._name = device
-        self._regex_state = re.compile(r"^\s+drive\s+state\s+is:\s+(\S+)")
-        self._regex_not_found = re.compile(r"^.*No\s+such\s+file")
-        self._absent_seconds = 0
+        self._stats = stats
+        self._query_power_mode = query_power_mode
+
+        self._kernel_name = None
+        self._counters = None
+
+        self._spinning = None    # Last known power mode (see query_power_mode())
+        self._known_at = None    # When we last queried or saw I/O
+        self._supported = True
 
     def start(self):
+        self._kernel_name = self._resolve_name()
+
+    def stop(self):
         pass
 
     def active(self):
-        if self.is_disk_active():
+        now = time.monotonic()
+
+        devices = self._stats.read()
+        counters = devices.get(self._kernel_name)
+
+        if counters is None:
+            # The device may have been (re)connected under a different name.
+            self._kernel_name = self._resolve_name()
+            counters = devices.get(self._kernel_name)
+
+        old_counters = self._counters
+        self._counters = counters
+
+        if counters is None:
+            # Unknown drive, ignore it.
+            self._spinning = None
+            self._known_at = None
+            return False
+
+        if old_counters is not None and counters != old_counters:
+            debug("    Disk monitor: disk %s is doing I/O" % self._name)
+
+            self._spinning = True
+            self._known_at = now
             return True
-        return False
-
-    # Check for inactive drive by looking explicitly for drive state of
-    # 'standby' or 'sleeping'.  Assume 'active/idle', except in case
-    # where fuction returns 'No such file' error (e.g. unknown drive)
-    def is_disk_active(self):
-        hdparm = subprocess.getoutput("hdparm -C /dev/%s" % self._name).splitlines()
-        is_active = True
-        for line in hdparm:
-            if self._regex_not_found.match(line):
-                #warn("    Disk monitor: disk %s not found, ignoring" % self._name)
+
+        if not self._supported:
+            return False
+
+        if self._spinning is None or (self._spinning and (now < self._known_at or (now - self._known_at) >= POWER_QUERY_INTERVAL)):
+            self._spinning = self._query_power_mode(os.path.join("/dev", self._name))
+            self._known_at = now
+
+            if self._spinning is None:
+                info("Disk %s doesn't report its power mode, only watching for I/O" % self._name)
+                self._supported = False
                 return False
-            if self._regex_state.match(line):
-                state = self._regex_state.search(line).group(1)
-                #debug("    Disk monitor: disk %s in state %s" % (self._name, state))
-                if state == 'standby' or state == 'sleeping':
-                    is_active = False
-        if is_active:
-            return True
-        return False
+
+            debug("    Disk monitor: disk %s is %s" % (self._name, ("active/idle" if self._spinning else "in standby")))
+
+            # Don't mistake any I/O done by the query for activity.
+            self._counters = self._stats.read(0).get(self._kernel_name, counters)
+
+        return self._spinning
+
+    # Returns the name of the device as it appears in /proc/diskstats. The
+    # configured name may be a symlink (e.g. disk/by-id/...).
+    def _resolve_name(self):
+        path = os.path.realpath(os.path.join("/dev", self._name))
+
+        if path.startswith("/dev/"):
+            return path[5:]
+
+        return self._name
 
 
 # ###########################################################################
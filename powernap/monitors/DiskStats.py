@@ -0,0 +1,79 @@
+#    powernapd plugin helper - Shared view of /proc/diskstats
+#    Copyright (C) 2026 Daniel Collins <solemnwarning@solemnwarning.net>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, version 3 of the License.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import time
+
+from ..StatFile import StatFile
+
+# Reads made within this many seconds of each other are shared, so every
+# monitor checked during one tick uses a single read of /proc/diskstats.
+READ_MAX_AGE = 0.5
+
+# Sizes in /proc/diskstats are always in 512 byte sectors.
+SECTOR_SIZE = 512
+
+# Parses the contents of /proc/diskstats, returning a dictionary mapping each
+# device name to a tuple of the total number of I/O requests completed and
+# the total number of sectors transferred.
+def parse_diskstats(data):
+    devices = {}
+
+    for line in data.splitlines():
+        fields = line.split()
+
+        if len(fields) < 14:
+            continue
+
+        # reads completed, sectors read, writes completed, sectors written
+        ios     = int(fields[3]) + int(fields[7])
+        sectors = int(fields[5]) + int(fields[9])
+
+        devices[fields[2].decode("utf-8", "replace")] = (ios, sectors)
+
+    return devices
+
+# Returns true if a device in /proc/diskstats is a whole disk (rather than a
+# partition). Slashes in device names are replaced with "!" in sysfs.
+def is_whole_disk(name):
+    return os.path.exists("/sys/block/" + name.replace("/", "!"))
+
+class DiskStats:
+    def __init__(self):
+        self._stat_file = StatFile("/proc/diskstats", 65536)
+        self._devices = {}
+        self._read_at = None
+
+    # Returns the current counters of all block devices (see parse_diskstats())
+    # The counters are re-read if they are older than max_age seconds.
+    def read(self, max_age = READ_MAX_AGE):
+        now = time.monotonic()
+
+        if self._read_at is None or (now - self._read_at) >= max_age or now < self._read_at:
+            data = self._stat_file.read()
+
+            self._devices = parse_diskstats(data) if data is not None else {}
+            self._read_at = now
+
+        return self._devices
+
+# Shared by all monitors.
+DISK_STATS = DiskStats()
+
+# ###########################################################################
+# Editor directives
+# ###########################################################################
+
+# vim:sts=4:ts=4:sw=4:et
@@ -17,107 +17,162 @@
 #
 #    You should have received a copy of the GNU General Public License
 #    along with this program.  If not, see <http://www.gnu.org/licenses/>.
-import re
+import math, re, time
 from logging import error, debug, info, warn, os
 #from Monitor import Monitor
 
+from .ProcessTable import PROCESS_TABLE, ProcessMatcher, read_cmdline, read_comm
+
 # Monitor plugin
 #   looks for processes that have IO activity. Useful for some server
 #   processes that are always present in the process list even when idle
 
-# Looks for the process regex in /proc/<PID>/cmdline to obtain its PID(s).
-# Optimal for processes that have a command line.
-def find_pids_cmdline(regex):
-    ret = []
-    for d in os.listdir('/proc'):
-        try:
-            path = '/proc/%s/cmdline' % d
-            if os.path.isfile(path):
-                fp      = open(path)
-                cmdline = fp.read()
-                fp.close()
-                if regex.search(cmdline):
-                    ret.append(int(d))
-        except:
-            pass
-    return ret
-
-# Looks for the process regex in the "Name:" filed of /proc/<PID>/status
-# to obtain its PID(s). Optimal for processes that do NOT have a command
-# line. (i.e. NFS daemon processes.)
-def find_pids_status(regex):
-    ret = []
-    for d in os.listdir('/proc'):
-        try:
-            path = '/proc/%s/status' % d
-            if os.path.isfile(path):
-                fp = open(path)
-                status = fp.readline()
-                fp.close()
-                if regex.search(status.split()[1]):
-                    ret.append(int(d))
-        except:
-            pass
-    return ret
+# Reads the read_bytes and write_bytes counters from /proc/<pid>/io
+#
+# Returns None if the process has gone away.
+#
+def read_io_counts(pid):
+    read_bytes = None
+    write_bytes = None
+
+    try:
+        with open('/proc/%d/io' % pid, 'rb') as fp:
+            for l in fp.read().splitlines():
+                if l.startswith(b"read_bytes:"):
+                    read_bytes = int(l[11:])
+                elif l.startswith(b"write_bytes:"):
+                    write_bytes = int(l[12:])
+    except (OSError, ValueError):
+        return None # its possible the proc will die in here!
+
+    if read_bytes is None or write_bytes is None:
+        return None
+
+    return read_bytes, write_bytes
+
+# Last seen IO counters for a process
+class ProcessIOCounts:
+    __slots__ = ("identity", "read_bytes", "write_bytes")
+
+    def __init__(self, identity, read_bytes, write_bytes):
+        self.identity = identity
+        self.read_bytes = read_bytes
+        self.write_bytes = write_bytes
 
 class IOMonitor ():
 
     # Initialise
-    def __init__ ( self, regex ):
+    #
+    # threshold is the IO rate (in bytes per second) which must be exceeded
+    # to count as activity, any IO at all counts by default.
+    #
+    # window is the time constant (in seconds) of an exponentially weighted
+    # moving average applied to the IO rate, so short bursts (or gaps) don't
+    # immediately change our state. No averaging is done by default.
+    #
+    def __init__ ( self, regex, threshold = 0, window = None, table = PROCESS_TABLE, read_counts = read_io_counts ):
         self._iocounts = {}
         self._type = "process-io"
         self._regex = regex
         self._absent_seconds = 0
+        self._threshold = threshold
+        self._window = window
+        self._table = table
+        self._read_counts = read_counts
+
+        self._rate = 0.0
+        self._sampled_at = None
+
+        # Looks for the process regex in /proc/<PID>/cmdline to obtain its
+        # PID(s). Optimal for processes that have a command line.
+        self._cmdline_matcher = ProcessMatcher(regex, read_cmdline, table)
+
+        # Looks for the process regex in the process name to obtain its
+        # PID(s). Optimal for processes that do NOT have a command line.
+        # (i.e. NFS daemon processes.)
+        self._name_matcher = ProcessMatcher(regex, read_comm, table)
 
     def start(self):
         pass
 
     def active(self):
-        if self.get_io_count():
+        if self.get_io_rate() > self._threshold:
             return True
         return False
 
-    # Check for activity
+    # Returns the (averaged) IO rate of all matching processes
+    def get_io_rate ( self ):
+        now = time.monotonic()
+        io_bytes = self.get_io_count()
+
+        if self._sampled_at is not None and now > self._sampled_at:
+            elapsed = now - self._sampled_at
+            rate = io_bytes / elapsed
+
+            if self._window:
+                alpha = 1.0 - math.exp(-elapsed / self._window)
+                self._rate += alpha * (rate - self._rate)
+
+                # The average only approaches zero once the IO stops, so round
+                # it down once it is below a byte per second, otherwise any
+                # IO at all would keep an "above 0" monitor active forever.
+                if io_bytes == 0 and self._rate < 1.0:
+                    self._rate = 0.0
+            else:
+                self._rate = rate
+
+            debug('    %s - IO rate %.0f bytes/sec' % (self, self._rate))
+
+        self._sampled_at = now
+
+        return self._rate
+
+    # Returns the number of bytes read/written by matching processes since the
+    # previous call
     def get_io_count ( self ):
 
         # Get new PID list from processes with command line.
-        pids = find_pids_cmdline(self._regex)
+        pids = self._cmdline_matcher.find_pids()
         # Processes with no command line result on an empty PID list.
         # if so, use alternate search method.
         if not pids:
-            pids = find_pids_status(self._regex)
+            pids = self._name_matcher.find_pids()
+
+        processes = self._table.scan()
+
+        # Only carry forward counts for processes which still exist, so the
+        # state doesn't grow as processes come and go.
+        old_iocounts = self._iocounts
+        new_iocounts = {}
+
+        io_bytes = 0
 
-        # Get IO counts for all PIDs
-        io_counts = {}
-        for pid in pids:
-            io_counts[pid] = {}
-            try:
-                fp = open('/proc/%d/io' % pid)
-                for l in fp.readlines():
-                    pts = l.split(':')
-                    io_counts[pid][pts[0].strip()] = int(pts[1].strip())
-                fp.close()
-            except: pass # its possible the proc will die in here!
-
-        ioactivity = False
         for pid in pids:
-            # New process (assume activity)
-            if pid not in self._iocounts:
-                debug('    %s - adding new PID %d to list' % (self, pid))
-            # Existing: check for change
+            identity = processes.get(pid)
+            counts = self._read_counts(pid)
+
+            if identity is None or counts is None:
+                continue
+
+            read_bytes, write_bytes = counts
+            old = old_iocounts.get(pid)
+
+            if old is not None and old.identity == identity:
+                io_bytes += (read_bytes - old.read_bytes) + (write_bytes - old.write_bytes)
+
+                old.read_bytes = read_bytes
+                old.write_bytes = write_bytes
+
+                new_iocounts[pid] = old
+
             else:
-                if (self._iocounts[pid]["write_bytes"] != io_counts[pid]["write_bytes"]) or \
-                   (self._iocounts[pid]["read_bytes"] != io_counts[pid]["read_bytes"]):
-                    ioactivity = True
-                    self._iocounts[pid] = io_counts[pid]
-                    break
-            # Update count
-            self._iocounts[pid] = io_counts[pid]
-
-        if ioactivity:
-            return True
+                # New process, we only have a baseline for it so far.
+                debug('    %s - adding new PID %d to list' % (self, pid))
+                new_iocounts[pid] = ProcessIOCounts(identity, read_bytes, write_bytes)
 
-        return False
+        self._iocounts = new_iocounts
+
+        return io_bytes
 
 # ###########################################################################
 # Editor directives
@@ -0,0 +1,137 @@
+#    powernapd plugin - Monitors interrupts from devices
+#    Copyright (C) 2026 Daniel Collins <solemnwarning@solemnwarning.net>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, version 3 of the License.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+from logging import error, debug, info, warn
+
+from ..StatFile import StatFile
+
+IRQ_ROOT = "/sys/kernel/irq"
+
+# Returns the total number of interrupts from the contents of a
+# per_cpu_count file ("0,12,3,...").
+def parse_per_cpu_count(data):
+    return sum(map(int, data.split(b",")))
+
+# Returns true if any of the (comma separated) handler names in the contents
+# of an actions file match regex.
+def match_actions(regex, data):
+    for action in data.strip().split(","):
+        if action != "" and regex.search(action):
+            return True
+
+    return False
+
+# Monitor plugin
+#   looks for interrupts from devices with handlers matching a regular
+#   expression (as listed in /proc/interrupts), e.g. a keyboard controller or
+#   network card.
+#
+#   Finding the interrupts means reading every directory under
+#   /sys/kernel/irq/, so it is only done at startup and when interrupts are
+#   added or removed (which changes the link count of /sys/kernel/irq/). The
+#   per_cpu_count files of the matching interrupts are kept open.
+class IRQMonitor:
+
+    # Initialise
+    def __init__(self, regex):
+        self._type = "irq"
+        self._regex = regex
+
+        self._count_files = {} # IRQ => StatFile
+        self._counts = {}      # IRQ => count at last check
+        self._nlink = None
+
+    def start(self):
+        self._find_irqs()
+
+    def stop(self):
+        for count_file in self._count_files.values():
+            count_file.close()
+
+        self._count_files = {}
+
+    def active(self):
+        try:
+            if os.stat(IRQ_ROOT).st_nlink != self._nlink:
+                self._find_irqs()
+
+        except OSError as e:
+            error("Unable to stat %s: %s" % (IRQ_ROOT, str(e)))
+
+        ret = False
+
+        for irq, count_file in self._count_files.items():
+            data = count_file.read()
+
+            if data is None:
+                # Interrupt was freed, we'll find out when the link count
+                # changes.
+                continue
+
+            count = parse_per_cpu_count(data)
+            old_count = self._counts.get(irq)
+
+            if old_count is not None and count > old_count:
+                debug('    %s - %d interrupts on IRQ %s' % (self._type, count - old_count, irq))
+                ret = True
+
+            self._counts[irq] = count
+
+        return ret
+
+    def _find_irqs(self):
+        old_files = self._count_files
+
+        self._count_files = {}
+
+        try:
+            self._nlink = os.stat(IRQ_ROOT).st_nlink
+            irqs = os.listdir(IRQ_ROOT)
+
+        except OSError as e:
+            error("Unable to read %s: %s" % (IRQ_ROOT, str(e)))
+            irqs = []
+
+        for irq in irqs:
+            try:
+                with open(os.path.join(IRQ_ROOT, irq, "actions"), "r") as f:
+                    actions = f.read()
+
+            except OSError:
+                continue
+
+            if match_actions(self._regex, actions):
+                self._count_files[irq] = old_files.pop(irq, None) or StatFile(os.path.join(IRQ_ROOT, irq, "per_cpu_count"))
+
+        for irq, count_file in old_files.items():
+            count_file.close()
+            self._counts.pop(irq, None)
+
+        debug('    %s - watching IRQs %s' % (self._type, ", ".join(sorted(self._count_files.keys(), key = int))))
+
+        # Take the initial counts of any new IRQs.
+        for irq, count_file in self._count_files.items():
+            if irq not in self._counts:
+                data = count_file.read()
+
+                if data is not None:
+                    self._counts[irq] = parse_per_cpu_count(data)
+
+# ###########################################################################
+# Editor directives
+# ###########################################################################
+
+# vim:sts=4:ts=4:sw=4:et
@@ -0,0 +1,208 @@
+#    powernapd plugin - Monitors a directory of inhibitor lock files
+#    Copyright (C) 2026 Daniel Collins <solemnwarning@solemnwarning.net>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, version 3 of the License.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import fcntl
+import os
+import time
+from logging import error, debug, info, warn
+
+from ..Inotify import Inotify, IN_CREATE, IN_DELETE, IN_MOVED_FROM, IN_MOVED_TO, IN_ATTRIB, IN_CLOSE, IN_ISDIR, IN_Q_OVERFLOW, IN_DELETE_SELF, IN_MOVE_SELF, IN_ONLYDIR, IN_EXCL_UNLINK
+
+DEFAULT_DIRECTORY = "/run/powernap/inhibit.d"
+
+# Monitor plugin
+#   Allows other programs to block powernapd from taking any actions by
+#   creating files in a directory:
+#
+#   * A file whose name ends in ".lock" only counts while another process holds
+#     an exclusive flock() on it, so the lock goes away with the process:
+#
+#       flock /run/powernap/inhibit.d/backup.lock backup-script
+#
+#   * Any other file counts until it is removed, or until its modification
+#     time if that is in the future:
+#
+#       touch -d "+2 hours" /run/powernap/inhibit.d/maintenance
+#
+#   The directory is watched using inotify, so nothing is read unless it
+#   changes (or an inhibitor expires). Taking a lock on an existing file
+#   doesn't change the directory, so the locks on any .lock files are tested
+#   again on every check.
+class InhibitMonitor:
+
+    # Initialise
+    def __init__(self, directory = DEFAULT_DIRECTORY):
+        self._type = "inhibit"
+        self._directory = directory
+
+        self._inotify = None
+        self._inhibitors = {} # name => expiry time (None = never)
+        self._lock_files = {} # name => fd (for .lock files)
+
+    def start(self):
+        try:
+            os.makedirs(self._directory, mode = 0o755, exist_ok = True)
+        except OSError as e:
+            error("Unable to create inhibitor directory %s: %s" % (self._directory, str(e)))
+
+        self._inotify = Inotify()
+
+        try:
+            self._inotify.add_watch(self._directory,
+                IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO | IN_ATTRIB | IN_CLOSE
+                | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR | IN_EXCL_UNLINK)
+
+        except OSError as e:
+            error("Unable to watch inhibitor directory %s: %s" % (self._directory, str(e)))
+
+            self._inotify.close()
+            self._inotify = None
+
+            return
+
+        self._rescan()
+
+    def stop(self):
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+
+        for name in list(self._lock_files.keys()):
+            self._close_lock_file(name)
+
+        self._inhibitors = {}
+
+    def active(self):
+        if self._inotify is None:
+            return False
+
+        changed = set()
+        rescan = False
+
+        for wd, mask, cookie, name in self._inotify.read_events():
+            if mask & (IN_Q_OVERFLOW | IN_DELETE_SELF | IN_MOVE_SELF):
+                rescan = True
+            elif name != "" and not (mask & IN_ISDIR):
+                changed.add(name)
+
+        if rescan:
+            self._rescan()
+        else:
+            for name in changed:
+                self._check(name)
+
+            for name, fd in self._lock_files.items():
+                if name not in changed:
+                    self._test_lock(name, fd)
+
+        now = time.time()
+        ret = False
+
+        for name, expires in list(self._inhibitors.items()):
+            if expires is None:
+                ret = True
+
+            elif expires > now:
+                ret = True
+
+            else:
+                debug('    %s - %s has expired' % (self._type, name))
+                del self._inhibitors[name]
+
+        return ret
+
+    def _rescan(self):
+        names = set(self._inhibitors.keys()) | set(self._lock_files.keys())
+
+        try:
+            names |= set(os.listdir(self._directory))
+        except OSError as e:
+            error("Unable to read inhibitor directory %s: %s" % (self._directory, str(e)))
+
+        for name in names:
+            self._check(name)
+
+    # Re-evaluates a single file in the directory.
+    def _check(self, name):
+        path = os.path.join(self._directory, name)
+
+        self._inhibitors.pop(name, None)
+
+        try:
+            st = os.stat(path)
+        except OSError:
+            self._close_lock_file(name)
+            return
+
+        if not os.path.isfile(path):
+            self._close_lock_file(name)
+            return
+
+        if name.endswith(".lock"):
+            # We keep our own descriptor for each lock file open, so testing
+            # the lock doesn't cause any more inotify events.
+            fd = self._lock_files.get(name)
+
+            if fd is not None and os.fstat(fd).st_ino != st.st_ino:
+                # File has been replaced.
+                self._close_lock_file(name)
+                fd = None
+
+            if fd is None:
+                try:
+                    fd = os.open(path, os.O_RDONLY | os.O_CLOEXEC | os.O_NOFOLLOW | os.O_NONBLOCK)
+                except OSError:
+                    return
+
+                self._lock_files[name] = fd
+
+            self._test_lock(name, fd)
+
+        else:
+            self._close_lock_file(name)
+
+            # A modification time set ahead of when the file was last changed
+            # (i.e. using touch -d) is an expiry time.
+            if st.st_mtime > (st.st_ctime + 1):
+                debug('    %s - %s expires at %d' % (self._type, name, st.st_mtime))
+                self._inhibitors[name] = st.st_mtime
+            else:
+                debug('    %s - %s has no expiry' % (self._type, name))
+                self._inhibitors[name] = None
+
+    # Counts a .lock file as an inhibitor if somebody else is holding an
+    # exclusive lock on it.
+    def _test_lock(self, name, fd):
+        try:
+            fcntl.flock(fd, fcntl.LOCK_SH | fcntl.LOCK_NB)
+            fcntl.flock(fd, fcntl.LOCK_UN)
+
+            self._inhibitors.pop(name, None)
+
+        except BlockingIOError:
+            debug('    %s - %s is locked' % (self._type, name))
+            self._inhibitors[name] = None
+
+    def _close_lock_file(self, name):
+        fd = self._lock_files.pop(name, None)
+
+        if fd is not None:
+            os.close(fd)
+
+# ###########################################################################
+# Editor directives
+# ###########################################################################
+
+# vim:sts=4:ts=4:sw=4:et
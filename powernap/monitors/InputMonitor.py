@@ -18,88 +18,69 @@
 #    You should have received a copy of the GNU General Public License
 #    along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-import os, re, threading
-import select
-from fcntl import fcntl, F_NOTIFY, DN_CREATE, DN_DELETE, DN_MULTISHOT
+import os, re
 from logging import error, debug, info, warn
 
+from .InputMultiplexer import get_input_multiplexer
+
 # Monitor plugin
 #   Monitors devices in /dev/input for activity
-class InputMonitor ( threading.Thread ):
+#
+#   All matching devices are read by the shared InputMultiplexer, which also
+#   notices devices being added and removed.
+class InputMonitor:
 
     # Initialise
     def __init__ ( self, mouse_or_kbd ):
-        threading.Thread.__init__(self)
         self._type = mouse_or_kbd
         self._absent_seconds = 0
         self._input_received = False
+        self._multiplexer = None
 
         # If regex is in the way of by-id/regex, then path is changed to /dev/input/by-id
         if os.path.split(mouse_or_kbd)[0]:
-            self._path = os.path.join("/dev/input", os.path.dirname(mouse_or_kbd))
+            self.input_path = os.path.join("/dev/input", os.path.dirname(mouse_or_kbd))
             self._regex = re.compile(os.path.basename(mouse_or_kbd))
         elif mouse_or_kbd == "kbd":
-            self._path = "/dev/input/by-id"
+            self.input_path = "/dev/input/by-id"
             self._regex = re.compile(mouse_or_kbd)
         else:
-            self._path = "/dev/input"
+            self.input_path = "/dev/input"
             self._regex = re.compile(mouse_or_kbd)
 
-        # Register for directory events / setup input watches
-        self._inputs = {}
-        self._poll   = select.poll()
-        self._update_inputs()
-        self._dd     = os.open(self._path, 0)
-        fcntl(self._dd, F_NOTIFY, DN_DELETE | DN_CREATE | DN_MULTISHOT)
-
-    # Update the input events list
-    def _update_inputs ( self ):
-        events = {}
-        event = None # Name of the event to poll, after finding it
-        evpath = None # Absolute path of the event to poll
-
-        # Search for the event in path:
-        for str in os.listdir(self._path):
-            match = self._regex.search(str)
-            if match:
-                event = str
-                evpath = os.path.abspath(os.path.join(self._path, event))
-                break
-
-        # If event is different from None, then update!
-        if event:
-           if os.path.exists(evpath):
-              fp = open(evpath)
-              events[evpath] = fp
-              # Register the event to poll
-              self._poll.register(fp.fileno(), select.POLLIN|select.POLLPRI)
-              self._inputs = events
-
-    # Start the thread
-    def start ( self ):
-        self._running = True
-        threading.Thread.start(self)
-
-    # Stop thread
-    def stop ( self ): self._running = False
-
-    # Monitor /dev/input
-    def run ( self ):
-
-        # Poll for events
-        while self._running:
-            res = self._poll.poll(1000)
-            if ( res ):
-                for fd, e in res:
-                    if e & (select.POLLIN|select.POLLPRI):
-                        os.read(fd, 32768) # Read what is there!
-                        self._input_received = True
+    def start(self):
+        self._multiplexer = get_input_multiplexer()
+        self._multiplexer.subscribe(self)
+
+    def stop(self):
+        if self._multiplexer is not None:
+            self._multiplexer.unsubscribe(self)
+            self._multiplexer = None
 
     def active(self):
-        if self._input_received:
+        if self._multiplexer is None:
+            return False
+
+        with self._multiplexer.lock:
+            active = self._input_received
             self._input_received = False
-            return True
-        return False
+
+            if active:
+                self._multiplexer.rearm()
+
+        return active
+
+    # Returns the resolved paths of all matching devices.
+    def find_input_devices(self):
+        try:
+            names = os.listdir(self.input_path)
+        except OSError:
+            return []
+
+        return [ os.path.realpath(os.path.join(self.input_path, name)) for name in names if self._regex.search(name) ]
+
+    def input_received(self, device):
+        self._input_received = True
 
 # ###########################################################################
 # Editor directives
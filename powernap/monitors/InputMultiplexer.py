@@ -0,0 +1,315 @@
+#    powernapd plugin helper - Shared reader for input devices
+#    Copyright (C) 2026 Daniel Collins <solemnwarning@solemnwarning.net>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, version 3 of the License.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import errno
+import os
+import select
+import threading
+from logging import error, debug, info, warn
+
+from ..Inotify import Inotify, IN_ATTRIB, IN_CREATE, IN_DELETE, IN_DELETE_SELF, IN_MOVE, IN_MOVE_SELF, IN_ONLYDIR, IN_IGNORED
+
+IN_MASK = IN_ATTRIB | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE | IN_MOVE_SELF | IN_ONLYDIR
+
+# An open input device, possibly wanted by more than one monitor.
+class InputDevice:
+    __slots__ = [ "path", "fd", "monitors", "armed" ]
+
+    def __init__(self, path, fd):
+        self.path = path
+        self.fd = fd
+        self.monitors = []
+        self.armed = True
+
+# Reads all input devices wanted by any monitor from a single thread.
+#
+# Monitors provide the following attributes and methods:
+#
+# input_path                - Directory the monitor's devices are found in.
+#
+# find_input_devices()      - Returns the resolved paths of all devices the
+#                             monitor wants (see InputMonitor).
+#
+# input_received(device)    - Called (with the multiplexer's lock held) when
+#                             input is read from one of the devices.
+#
+# The directories are watched with inotify, and the devices are looked for
+# again whenever anything in them changes, so devices which are plugged in (or
+# reappear after a resume) are picked up without polling.
+#
+# Once a device has any input, we stop listening to it until rearm() is called
+# from the monitor's active() method, so a busy device costs us one wakeup per
+# tick at most. Any input in the meantime is discarded.
+#
+class InputMultiplexer(threading.Thread):
+    def __init__(self):
+        threading.Thread.__init__(self, daemon = True)
+
+        self.lock = threading.Lock()
+
+        self._monitors = []
+        self._devices = {} # fd => InputDevice
+        self._paths = {}   # device path => InputDevice
+        self._watches = {} # directory path => watch descriptor
+
+        self._running = True
+        self._rescan = True
+        self._rearm = False
+        self._disarmed = [] # InputDevice
+
+        self._epoll = select.epoll()
+        self._inotify = Inotify()
+        self._wake_fd = os.eventfd(0, os.EFD_CLOEXEC | os.EFD_NONBLOCK)
+
+        self._epoll.register(self._wake_fd, select.EPOLLIN)
+        self._epoll.register(self._inotify.fileno(), select.EPOLLIN)
+
+    def subscribe(self, monitor):
+        with self.lock:
+            self._monitors.append(monitor)
+            self._rescan = True
+
+        if not self.is_alive():
+            threading.Thread.start(self)
+        else:
+            os.eventfd_write(self._wake_fd, 1)
+
+    def unsubscribe(self, monitor):
+        global _multiplexer
+
+        with self.lock:
+            self._monitors.remove(monitor)
+            self._rescan = True
+
+            if not self._monitors:
+                self._running = False
+
+                if _multiplexer is self:
+                    _multiplexer = None
+
+        os.eventfd_write(self._wake_fd, 1)
+
+        if not self._running:
+            self.join()
+
+    # Starts listening to any devices which have had input again. Called with
+    # the lock held.
+    def rearm(self):
+        if self._disarmed and not self._rearm:
+            self._rearm = True
+            os.eventfd_write(self._wake_fd, 1)
+
+    def run(self):
+        while self._running:
+            if self._rescan:
+                with self.lock:
+                    self._rescan = False
+
+                    try:
+                        self._update_watches()
+                        self._update_devices()
+
+                    except Exception as e:
+                        error("Error looking for input devices: %s" % str(e))
+
+            if self._rearm:
+                with self.lock:
+                    self._rearm = False
+                    disarmed = self._disarmed
+                    self._disarmed = []
+
+                for device in disarmed:
+                    try:
+                        self._rearm_device(device)
+
+                    except Exception as e:
+                        self._device_failed(device, e)
+
+            for fd, events in self._epoll.poll():
+                if fd == self._wake_fd:
+                    os.eventfd_read(self._wake_fd)
+
+                elif fd == self._inotify.fileno():
+                    for wd, mask, cookie, name in self._inotify.read_events():
+                        if mask & IN_IGNORED:
+                            self._watches = { path: w for path, w in self._watches.items() if w != wd }
+
+                    self._rescan = True
+
+                else:
+                    device = self._devices.get(fd)
+
+                    try:
+                        self._handle_device(device, events)
+
+                    except Exception as e:
+                        self._device_failed(device, e)
+
+        for device in list(self._devices.values()):
+            self._close_device(device)
+
+        self._inotify.close()
+        self._epoll.close()
+        os.close(self._wake_fd)
+
+    def _handle_device(self, device, events):
+        if device is None:
+            return
+
+        if events & (select.EPOLLHUP | select.EPOLLERR):
+            # Device has been unplugged.
+            self._close_device(device)
+
+        elif device.armed:
+            # Stop listening until the next tick, the input itself is left in
+            # the buffer and discarded by _rearm_device().
+            self._epoll.modify(device.fd, 0)
+            device.armed = False
+
+            with self.lock:
+                self._disarmed.append(device)
+
+                for monitor in device.monitors:
+                    monitor.input_received(device)
+
+    def _rearm_device(self, device):
+        if self._devices.get(device.fd) is not device:
+            return # Closed in the meantime
+
+        while True:
+            try:
+                if not os.read(device.fd, 65536):
+                    break
+
+            except BlockingIOError:
+                break
+
+            except OSError as e:
+                # ENODEV when the device has been unplugged.
+                if e.errno != errno.ENODEV:
+                    error("Error reading %s: %s" % (device.path, str(e)))
+
+                self._close_device(device)
+                return
+
+        self._epoll.modify(device.fd, select.EPOLLIN)
+        device.armed = True
+
+    # Watches the directory of each monitor, or its parent if the directory
+    # doesn't exist (yet).
+    def _update_watches(self):
+        paths = set()
+
+        for monitor in self._monitors:
+            path = monitor.input_path
+
+            while path != "/" and not os.path.isdir(path):
+                path = os.path.dirname(path)
+
+            paths.add(path)
+
+        for path in paths - self._watches.keys():
+            try:
+                self._watches[path] = self._inotify.add_watch(path, IN_MASK)
+
+            except OSError as e:
+                warn("Unable to watch %s: %s" % (path, str(e)))
+
+        for path in self._watches.keys() - paths:
+            wd = self._watches.pop(path)
+
+            # The same directory may be watched via another path.
+            if wd not in self._watches.values():
+                self._inotify.rm_watch(wd)
+
+    def _update_devices(self):
+        wanted = {} # device path => [ monitor, ... ]
+
+        for monitor in self._monitors:
+            for path in monitor.find_input_devices():
+                wanted.setdefault(path, []).append(monitor)
+
+        for device in list(self._devices.values()):
+            if device.path not in wanted:
+                self._close_device(device)
+
+        for path, monitors in wanted.items():
+            device = self._paths.get(path)
+
+            if device is None:
+                try:
+                    fd = os.open(path, os.O_RDONLY | os.O_NONBLOCK | os.O_CLOEXEC)
+
+                except OSError as e:
+                    # udev may not have finished setting the device up yet, we
+                    # will try again when it changes the permissions.
+                    debug("Unable to open %s: %s" % (path, str(e)))
+                    continue
+
+                try:
+                    # Fails with EPERM for anything which isn't a device
+                    # (e.g. a directory matched by a wildcard).
+                    self._epoll.register(fd, select.EPOLLIN)
+
+                except OSError as e:
+                    warn("Unable to watch %s: %s" % (path, str(e)))
+                    os.close(fd)
+                    continue
+
+                debug("Watching input device %s" % path)
+
+                device = InputDevice(path, fd)
+                self._devices[fd] = device
+                self._paths[path] = device
+
+            device.monitors = monitors
+
+    # Stops watching a device after an unexpected error, rather than letting it
+    # take the thread (and every other device) down with it.
+    def _device_failed(self, device, e):
+        error("Error watching %s: %s" % (device.path, str(e)))
+
+        if self._devices.get(device.fd) is device:
+            self._close_device(device)
+
+    def _close_device(self, device):
+        debug("No longer watching input device %s" % device.path)
+
+        del self._devices[device.fd]
+        del self._paths[device.path]
+
+        try:
+            self._epoll.unregister(device.fd)
+        except OSError:
+            pass # Closing the fd removes it anyway
+
+        os.close(device.fd)
+
+_multiplexer = None
+
+# Returns the shared InputMultiplexer, creating it if necessary.
+def get_input_multiplexer():
+    global _multiplexer
+
+    if _multiplexer is None:
+        _multiplexer = InputMultiplexer()
+
+    return _multiplexer
+
+# ###########################################################################
+# Editor directives
+# ###########################################################################
+
+# vim:sts=4:ts=4:sw=4:et
@@ -0,0 +1,235 @@
+#    powernapd plugin helper - Shared inventory of network interfaces
+#    Copyright (C) 2026 Daniel Collins <solemnwarning@solemnwarning.net>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, version 3 of the License.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import errno
+import os
+import socket
+import struct
+from logging import error, debug, info, warn
+
+from .. import Netlink
+
+# From linux/rtnetlink.h and linux/if_link.h
+RTM_NEWLINK = 16
+RTM_DELLINK = 17
+RTM_GETLINK = 18
+
+RTMGRP_LINK = 1
+
+IFLA_ADDRESS = 1
+IFLA_IFNAME  = 3
+
+# struct ifinfomsg
+IFINFOMSG = struct.Struct("=BxHiII")
+
+NO_MAC = b"\0" * 6
+
+# Returns a set of the MAC addresses of all network interfaces, as listed in
+# /sys/class/net.
+def get_local_macs():
+    mac_addrs = set()
+
+    for iface in os.listdir("/sys/class/net"):
+        try:
+            with open("/sys/class/net/%s/address" % iface, "r") as f:
+                mac = f.read().strip().replace(":", "")
+
+        except OSError:
+            continue
+
+        if len(mac) == 12:
+            try:
+                mac = bytes.fromhex(mac)
+            except ValueError:
+                continue
+
+            if mac != NO_MAC:
+                mac_addrs.add(mac)
+
+    return mac_addrs
+
+# Parses an RTM_NEWLINK/RTM_DELLINK payload, returning the interface index,
+# name and MAC address (None if it doesn't have an Ethernet-style address).
+def parse_link_message(payload):
+    family, if_type, index, flags, change = IFINFOMSG.unpack_from(payload)
+
+    name = None
+    mac = None
+
+    for attr_type, attr in Netlink.iter_attrs(payload, IFINFOMSG.size):
+        if attr_type == IFLA_IFNAME:
+            name = bytes(attr).split(b"\0", 1)[0].decode("utf-8", "replace")
+
+        elif attr_type == IFLA_ADDRESS and len(attr) == 6 and attr != NO_MAC:
+            mac = bytes(attr)
+
+    return index, name, mac
+
+# Keeps track of the network interfaces on the system, and their MAC addresses.
+#
+# The interfaces are listed once using rtnetlink, after which interfaces being
+# added, removed or changed are picked up from rtnetlink events whenever the
+# inventory is polled. If rtnetlink can't be used, /sys/class/net is read once
+# at startup instead.
+#
+# Subscribers provide the following method, which is called from poll() when
+# the set of MAC addresses changes:
+#
+# interfaces_changed()
+#
+class InterfaceInventory:
+    def __init__(self):
+        self._interfaces = {} # ifindex => (name, MAC address)
+        self._subscribers = []
+        self._seq = 0
+        self._sock = None
+
+        try:
+            self._sock = socket.socket(socket.AF_NETLINK, socket.SOCK_RAW | socket.SOCK_CLOEXEC, Netlink.NETLINK_ROUTE)
+            self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 256 * 1024)
+            self._sock.bind((0, RTMGRP_LINK))
+
+            self._dump()
+            self._macs = self._collect_macs()
+
+        except OSError as e:
+            self._macs = self._fall_back(e)
+
+    def subscribe(self, subscriber):
+        self._subscribers.append(subscriber)
+
+    def unsubscribe(self, subscriber):
+        self._subscribers.remove(subscriber)
+
+    # Returns a frozenset of the MAC addresses of all interfaces.
+    def macs(self):
+        return self._macs
+
+    # Processes any pending interface events.
+    def poll(self):
+        if self._sock is None:
+            return
+
+        changed = False
+        macs = None
+
+        while True:
+            try:
+                data = self._sock.recv(65536, socket.MSG_DONTWAIT)
+
+            except BlockingIOError:
+                break
+
+            except OSError as e:
+                if e.errno != errno.ENOBUFS:
+                    error("Error reading rtnetlink events: %s" % str(e))
+                    break
+
+                # We missed some events, list the interfaces again.
+                self._interfaces = {}
+                changed = True
+
+                try:
+                    self._dump()
+
+                except OSError as e:
+                    macs = self._fall_back(e)
+                    break
+
+                continue
+
+            for msg_type, msg_flags, payload in Netlink.iter_messages(data):
+                changed = self._handle_message(msg_type, payload) or changed
+
+        if changed:
+            if macs is None:
+                macs = self._collect_macs()
+
+            if macs != self._macs:
+                debug("Network interface MAC addresses changed")
+
+                self._macs = macs
+
+                for subscriber in self._subscribers:
+                    subscriber.interfaces_changed()
+
+    # Stops using rtnetlink after an error, returning the MAC addresses read
+    # from /sys/class/net instead.
+    def _fall_back(self, e):
+        warn("Unable to monitor network interfaces using rtnetlink (%s), reading them from /sys/class/net" % str(e))
+
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
+        self._interfaces = {}
+
+        return frozenset(get_local_macs())
+
+    def _dump(self):
+        self._seq += 1
+        self._sock.send(Netlink.pack_message(RTM_GETLINK, Netlink.NLM_F_REQUEST | Netlink.NLM_F_DUMP, self._seq,
+            IFINFOMSG.pack(socket.AF_UNSPEC, 0, 0, 0, 0)))
+
+        while True:
+            data = self._sock.recv(65536)
+
+            for msg_type, msg_flags, payload in Netlink.iter_messages(data):
+                if msg_type == Netlink.NLMSG_DONE:
+                    return
+
+                elif msg_type == Netlink.NLMSG_ERROR:
+                    code = Netlink.error_code(payload)
+                    if code != 0:
+                        raise OSError(-code, os.strerror(-code))
+
+                    return
+
+                self._handle_message(msg_type, payload)
+
+    # Returns true if the message changed anything.
+    def _handle_message(self, msg_type, payload):
+        if (msg_type != RTM_NEWLINK and msg_type != RTM_DELLINK) or len(payload) < IFINFOMSG.size:
+            return False
+
+        index, name, mac = parse_link_message(payload)
+
+        if msg_type == RTM_DELLINK:
+            return self._interfaces.pop(index, None) is not None
+
+        old = self._interfaces.get(index)
+        self._interfaces[index] = (name, mac)
+
+        return old != (name, mac)
+
+    def _collect_macs(self):
+        return frozenset(mac for name, mac in self._interfaces.values() if mac is not None)
+
+_inventory = None
+
+# Returns the shared InterfaceInventory.
+def get_interface_inventory():
+    global _inventory
+
+    if _inventory is None:
+        _inventory = InterfaceInventory()
+
+    return _inventory
+
+# ###########################################################################
+# Editor directives
+# ###########################################################################
+
+# vim:sts=4:ts=4:sw=4:et
@@ -16,28 +16,135 @@
 #    You should have received a copy of the GNU General Public License
 #    along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-import os, multiprocessing
+import os, multiprocessing, time
+from collections import deque
 from logging import error, debug, info, warn
 
+from ..StatFile import StatFile
+
+# Parses the contents of /proc/stat, returning a dictionary mapping "cpu" (all
+# CPUs) and "cpu0", "cpu1", etc to a tuple of the (busy, total) time spent by
+# them. Only the first line ("cpu") is parsed unless per_cpu is true.
+#
+# Time waiting for I/O counts as idle, and time stolen by the hypervisor
+# isn't counted at all.
+#
+def parse_proc_stat(data, per_cpu = False):
+    cpus = {}
+
+    for line in data.splitlines():
+        if not line.startswith(b"cpu"):
+            break
+
+        fields = line.split()
+
+        # user nice system idle iowait irq softirq
+        busy = int(fields[1]) + int(fields[2]) + int(fields[3]) + int(fields[6]) + int(fields[7])
+        idle = int(fields[4]) + int(fields[5])
+
+        cpus[fields[0].decode("ascii")] = (busy, busy + idle)
+
+        if not per_cpu:
+            break
+
+    return cpus
+
 class LoadMonitor():
 
     # Initialise
-    def __init__(self, threshold):
+    #
+    # By default, the 1 minute load average is compared against threshold (a
+    # number, or "n" for the number of CPUs).
+    #
+    # In utilisation mode, the CPU time used in the last window seconds (or
+    # since the last check) is compared against threshold, as a percentage if
+    # percent is true or as a number of CPU cores otherwise. If per_cpu is
+    # true, each CPU is checked on its own and any one being busier than the
+    # threshold counts as activity.
+    #
+    def __init__(self, threshold, utilisation = False, percent = False, window = None, per_cpu = False):
         self._type = "load"
         self._threshold = threshold
         self._absent_seconds = 0
 
+        self._utilisation = utilisation
+        self._percent = percent
+        self._window = window or 0
+        self._per_cpu = per_cpu
+
+        self._cpu_count = multiprocessing.cpu_count()
+        self._stat_file = None
+        self._samples = deque()
+
     # Check system load
     def active(self):
+        if self._utilisation:
+            return self._utilisation_active()
+
         t = self._threshold
         if t == "n":
-            t = multiprocessing.cpu_count()
+            t = self._cpu_count
         if os.getloadavg()[0] > float(t):
             return True
         return False
 
     def start(self):
-        pass
+        if self._utilisation:
+            self._stat_file = StatFile("/proc/stat", 16384)
+
+    def stop(self):
+        if self._stat_file is not None:
+            self._stat_file.close()
+
+    def _utilisation_active(self):
+        data = self._stat_file.read()
+        if data is None:
+            return False
+
+        now = time.monotonic()
+        samples = self._samples
+
+        # Drop any samples which aren't needed to cover the window, always
+        # keeping the previous one.
+        while len(samples) >= 2 and (samples[1][0] <= (now - self._window) or samples[1][0] > now):
+            samples.popleft()
+
+        samples.append((now, parse_proc_stat(data, self._per_cpu)))
+
+        if len(samples) < 2:
+            return False
+
+        old = samples[0][1]
+        new = samples[-1][1]
+
+        if self._per_cpu:
+            # Busiest single CPU, as a fraction of one CPU.
+            used = 0.0
+
+            for cpu, (busy, total) in new.items():
+                if cpu == "cpu" or cpu not in old:
+                    continue
+
+                if total > old[cpu][1]:
+                    used = max(used, (busy - old[cpu][0]) / (total - old[cpu][1]))
+
+            capacity = 1
+
+        else:
+            busy, total = new["cpu"]
+            used = ((busy - old["cpu"][0]) / (total - old["cpu"][1])) if total > old["cpu"][1] else 0.0
+
+            # Fraction of all CPUs.
+            capacity = self._cpu_count
+
+        if self._percent:
+            used *= 100.0
+            debug('    %s - CPU utilisation %.1f%%' % (self._type, used))
+        else:
+            used *= capacity
+            debug('    %s - CPU utilisation %.2f cores' % (self._type, used))
+
+        return used > self._threshold
 
 # ###########################################################################
 # Editor directives
@@ -15,19 +15,54 @@
 
 import logging
 import os
-import re
-import subprocess
+import struct
+import time
 
-class LoggedInUsersMonitor:
-    DAYS_REGEX = re.compile(r"(\d+)days")
-    HOURS_MINUTES_REGEX = re.compile(r"(\d+):(\d+)m")
-    MINUTES_SECONDS_REGEX = re.compile(r"(\d+):(\d+)")
-    SECONDS_REGEX = re.compile(r"(\d+)\.\d+s")
+UTMP_PATH = "/run/utmp"
+
+# struct utmp (from glibc bits/utmp.h), only the fields we need are unpacked:
+#
+#   short   ut_type
+#   pid_t   ut_pid
+#   char    ut_line[32]
+#   char    ut_id[4]
+#   char    ut_user[32]
+#   char    ut_host[256]
+#   ...
+UTMP_RECORD = struct.Struct("=hxxi32s4s32s256s")
+UTMP_RECORD_SIZE = 384
+
+USER_PROCESS = 7
+
+# Returns a list of (user, line, pid) tuples for each USER_PROCESS record in
+# the contents of a utmp file.
+def parse_utmp(data):
+    sessions = []
+
+    for offset in range(0, len(data) - UTMP_RECORD_SIZE + 1, UTMP_RECORD_SIZE):
+        ut_type, ut_pid, ut_line, ut_id, ut_user, ut_host = UTMP_RECORD.unpack_from(data, offset)
 
-    def __init__(self, max_idle_secs):
+        if ut_type != USER_PROCESS:
+            continue
+
+        user = ut_user.split(b"\0", 1)[0].decode("utf-8", "replace")
+        line = ut_line.split(b"\0", 1)[0].decode("utf-8", "replace")
+
+        sessions.append((user, line, ut_pid))
+
+    return sessions
+
+class LoggedInUsersMonitor:
+    def __init__(self, max_idle_secs, utmp_path = UTMP_PATH, dev_path = "/dev"):
         self._type = "users"
         self._max_idle_secs = max_idle_secs
 
+        self._utmp_path = utmp_path
+        self._dev_path = dev_path
+
+        self._utmp_mtime = None
+        self._sessions = []
+
     def start(self):
         pass
 
@@ -35,61 +70,56 @@ class LoggedInUsersMonitor:
         pass
 
     def active(self):
-        # Ensure w output isn't localised
-        w_env = os.environ.copy()
-        w_env["LC_ALL"] = "C"
-
-        result = subprocess.run(["w", "--no-header", "--short", "--terminal", "--ip-addr"],
-            capture_output = True, text = True, stdin = subprocess.DEVNULL, env = w_env)
-
-        if result.returncode == 0:
-            return self._check_w_output(result.stdout)
+        self._read_utmp()
 
-        else:
-            logging.error(f"LoggedInUsersMonitor 'w' command failed with status {result.returncode}")
-            logging.error(result.stderr)
+        now = time.time()
 
-            return False
-
-    def _check_w_output(self, output):
-        lines = output.split("\n")
-
-        for line in lines:
-            if line == "":
+        for user, line, pid in self._sessions:
+            # Skip any sessions left behind by a crashed login process.
+            try:
+                os.kill(pid, 0)
+            except ProcessLookupError:
+                continue
+            except PermissionError:
+                pass
+
+            # Like w, the idle time is the time since the terminal was last
+            # read from (i.e. the user typed something).
+            try:
+                idle_secs = max(now - os.stat(os.path.join(self._dev_path, line)).st_atime, 0)
+            except OSError:
+                logging.debug(f"LoggedInUsersMonitor unable to get idle time of {user} on {line}")
                 continue
 
-            logging.debug("LoggedInUsersMonitor processing line: " + line)
-
-            [ user, tty, host, idle_time, what ] = line.split(None, 4)
-            idle_secs = None
+            logging.debug(f"LoggedInUsersMonitor {user} on {line} idle_secs is {idle_secs:.0f}")
 
-            # Idle time parsing based on format in procps 4.0.2
+            if self._max_idle_secs == None or idle_secs <= self._max_idle_secs:
+                return True
 
-            days_match            = LoggedInUsersMonitor.DAYS_REGEX           .fullmatch(idle_time)
-            hours_minutes_match   = LoggedInUsersMonitor.HOURS_MINUTES_REGEX  .fullmatch(idle_time)
-            minutes_seconds_match = LoggedInUsersMonitor.MINUTES_SECONDS_REGEX.fullmatch(idle_time)
-            seconds_match         = LoggedInUsersMonitor.SECONDS_REGEX        .fullmatch(idle_time)
+        return False
 
-            if days_match:
-                idle_days = int(days_match.group(1))
-                idle_secs = idle_days * 24 * 60 * 60
+    # Re-reads the utmp file if it has been modified since we last read it.
+    def _read_utmp(self):
+        try:
+            mtime = os.stat(self._utmp_path).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
 
-            elif hours_minutes_match:
-                idle_hours = int(hours_minutes_match.group(1))
-                idle_minutes = int(hours_minutes_match.group(2))
-                idle_secs = (idle_hours * 60 * 60) + (idle_minutes * 60)
+        if mtime == self._utmp_mtime and mtime is not None:
+            return
 
-            elif minutes_seconds_match:
-                idle_minutes = int(minutes_seconds_match.group(1))
-                idle_secs = int(minutes_seconds_match.group(2))
-                idle_secs = (idle_minutes * 60) + idle_secs
+        self._utmp_mtime = mtime
+        self._sessions = []
 
-            elif seconds_match:
-                idle_secs = int(seconds_match.group(1))
+        if mtime is None:
+            return
 
-            logging.debug(f"LoggedInUsersMonitor idle_secs is {idle_secs}")
+        try:
+            with open(self._utmp_path, "rb") as f:
+                self._sessions = parse_utmp(f.read())
 
-            if idle_secs != None and (self._max_idle_secs == None or idle_secs <= self._max_idle_secs):
-                return True
+        except OSError as e:
+            logging.error(f"LoggedInUsersMonitor unable to read {self._utmp_path}: {e}")
 
-        return False
+            # Try again next time.
+            self._utmp_mtime = None
@@ -0,0 +1,104 @@
+#    powernapd plugin - Monitors the kernel NFS server for client requests
+#    Copyright (C) 2026 Daniel Collins <solemnwarning@solemnwarning.net>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, version 3 of the License.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import time
+from logging import error, debug, info, warn
+
+from ..StatFile import StatFile
+
+NFSD_STATS = "/proc/net/rpc/nfsd"
+
+# NFSv4 operations which clients send periodically just to keep their state
+# alive, and which shouldn't count as the server being used.
+NFS4_OP_RENEW    = 30
+NFS4_OP_SEQUENCE = 53
+
+# Returns the number of NFS operations served, from the contents of
+# /proc/net/rpc/nfsd.
+#
+# Each procN line holds a count of fields followed by the number of calls to
+# each procedure, procedure 0 (NULL) is a ping so we don't count it. NFSv4
+# requests are all COMPOUND calls, so we count the operations within them from
+# the proc4ops line instead.
+#
+def parse_nfsd_stats(data):
+    ops = 0
+
+    for line in data.splitlines():
+        fields = line.split()
+
+        if len(fields) < 2:
+            continue
+
+        if fields[0] == b"proc2" or fields[0] == b"proc3":
+            ops += sum(map(int, fields[3:]))
+
+        elif fields[0] == b"proc4ops":
+            for op, count in enumerate(fields[2:]):
+                if op != NFS4_OP_RENEW and op != NFS4_OP_SEQUENCE:
+                    ops += int(count)
+
+    return ops
+
+# Monitor plugin
+#   looks for requests being served by the kernel NFS server. This counts
+#   requests served from the page cache too, which never show up as I/O by
+#   the nfsd threads.
+class NFSServerMonitor:
+
+    # Initialise
+    #
+    # threshold is the number of operations per second which must be exceeded
+    # to count as activity.
+    #
+    def __init__(self, threshold = 0):
+        self._type = "nfsd"
+        self._threshold = threshold
+        self._stat_file = StatFile(NFSD_STATS)
+
+        self._ops = None
+        self._sampled_at = None
+
+    def start(self):
+        pass
+
+    def stop(self):
+        self._stat_file.close()
+
+    def active(self):
+        now = time.monotonic()
+
+        # The stats file only exists while the nfsd module is loaded.
+        data = self._stat_file.read()
+        ops = parse_nfsd_stats(data) if data is not None else None
+
+        ret = False
+
+        if ops is not None and self._ops is not None and ops >= self._ops and now > self._sampled_at:
+            rate = (ops - self._ops) / (now - self._sampled_at)
+            debug('    %s - %.1f operations/sec' % (self._type, rate))
+
+            ret = rate > self._threshold
+
+        self._ops = ops
+        self._sampled_at = now
+
+        return ret
+
+# ###########################################################################
+# Editor directives
+# ###########################################################################
+
+# vim:sts=4:ts=4:sw=4:et
@@ -0,0 +1,165 @@
+#    powernapd plugin - Monitors network interface traffic
+#    Copyright (C) 2026 Daniel Collins <solemnwarning@solemnwarning.net>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, version 3 of the License.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import time
+from logging import error, debug, info, warn
+
+from ..StatFile import StatFile
+
+SYS_CLASS_NET = "/sys/class/net"
+
+# Returns the number of bytes sent and received on an interface since the
+# last sample. If ignore_multicast is true, the received bytes are reduced by
+# the fraction of received packets which were multicast/broadcast (there is
+# no counter of multicast bytes).
+def traffic_bytes(old, new, ignore_multicast):
+    rx_bytes, tx_bytes, rx_packets, multicast = (n - o for n, o in zip(new, old))
+
+    if ignore_multicast and rx_packets > 0:
+        rx_bytes -= rx_bytes * min(multicast, rx_packets) / rx_packets
+
+    return rx_bytes + tx_bytes
+
+class InterfaceStats:
+    __slots__ = [ "files", "counters" ]
+
+    def __init__(self, name, ignore_multicast):
+        names = [ "rx_bytes", "tx_bytes" ]
+        if ignore_multicast:
+            names += [ "rx_packets", "multicast" ]
+
+        self.files = [ StatFile(os.path.join(SYS_CLASS_NET, name, "statistics", n), 64) for n in names ]
+        self.counters = None
+
+    # Returns the (rx_bytes, tx_bytes, rx_packets, multicast) counters, with
+    # the packet counters being zero if they aren't read. Returns None if the
+    # interface has gone away.
+    def read(self):
+        counters = [ 0, 0, 0, 0 ]
+
+        for i, stat_file in enumerate(self.files):
+            data = stat_file.read()
+
+            if data is None:
+                return None
+
+            counters[i] = int(data)
+
+        return counters
+
+    def close(self):
+        for stat_file in self.files:
+            stat_file.close()
+
+# Monitor plugin
+#   looks for traffic on network interfaces with names matching a regular
+#   expression, averaged over the time since the last check.
+#
+#   The statistics files of each interface are kept open. The list of
+#   interfaces is refreshed on every check so hotplugged interfaces are seen.
+class NetMonitor:
+
+    # Initialise
+    #
+    # threshold is the number of bytes per second (sent and received across
+    # all matching interfaces) which must be exceeded to count as activity.
+    #
+    def __init__(self, regex, threshold = 0, ignore_multicast = False):
+        self._type = "net"
+        self._regex = regex
+        self._threshold = threshold
+        self._ignore_multicast = ignore_multicast
+
+        self._interfaces = {} # name => InterfaceStats
+        self._matches = {}    # name => bool
+        self._sampled_at = None
+
+    def start(self):
+        pass
+
+    def stop(self):
+        for stats in self._interfaces.values():
+            stats.close()
+
+        self._interfaces = {}
+
+    def active(self):
+        now = time.monotonic()
+
+        try:
+            names = os.listdir(SYS_CLASS_NET)
+        except OSError as e:
+            error("Unable to list %s: %s" % (SYS_CLASS_NET, str(e)))
+            names = []
+
+        old_interfaces = self._interfaces
+        self._interfaces = {}
+
+        # Only interfaces which still exist are carried forward, so interfaces
+        # which come and go (veth, tap, etc) don't build up.
+        old_matches = self._matches
+        self._matches = {}
+
+        total = 0
+
+        for name in names:
+            matches = old_matches.get(name)
+            if matches is None:
+                matches = self._regex.search(name) is not None
+
+            self._matches[name] = matches
+
+            if not matches:
+                continue
+
+            stats = old_interfaces.pop(name, None)
+
+            if stats is None:
+                stats = InterfaceStats(name, self._ignore_multicast)
+
+            counters = stats.read()
+
+            if counters is None:
+                # Interface went away before we read it.
+                stats.close()
+                continue
+
+            if stats.counters is not None and counters[0] >= stats.counters[0] and counters[1] >= stats.counters[1]:
+                total += traffic_bytes(stats.counters, counters, self._ignore_multicast)
+
+            stats.counters = counters
+            self._interfaces[name] = stats
+
+        for stats in old_interfaces.values():
+            stats.close()
+
+        ret = False
+
+        if self._sampled_at is not None and now > self._sampled_at:
+            rate = total / (now - self._sampled_at)
+            debug('    %s - %.0f bytes/sec' % (self._type, rate))
+
+            ret = rate > self._threshold
+
+        self._sampled_at = now
+
+        return ret
+
+# ###########################################################################
+# Editor directives
+# ###########################################################################
+
+# vim:sts=4:ts=4:sw=4:et
@@ -0,0 +1,208 @@
+#    powernapd plugin - Monitors a directory tree for file access
+#    Copyright (C) 2026 Daniel Collins <solemnwarning@solemnwarning.net>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, version 3 of the License.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import select
+import threading
+from logging import error, debug, info, warn
+
+from ..Fanotify import Fanotify, FAN_MARK_ADD, FAN_MARK_FLUSH, FAN_MARK_MOUNT, FAN_ACCESS, FAN_MODIFY, FAN_NOFD
+from ..Inotify import Inotify, IN_ACCESS, IN_MODIFY, IN_CREATE, IN_MOVED_TO, IN_ISDIR, IN_Q_OVERFLOW, IN_IGNORED, IN_ONLYDIR, IN_DONT_FOLLOW
+
+FAN_MASK = FAN_ACCESS | FAN_MODIFY
+IN_MASK  = IN_ACCESS | IN_MODIFY | IN_CREATE | IN_MOVED_TO | IN_ONLYDIR | IN_DONT_FOLLOW
+
+# Monitor plugin
+#   looks for files being read or written anywhere under a directory, e.g. a
+#   file share or media library.
+#
+#   Only files count, directories being listed (including by us, when looking
+#   for new directories to watch) don't.
+#
+#   If the directory is a mount point, fanotify is used to watch the whole
+#   mount when it is available (we need CAP_SYS_ADMIN). Otherwise we put an
+#   inotify watch on every directory in the tree. fanotify isn't used for
+#   other directories, since we would be woken up by every access anywhere on
+#   the mount (e.g. all of / for /srv), and per-directory fanotify marks can't
+#   tell us about new directories without the much more involved FID mode.
+#
+#   Once we see any access, we stop watching until the next tick, so a busy
+#   filesystem costs us one wakeup per tick at most.
+class PathMonitor(threading.Thread):
+
+    # Initialise
+    def __init__(self, path):
+        threading.Thread.__init__(self, daemon = True)
+        self._type = "path"
+        self._path = os.path.realpath(path)
+
+        self._lock = threading.Lock()
+        self._accessed = False
+        self._armed = False
+        self._rearm_inotify = False
+
+        self._fanotify = None
+        self._inotify = None
+        self._watches = {}
+        self._wake_fd = os.eventfd(0, os.EFD_CLOEXEC | os.EFD_NONBLOCK)
+
+    def start(self):
+        if os.path.ismount(self._path):
+            try:
+                self._fanotify = Fanotify()
+                self._fanotify.mark(FAN_MARK_ADD | FAN_MARK_MOUNT, FAN_MASK, self._path)
+
+            except OSError as e:
+                info("Unable to use fanotify for %s (%s), falling back to inotify" % (self._path, str(e)))
+
+                if self._fanotify is not None:
+                    self._fanotify.close()
+                    self._fanotify = None
+
+        if self._fanotify is None:
+            self._inotify = Inotify()
+            self._watch_tree(self._path)
+
+            # Discard the events from us reading the directories.
+            self._drain_inotify()
+
+        self._armed = True
+        self._running = True
+        threading.Thread.start(self)
+
+    def stop(self):
+        self._running = False
+        os.eventfd_write(self._wake_fd, 1)
+
+    def active(self):
+        with self._lock:
+            ret = self._accessed
+            self._accessed = False
+
+            if not self._armed:
+                self._rearm()
+
+        return ret
+
+    def run(self):
+        poll = select.poll()
+        poll.register(self._wake_fd, select.POLLIN)
+
+        notify = self._fanotify if self._fanotify is not None else self._inotify
+        poll.register(notify.fileno(), select.POLLIN)
+
+        while self._running:
+            for fd, e in poll.poll():
+                if fd == self._wake_fd:
+                    os.eventfd_read(self._wake_fd)
+
+                elif self._fanotify is not None:
+                    self._handle_fanotify()
+
+                else:
+                    self._handle_inotify(poll)
+
+                    if not self._armed:
+                        # Stop listening until the next tick.
+                        poll.unregister(self._inotify.fileno())
+
+                    break
+
+            # Re-arming an inotify watch happens on our thread, since the
+            # backlog needs draining first (see _rearm()).
+            if self._inotify is not None and self._armed and self._rearm_inotify:
+                self._rearm_inotify = False
+                self._drain_inotify()
+                poll.register(self._inotify.fileno(), select.POLLIN)
+
+        if self._fanotify is not None:
+            self._fanotify.close()
+
+        if self._inotify is not None:
+            self._inotify.close()
+
+    def _rearm(self):
+        self._armed = True
+
+        if self._fanotify is not None:
+            try:
+                self._fanotify.mark(FAN_MARK_ADD | FAN_MARK_MOUNT, FAN_MASK, self._path)
+            except OSError as e:
+                error("Unable to watch %s: %s" % (self._path, str(e)))
+
+        else:
+            self._rearm_inotify = True
+            os.eventfd_write(self._wake_fd, 1)
+
+    # Called with the lock held after seeing an access.
+    def _disarm(self):
+        self._accessed = True
+        self._armed = False
+
+        if self._fanotify is not None:
+            self._fanotify.mark(FAN_MARK_FLUSH | FAN_MARK_MOUNT, 0)
+
+    def _handle_fanotify(self):
+        for mask, fd, pid in self._fanotify.read_events():
+            if fd == FAN_NOFD:
+                continue
+
+            os.close(fd)
+
+            if self._armed:
+                with self._lock:
+                    debug('    %s - access under %s' % (self._type, self._path))
+                    self._disarm()
+
+    def _handle_inotify(self, poll):
+        for wd, mask, cookie, name in self._inotify.read_events():
+            self._handle_inotify_event(wd, mask, name)
+
+            if mask & (IN_ACCESS | IN_MODIFY) and not (mask & IN_ISDIR) and self._armed:
+                with self._lock:
+                    debug('    %s - access under %s' % (self._type, self._path))
+                    self._disarm()
+
+    def _drain_inotify(self):
+        for wd, mask, cookie, name in self._inotify.read_events():
+            self._handle_inotify_event(wd, mask, name)
+
+    # Keeps the inotify watches in sync with the directory tree.
+    def _handle_inotify_event(self, wd, mask, name):
+        if mask & IN_Q_OVERFLOW:
+            # We may have missed new directories being created.
+            self._watch_tree(self._path)
+
+        elif mask & IN_IGNORED:
+            # Directory was removed.
+            self._watches.pop(wd, None)
+
+        elif (mask & (IN_CREATE | IN_MOVED_TO)) and (mask & IN_ISDIR) and wd in self._watches:
+            self._watch_tree(os.path.join(self._watches[wd], name))
+
+    def _watch_tree(self, path):
+        for dirpath, dirnames, filenames in os.walk(path):
+            try:
+                wd = self._inotify.add_watch(dirpath, IN_MASK)
+                self._watches[wd] = dirpath
+
+            except OSError as e:
+                warn("Unable to watch %s: %s" % (dirpath, str(e)))
+
+# ###########################################################################
+# Editor directives
+# ###########################################################################
+
+# vim:sts=4:ts=4:sw=4:et
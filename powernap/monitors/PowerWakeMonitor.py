@@ -18,133 +18,142 @@
 #    You should have received a copy of the GNU General Public License
 #    along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-import errno
-import os
-import re
-import socket
+import threading
 import time
-
 from logging import error, debug, info, warn
 
-# Obtain a list of available eth's, with its MAC address and WoL data.
-def get_local_macs():
-    mac_addrs = []
-    #Using all network devices, it is also possible to define a specific one like eth for all devices starting with eth*
-    prefix = re.compile("")
-    dirs = os.listdir("/sys/class/net")
-    for iface in dirs:
-        # Obtain MAC address
-        f = None
-        address_path = "/sys/class/net/%s/address" % iface;
-
-        try:
-            f = open(("/sys/class/net/%s/address" % iface), 'r')
-        except FileNotFoundError:
-            continue
-        except NotADirectoryError:
-            continue
-        except Exception as err:
-            error("Error opening %s: %s" % (err))
-
-        mac = f.read()
-        f.close()
+from .. import BPF
+from .Interfaces import get_interface_inventory
+from .UDPListener import get_udp_listener, restrict_sources, source_allowed
 
-        nonhex = re.compile('[^0-9a-fA-F]')
-        mac = nonhex.sub('', mac)
+# powerwake retransmits the same request (and nonce) until it gets a reply or
+# gives up, which it does after a minute by default. Requests seen again within
+# this many seconds are answered but don't count as new activity.
+NONCE_CACHE_SECS = 60
 
-        if len(mac) == 12:
-            mac_addrs.append(bytes.fromhex(mac))
-
-    return mac_addrs
+# Maximum number of requests to remember.
+NONCE_CACHE_SIZE = 256
 
 # Monitor plugin
 #   listen for data on a UDP socket (typically WOL packets)
+#
+#   Requests are answered from the UDPListener's thread as soon as they arrive,
+#   rather than waiting for the next tick, and the activity is recorded for the
+#   next call to active().
 class PowerWakeMonitor:
     # Initialise
-    def __init__ ( self, port ):
+    def __init__ ( self, port, sources = None ):
         self._type = "powerwake"
         self._port = port
+        self._sources = sources
         self._absent_seconds = 0
         self._pending_requests = []
-        self._sock = None
-        self._local_macs = []
+        self._listener = None
+        self._interfaces = get_interface_inventory()
+
+        self._lock = threading.Lock()
+        self._received = False
+        self._nonces = {} # (remote IP, nonce) => time seen
 
     def start ( self ):
       try:
-          self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-          self._sock.bind(('', self._port))
-          self._sock.setblocking(False)
-          self._local_macs = get_local_macs()
+          self._listener = get_udp_listener(self._port)
+          self._listener.subscribe(self)
+          self._listener.start_thread()
 
       except Exception as e:
           error("Error setting up socket on UDP port %d: %s" % (self._port, str(e)))
-          self._sock = None
+          self._listener = None
 
     def stop(self):
-        pass
+        if self._listener != None:
+            self._listener.unsubscribe(self)
+            self._listener = None
 
     def active(self):
-        active = False
+        self._interfaces.poll()
 
-        if self._sock != None:
-            # Arbitrary cap on the number of packets to handle per tick, so
-            # we won't spin processing packets forever.
+        with self._lock:
+            active = self._received
+            self._received = False
 
-            for x in range(128):
-                packet = None
-                remote_addr = None
+        return active
 
-                try:
-                    # Wait for data
-                    packet, remote_addr = self._sock.recvfrom(1024)
+    def udp_packet(self, packet, remote_addr):
+        # See if the packet is a valid PowerWake WOL request
+        if (not source_allowed(self._sources, remote_addr)
+            or len(packet) < 114
+            or packet[0:8] != bytes("PWERWAKE", "ascii")
+            or packet[12:18] != bytes.fromhex("FFFFFFFFFFFF")):
+            # Malformed packet
+            return
+
+        # In some cases, powerwake wants to get a response from powernapd without
+        # knowing what our MAC is (i.e. after waking us via IPMI), so we always respond
+        # to this specifically malformed WoL packet.
+
+        NOT_A_WOL_PACKET = bytes(map(ord, "Not really a WoL packet."))
+
+        if not (packet[18:42] == NOT_A_WOL_PACKET
+            and packet[42:66] == NOT_A_WOL_PACKET
+            and packet[66:90] == NOT_A_WOL_PACKET
+            and packet[90:114] == NOT_A_WOL_PACKET):
+
+            wol_addrs_match = True
+            for i in range(15): # i = 0 .. 15
+                ia = 18 + (i * 6)
+                ib = ia + 6
+
+                if packet[ia:(ia + 6)] != packet[ib:(ib + 6)]:
+                    wol_addrs_match = False
+                    break
 
-                except OSError as e:
-                    if e.errno != errno.EAGAIN:
-                        error("Read error on UDP port %d: %s", (self._port, str(e)));
+            if not wol_addrs_match:
+                # Malformed packet
+                return
 
-                    break
+            if not bytes(packet[18:24]) in self._interfaces.macs():
+                # Not one of our MAC addresses
+                return
 
-                # See if the packet is a valid PowerWake WOL request
-                if (len(packet) < 114
-                    or packet[0:8] != bytes("PWERWAKE", "ascii")
-                    or packet[12:18] != bytes.fromhex("FFFFFFFFFFFF")):
-                    # Malformed packet
-                    continue
+        nonce = int.from_bytes(packet[8:12], byteorder='little', signed=False)
 
-                # In some cases, powerwake wants to get a response from powernapd without
-                # knowing what our MAC is (i.e. after waking us via IPMI), so we always respond
-                # to this specifically malformed WoL packet.
+        if self._is_new_request(remote_addr[0], nonce):
+            debug('    %s - request from %s' % (self._type, remote_addr[0]))
 
-                NOT_A_WOL_PACKET = bytes(map(ord, "Not really a WoL packet."))
+            with self._lock:
+                self._received = True
 
-                if not (packet[18:42] == NOT_A_WOL_PACKET
-                    and packet[42:66] == NOT_A_WOL_PACKET
-                    and packet[66:90] == NOT_A_WOL_PACKET
-                    and packet[90:114] == NOT_A_WOL_PACKET):
+        # Reply to powerwake so it knows the machine is up.
+        reply = bytes("PWERWAKF", "ascii") + nonce.to_bytes(length=4, byteorder='little', signed=False)
 
-                    wol_addrs_match = True
-                    for i in range(15): # i = 0 .. 15
-                        ia = 18 + (i * 6)
-                        ib = ia + 6
+        try:
+            self._listener.sendto(reply, remote_addr)
+        except OSError as e:
+            error("Unable to reply to PowerWake request from %s: %s" % (remote_addr[0], str(e)))
 
-                        if packet[ia:(ia + 6)] != packet[ib:(ib + 6)]:
-                            wol_addrs_match = False
-                            break
+    # Returns false if we've already seen this request recently.
+    def _is_new_request(self, remote_ip, nonce):
+        now = time.monotonic()
+        key = (remote_ip, nonce)
 
-                    if not wol_addrs_match:
-                        # Malformed packet
-                        continue
+        seen_at = self._nonces.get(key)
+        if seen_at is not None and now - seen_at < NONCE_CACHE_SECS:
+            return False
 
-                    if not packet[18:24] in self._local_macs:
-                        # Not one of our MAC addresses
-                        continue
+        # Expire old requests, oldest first (dicts preserve insertion order)
+        while self._nonces:
+            old_key = next(iter(self._nonces))
 
-                nonce = int.from_bytes(packet[8:12], byteorder='little', signed=False)
+            if now - self._nonces[old_key] < NONCE_CACHE_SECS and len(self._nonces) < NONCE_CACHE_SIZE:
+                break
 
-                # Reply to powerwake so it knows the machine is up.
-                reply = bytes("PWERWAKF", "ascii") + nonce.to_bytes(length=4, byteorder='little', signed=False)
-                self._sock.sendto(reply, remote_addr)
+            del self._nonces[old_key]
 
-                active = True
+        self._nonces.pop(key, None)
+        self._nonces[key] = now
 
-        return active
+        return True
+
+    def udp_filter(self):
+        return restrict_sources([ BPF.match_bytes(BPF.UDP_PAYLOAD, b"PWERWAKE") ], self._sources)
@@ -0,0 +1,93 @@
+#    powernapd plugin - Monitors pressure stall information (PSI)
+#    Copyright (C) 2026 Daniel Collins <solemnwarning@solemnwarning.net>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, version 3 of the License.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import errno
+import os
+import select
+from logging import error, debug, info, warn
+
+PRESSURE_ROOT = "/proc/pressure"
+
+# Default trigger: tasks stalled for 150ms within any 1 second window.
+DEFAULT_STALL  = 150000
+DEFAULT_WINDOW = 1000000
+
+# Monitor plugin
+#   looks for tasks being stalled waiting for the CPU, I/O or memory using the
+#   kernel's pressure stall information.
+#
+#   Rather than reading the averages on every tick, a trigger is registered
+#   with the kernel which flags the file when tasks are stalled for more than
+#   stall microseconds within any window microseconds. The flag stays set
+#   until we poll for it, so nothing is missed between ticks.
+#
+#   "some" counts time where at least one task was stalled, "full" counts time
+#   where all (non-idle) tasks were stalled at once.
+class PressureMonitor:
+
+    # Initialise
+    def __init__(self, resource, kind = "some", stall = DEFAULT_STALL, window = DEFAULT_WINDOW):
+        self._type = "pressure"
+        self._path = os.path.join(PRESSURE_ROOT, resource)
+        self._trigger = f"{kind} {stall} {window}"
+
+        self._fd = None
+        self._poll = None
+
+    def start(self):
+        try:
+            self._fd = os.open(self._path, os.O_RDWR | os.O_NONBLOCK | os.O_CLOEXEC)
+            os.write(self._fd, (self._trigger + "\0").encode("ascii"))
+
+        except OSError as e:
+            if e.errno == errno.EINVAL:
+                # Without CAP_SYS_RESOURCE, the window must be a multiple of 2s.
+                error("Unable to register trigger '%s' on %s: %s (check the window is valid)" % (self._trigger, self._path, str(e)))
+            else:
+                error("Unable to register trigger '%s' on %s: %s" % (self._trigger, self._path, str(e)))
+
+            self.stop()
+            return
+
+        self._poll = select.poll()
+        self._poll.register(self._fd, select.POLLPRI)
+
+    def stop(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+            self._poll = None
+
+    # Returns the file descriptor which becomes ready (POLLPRI) when the
+    # trigger fires, or None if no trigger is registered.
+    def fileno(self):
+        return self._fd
+
+    def active(self):
+        if self._poll is None:
+            return False
+
+        for fd, events in self._poll.poll(0):
+            if events & select.POLLPRI:
+                debug('    %s - %s crossed on %s' % (self._type, self._trigger, self._path))
+                return True
+
+        return False
+
+# ###########################################################################
+# Editor directives
+# ###########################################################################
+
+# vim:sts=4:ts=4:sw=4:et
@@ -0,0 +1,180 @@
+#    powernapd plugin helper - Process events from the netlink proc connector
+#    Copyright (C) 2026 Daniel Collins <solemnwarning@solemnwarning.net>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, version 3 of the License.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import errno
+import os
+import socket
+import struct
+import threading
+from logging import error, debug, info, warn
+
+from .. import Netlink
+from .ProcessTable import read_args
+
+# From linux/connector.h and linux/cn_proc.h
+CN_IDX_PROC = 1
+CN_VAL_PROC = 1
+
+PROC_CN_MCAST_LISTEN = 1
+PROC_CN_MCAST_IGNORE = 2
+
+PROC_EVENT_FORK = 0x00000001
+PROC_EVENT_EXEC = 0x00000002
+PROC_EVENT_EXIT = 0x80000000
+
+# struct cn_msg
+CN_MSG = struct.Struct("=IIIIHH")
+
+# struct proc_event (header)
+PROC_EVENT = struct.Struct("=IIQ")
+
+# Event data for fork, exec and exit events (we only need the leading PID fields)
+FORK_DATA = struct.Struct("=IIII")
+EXEC_DATA = struct.Struct("=II")
+EXIT_DATA = struct.Struct("=II")
+
+def _cn_proc_message(op):
+    payload = struct.pack("=I", op)
+    cn_msg = CN_MSG.pack(CN_IDX_PROC, CN_VAL_PROC, 0, 0, len(payload), 0) + payload
+
+    return Netlink.pack_message(Netlink.NLMSG_DONE, 0, 0, cn_msg)
+
+# Receives process fork/exec/exit events from the kernel and passes them on to
+# any subscribed monitors. Subscribers provide the following methods, which are
+# called from the connector thread:
+#
+# process_fork(parent_pid, child_pid)
+# process_exec(pid, args)     - args is formatted as by ProcessTable.read_args()
+# process_exit(pid)
+# process_resync()            - events were lost, rescan the process table
+#
+# Only processes are reported, threads are ignored.
+#
+# If reading events fails, failed is set and no more events are delivered, so
+# subscribers must go back to scanning /proc.
+#
+class ProcConnector(threading.Thread):
+    def __init__(self):
+        threading.Thread.__init__(self, name = "ProcConnector", daemon = True)
+
+        self.failed = False
+        self._subscribers = []
+        self._lock = threading.Lock()
+
+        self._sock = socket.socket(socket.AF_NETLINK, socket.SOCK_DGRAM, Netlink.NETLINK_CONNECTOR)
+
+        try:
+            self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1024 * 1024)
+            self._sock.bind((0, CN_IDX_PROC))
+            self._sock.send(_cn_proc_message(PROC_CN_MCAST_LISTEN))
+        except:
+            self._sock.close()
+            raise
+
+    def subscribe(self, subscriber):
+        with self._lock:
+            self._subscribers = self._subscribers + [ subscriber ]
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers = [ s for s in self._subscribers if s is not subscriber ]
+
+    def run(self):
+        buf = bytearray(65536)
+
+        while True:
+            try:
+                length = self._sock.recv_into(buf)
+            except OSError as e:
+                if e.errno == errno.ENOBUFS:
+                    # The socket buffer overflowed and we lost some events.
+                    warn("Proc connector receive buffer overflowed, rescanning process table")
+
+                    for subscriber in self._subscribers:
+                        subscriber.process_resync()
+
+                    continue
+
+                error("Error reading from proc connector: %s, falling back to scanning /proc" % str(e))
+
+                self.failed = True
+                self._sock.close()
+
+                break
+
+            for msg_type, msg_flags, payload in Netlink.iter_messages(buf[:length]):
+                if msg_type == Netlink.NLMSG_DONE and len(payload) >= (CN_MSG.size + PROC_EVENT.size):
+                    self._handle_event(payload[CN_MSG.size:])
+
+    def _handle_event(self, event):
+        what, cpu, timestamp = PROC_EVENT.unpack_from(event)
+        data = event[PROC_EVENT.size:]
+
+        if what == PROC_EVENT_FORK:
+            parent_pid, parent_tgid, child_pid, child_tgid = FORK_DATA.unpack_from(data)
+
+            if child_pid == child_tgid:
+                for subscriber in self._subscribers:
+                    subscriber.process_fork(parent_tgid, child_pid)
+
+        elif what == PROC_EVENT_EXEC:
+            pid, tgid = EXEC_DATA.unpack_from(data)
+
+            # Read the new command line once for all subscribers, as soon as
+            # possible so we still catch processes which exit quickly.
+            args = read_args(tgid)
+
+            if args is not None:
+                for subscriber in self._subscribers:
+                    subscriber.process_exec(tgid, args)
+
+        elif what == PROC_EVENT_EXIT:
+            pid, tgid = EXIT_DATA.unpack_from(data)
+
+            if pid == tgid:
+                for subscriber in self._subscribers:
+                    subscriber.process_exit(pid)
+
+_connector = None
+_connector_lock = threading.Lock()
+
+# Returns the shared ProcConnector instance, starting it if necessary.
+#
+# Returns None if the proc connector isn't available (e.g. when not running as
+# root or the kernel was built without CONFIG_PROC_EVENTS).
+#
+def get_proc_connector():
+    global _connector
+
+    with _connector_lock:
+        if _connector is None:
+            try:
+                _connector = ProcConnector()
+                _connector.start()
+
+            except OSError as e:
+                info("Proc connector unavailable (%s), falling back to scanning /proc" % str(e))
+                _connector = False
+
+        if not _connector or _connector.failed:
+            return None
+
+        return _connector
+
+# ###########################################################################
+# Editor directives
+# ###########################################################################
+
+# vim:sts=4:ts=4:sw=4:et
@@ -0,0 +1,145 @@
+#    powernapd plugin - Monitors CPU usage of processes
+#    Copyright (C) 2026 Daniel Collins <solemnwarning@solemnwarning.net>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, version 3 of the License.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import time
+from logging import error, debug, info, warn
+
+from ..StatFile import StatFile
+from .ProcessTable import PROCESS_TABLE, ProcessMatcher, parse_stat, read_args, STAT_UTIME, STAT_STIME
+
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK")
+
+# Last seen CPU time for a process
+class ProcessCPUTime:
+    __slots__ = ("identity", "stat_file", "ticks")
+
+    def __init__(self, identity, stat_file, ticks):
+        self.identity = identity
+        self.stat_file = stat_file
+        self.ticks = ticks
+
+# Returns the CPU time (user + system, in clock ticks) from an open
+# /proc/<pid>/stat file, or None if the process has gone away.
+def read_cpu_ticks(stat_file):
+    stat = stat_file.read()
+    if stat is None:
+        return None
+
+    comm, fields = parse_stat(stat)
+    if comm is None or len(fields) <= STAT_STIME:
+        return None
+
+    return int(fields[STAT_UTIME]) + int(fields[STAT_STIME])
+
+# Monitor plugin
+#   looks for processes using more than a threshold percentage of CPU time.
+#   Useful for worker processes which stay running while idle between jobs.
+#
+#   The threshold is a percentage of ONE CPU, so 100% is a process keeping a
+#   single core busy (the same as top).
+class ProcessCPUMonitor:
+
+    # Initialise
+    def __init__(self, regex, threshold, table = PROCESS_TABLE, read_text = read_args, proc_path = "/proc"):
+        self._type = "process-cpu"
+        self._regex = regex
+        self._threshold = threshold
+        self._table = table
+        self._proc_path = proc_path
+        self._matcher = ProcessMatcher(regex, read_text, table)
+
+        self._cputimes = {}
+        self._sampled_at = None
+
+    def start(self):
+        pass
+
+    def stop(self):
+        for cputime in self._cputimes.values():
+            cputime.stat_file.close()
+
+        self._cputimes = {}
+
+    def active(self):
+        now = time.monotonic()
+        ticks = self.get_cpu_ticks()
+
+        ret = False
+
+        if self._sampled_at is not None and now > self._sampled_at:
+            percent = (ticks / CLOCK_TICKS) / (now - self._sampled_at) * 100.0
+            debug('    %s - processes using %.1f%% CPU' % (self._type, percent))
+
+            ret = percent > self._threshold
+
+        self._sampled_at = now
+
+        return ret
+
+    # Returns the number of clock ticks used by matching processes since the
+    # previous call.
+    def get_cpu_ticks(self):
+        pids = self._matcher.find_pids()
+        processes = self._table.scan()
+
+        old_cputimes = self._cputimes
+        new_cputimes = {}
+
+        ticks = 0
+
+        for pid in pids:
+            identity = processes.get(pid)
+            if identity is None:
+                continue
+
+            cputime = old_cputimes.pop(pid, None)
+
+            if cputime is not None and cputime.identity == identity:
+                cur_ticks = read_cpu_ticks(cputime.stat_file)
+
+                if cur_ticks is not None:
+                    ticks += cur_ticks - cputime.ticks
+                    cputime.ticks = cur_ticks
+
+                    new_cputimes[pid] = cputime
+                    continue
+
+            if cputime is not None:
+                cputime.stat_file.close()
+
+            # New process (or a new process with a recycled PID), we only get
+            # a baseline for it this time.
+            stat_file = StatFile(f"{self._proc_path}/{pid}/stat")
+            cur_ticks = read_cpu_ticks(stat_file)
+
+            if cur_ticks is not None:
+                new_cputimes[pid] = ProcessCPUTime(identity, stat_file, cur_ticks)
+            else:
+                stat_file.close()
+
+        # Anything left over has exited (or stopped matching).
+        for cputime in old_cputimes.values():
+            cputime.stat_file.close()
+
+        self._cputimes = new_cputimes
+
+        return ticks
+
+# ###########################################################################
+# Editor directives
+# ###########################################################################
+
+# vim:sts=4:ts=4:sw=4:et
@@ -17,15 +17,11 @@
 #    You should have received a copy of the GNU General Public License
 #    along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-import os, re, subprocess
+import os, re, threading
 from logging import error, debug, info, warn
 
-# Find list of PIDs that match a given regex (cmdline)
-def find_process(ps, regex):
-    for str in ps:
-        if regex.search(str):
-            return 1
-    return 0
+from .ProcConnector import get_proc_connector
+from .ProcessTable import ProcessMatcher
 
 class ProcessMonitor():
 
@@ -34,16 +30,100 @@ class ProcessMonitor():
         self._type = "process"
         self._regex = regex
         self._absent_seconds = 0
+        self._matcher = ProcessMatcher(regex)
+
+        # Used when receiving events from the proc connector.
+        self._connector = None
+        self._lock = threading.Lock()
+        self._pids = set()
+        self._seen = False
+
+        # Events received while scanning the process table, which are applied
+        # on top of the scan results (None when not scanning).
+        self._pending = None
 
     # Check for PIDs
     def active(self):
-        ps = subprocess.getoutput("ps -eo args").splitlines()
-        if find_process(ps, self._regex):
-               return True
+        if self._connector is not None and not self._connector.failed:
+            with self._lock:
+                # Matching processes which have come and gone since the last
+                # check count as activity too.
+                ret = self._seen or len(self._pids) > 0
+                self._seen = False
+
+            return ret
+
+        if self._matcher.find_pids():
+            return True
         return False
 
     def start(self):
-        pass
+        self._connector = get_proc_connector()
+
+        if self._connector is not None:
+            # Subscribe before scanning so we don't miss anything in between.
+            self._connector.subscribe(self)
+            self.process_resync()
+
+    def stop(self):
+        if self._connector is not None:
+            self._connector.unsubscribe(self)
+            self._connector = None
+
+    # Proc connector callbacks
+
+    def process_fork(self, parent_pid, child_pid):
+        with self._lock:
+            self._event(self._fork, parent_pid, child_pid)
+
+    def process_exec(self, pid, args):
+        matched = self._regex.search(args) is not None
+
+        with self._lock:
+            self._event(self._exec, pid, matched)
+
+    def process_exit(self, pid):
+        with self._lock:
+            self._event(self._exit, pid)
+
+    def process_resync(self):
+        with self._lock:
+            self._pending = []
+
+        # The connector thread keeps delivering events while we scan, and any
+        # of them may be for processes the scan has already looked at, so they
+        # are replayed on top of the results rather than being lost.
+        pids = set(self._matcher.find_pids())
+
+        with self._lock:
+            self._pids = pids
+
+            for handler, args in self._pending:
+                handler(*args)
+
+            self._pending = None
+
+    # Applies an event to our PIDs, or saves it until the end of the current
+    # scan. Called with the lock held.
+    def _event(self, handler, *args):
+        if self._pending is not None:
+            self._pending.append((handler, args))
+        else:
+            handler(*args)
+
+    def _fork(self, parent_pid, child_pid):
+        if parent_pid in self._pids:
+            self._pids.add(child_pid)
+
+    def _exec(self, pid, matched):
+        if matched:
+            self._pids.add(pid)
+            self._seen = True
+        else:
+            self._pids.discard(pid)
+
+    def _exit(self, pid):
+        self._pids.discard(pid)
 
 # ###########################################################################
 # Editor directives
@@ -0,0 +1,176 @@
+#    powernapd plugin helper - Shared view of the process table
+#    Copyright (C) 2026 Daniel Collins <solemnwarning@solemnwarning.net>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, version 3 of the License.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import time
+
+# Scans made within this many seconds of each other are shared, so every
+# process monitor checked during one tick reuses a single walk of /proc.
+SCAN_MAX_AGE = 0.5
+
+# Parses the contents of /proc/<pid>/stat, returning the process name (comm)
+# and the remaining fields (starting with the process state).
+#
+# The name is wrapped in parenthesis and may itself contain spaces or
+# parenthesis, so we split on the LAST closing parenthesis.
+#
+def parse_stat(stat):
+    lparen = stat.find(b"(")
+    rparen = stat.rfind(b")")
+
+    if lparen < 0 or rparen < lparen:
+        return None, None
+
+    comm = stat[(lparen + 1):rparen].decode("utf-8", "replace")
+    fields = stat[(rparen + 2):].split()
+
+    return comm, fields
+
+# Index of each /proc/<pid>/stat field in the list returned by parse_stat()
+# (see proc(5), fields are numbered from 1 there).
+STAT_UTIME     = 14 - 3
+STAT_STIME     = 15 - 3
+STAT_STARTTIME = 22 - 3
+
+# Reads the process identity (start time and name) from /proc/<pid>/stat.
+#
+# Returns a (starttime, comm) tuple, or None if the process has gone away.
+# A PID which is reused by a new process will have a different start time,
+# and a process which calls exec() will (almost always) change its name.
+#
+def read_identity(pid):
+    try:
+        with open(f"/proc/{pid}/stat", "rb") as f:
+            comm, fields = parse_stat(f.read())
+    except OSError:
+        return None
+
+    if comm is None or len(fields) <= STAT_STARTTIME:
+        return None
+
+    return (int(fields[STAT_STARTTIME]), comm)
+
+# Reads the command line of a process formatted the same way as "ps -o args",
+# i.e. arguments separated by spaces, or the process name in square brackets
+# for kernel threads and zombies.
+def read_args(pid, comm = None):
+    try:
+        with open(f"/proc/{pid}/cmdline", "rb") as f:
+            cmdline = f.read()
+
+        if cmdline == b"" and comm is None:
+            with open(f"/proc/{pid}/comm", "rb") as f:
+                comm = f.read().rstrip(b"\n").decode("utf-8", "replace")
+
+    except OSError:
+        return None
+
+    if cmdline == b"":
+        return f"[{comm}]"
+
+    return cmdline.rstrip(b"\0").replace(b"\0", b" ").decode("utf-8", "replace")
+
+# Reads the raw (NUL separated) command line of a process.
+def read_cmdline(pid, comm):
+    try:
+        with open(f"/proc/{pid}/cmdline", "r") as f:
+            return f.read()
+    except (OSError, UnicodeDecodeError):
+        return None
+
+# Returns the name of a process, as found in the "Name:" field of
+# /proc/<pid>/status.
+def read_comm(pid, comm):
+    return comm
+
+class ProcessTable:
+    def __init__(self):
+        self._processes = {}
+        self._scanned_at = None
+
+    # Returns a dictionary mapping PIDs of all running processes to their
+    # identity (see read_identity()).
+    def scan(self):
+        now = time.monotonic()
+
+        if self._scanned_at is None or (now - self._scanned_at) >= SCAN_MAX_AGE or now < self._scanned_at:
+            processes = {}
+
+            with os.scandir("/proc") as it:
+                for entry in it:
+                    if not entry.name.isdigit():
+                        continue
+
+                    pid = int(entry.name)
+                    identity = read_identity(pid)
+
+                    if identity is not None:
+                        processes[pid] = identity
+
+            self._processes = processes
+            self._scanned_at = now
+
+        return self._processes
+
+# Shared by all monitors.
+PROCESS_TABLE = ProcessTable()
+
+# Finds processes whose command line (or name) matches a regular expression.
+#
+# The result of matching each process is remembered for as long as the
+# process lives, so only processes which have appeared since the previous
+# call have their command line read and matched against the regex.
+#
+class ProcessMatcher:
+    def __init__(self, regex, read_text = read_args, table = PROCESS_TABLE):
+        self._regex = regex
+        self._read_text = read_text
+        self._table = table
+        self._matches = {}
+
+    # Returns a list of PIDs which match the regex.
+    def find_pids(self):
+        processes = self._table.scan()
+
+        old_matches = self._matches
+        new_matches = {}
+
+        pids = []
+
+        for pid, identity in processes.items():
+            cached = old_matches.get(pid)
+
+            if cached is not None and cached[0] == identity:
+                matched = cached[1]
+            else:
+                text = self._read_text(pid, identity[1])
+                matched = text is not None and self._regex.search(text) is not None
+
+            # Processes which have exited are dropped from the cache by only
+            # carrying forward entries for PIDs found in this scan.
+            new_matches[pid] = (identity, matched)
+
+            if matched:
+                pids.append(pid)
+
+        self._matches = new_matches
+
+        return pids
+
+# ###########################################################################
+# Editor directives
+# ###########################################################################
+
+# vim:sts=4:ts=4:sw=4:et
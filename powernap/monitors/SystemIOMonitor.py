@@ -0,0 +1,191 @@
+#    powernapd plugin - Monitors system-wide disk and swap activity
+#    Copyright (C) 2026 Daniel Collins <solemnwarning@solemnwarning.net>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, version 3 of the License.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import re
+import time
+from logging import error, debug, info, warn
+
+from ..StatFile import StatFile
+from .DiskStats import DISK_STATS, SECTOR_SIZE, is_whole_disk
+
+# Devices which aren't real disks, ignored unless an exclude pattern is given.
+DEFAULT_EXCLUDE = re.compile("^(loop|ram|zram)\\d+$")
+
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+
+# Returns the (pgpgin + pgpgout) and (pswpin + pswpout) counters, converted to
+# bytes, from the contents of /proc/vmstat.
+def parse_vmstat(data):
+    paging = 0
+    swap = 0
+
+    for line in data.splitlines():
+        if line.startswith(b"pgpg"):
+            name, value = line.split()
+            if name == b"pgpgin" or name == b"pgpgout":
+                paging += int(value) * 1024 # These are in KiB
+
+        elif line.startswith(b"pswp"):
+            name, value = line.split()
+            if name == b"pswpin" or name == b"pswpout":
+                swap += int(value) * PAGE_SIZE
+
+    return paging, swap
+
+# Monitor plugin
+#   looks at the total I/O done by block devices and paging to/from swap,
+#   regardless of which processes did it.
+#
+#   Thresholds are all in bytes per second:
+#
+#   threshold        - Total rate of all included devices.
+#   device_threshold - Rate of any single included device.
+#   paging_threshold - Rate of data paged in/out (all block I/O by processes).
+#   swap_threshold   - Rate of swapping in/out.
+#
+#   By default, all whole disks (not partitions) except loop, ram and zram
+#   devices are included. If an include pattern is given, all matching
+#   devices (including partitions) are included instead.
+class SystemIOMonitor:
+
+    # Initialise
+    def __init__(self, threshold = None, device_threshold = None, paging_threshold = None,
+        swap_threshold = None, include = None, exclude = None):
+
+        self._type = "system-io"
+
+        if threshold is None and device_threshold is None and paging_threshold is None and swap_threshold is None:
+            threshold = 0
+
+        self._threshold = threshold
+        self._device_threshold = device_threshold
+        self._paging_threshold = paging_threshold
+        self._swap_threshold = swap_threshold
+        self._include = include
+        self._exclude = exclude if exclude is not None else DEFAULT_EXCLUDE
+
+        self._included = {} # device name => bool
+        self._sectors = {}  # device name => sectors at last sample
+
+        if paging_threshold is not None or swap_threshold is not None:
+            self._vmstat_file = StatFile("/proc/vmstat", 16384)
+        else:
+            self._vmstat_file = None
+
+        self._vmstat = None
+        self._sampled_at = None
+
+    def start(self):
+        pass
+
+    def stop(self):
+        if self._vmstat_file is not None:
+            self._vmstat_file.close()
+
+    def active(self):
+        now = time.monotonic()
+        elapsed = (now - self._sampled_at) if self._sampled_at is not None and now > self._sampled_at else None
+        self._sampled_at = now
+
+        ret = self._check_disks(elapsed)
+
+        if self._vmstat_file is not None:
+            ret = self._check_vmstat(elapsed) or ret
+
+        return ret
+
+    def _is_included(self, name):
+        included = self._included.get(name)
+
+        if included is None:
+            if self._include is not None:
+                included = self._include.search(name) is not None
+            else:
+                included = is_whole_disk(name)
+
+            included = included and self._exclude.search(name) is None
+            self._included[name] = included
+
+        return included
+
+    def _check_disks(self, elapsed):
+        devices = DISK_STATS.read()
+
+        old_sectors = self._sectors
+        new_sectors = {}
+
+        total = 0
+        busiest = 0
+
+        for name, (ios, sectors) in devices.items():
+            if not self._is_included(name):
+                continue
+
+            new_sectors[name] = sectors
+
+            old = old_sectors.get(name)
+            if old is not None and sectors >= old:
+                total += sectors - old
+                busiest = max(busiest, sectors - old)
+
+        # Only devices which still exist are carried forward.
+        self._sectors = new_sectors
+
+        if elapsed is None:
+            return False
+
+        rate = total * SECTOR_SIZE / elapsed
+        busiest_rate = busiest * SECTOR_SIZE / elapsed
+
+        debug('    %s - disks %.0f bytes/sec total, %.0f bytes/sec busiest' % (self._type, rate, busiest_rate))
+
+        if self._threshold is not None and rate > self._threshold:
+            return True
+
+        if self._device_threshold is not None and busiest_rate > self._device_threshold:
+            return True
+
+        return False
+
+    def _check_vmstat(self, elapsed):
+        data = self._vmstat_file.read()
+        if data is None:
+            return False
+
+        old = self._vmstat
+        self._vmstat = parse_vmstat(data)
+
+        if old is None or elapsed is None:
+            return False
+
+        paging_rate = (self._vmstat[0] - old[0]) / elapsed
+        swap_rate   = (self._vmstat[1] - old[1]) / elapsed
+
+        debug('    %s - paging %.0f bytes/sec, swap %.0f bytes/sec' % (self._type, paging_rate, swap_rate))
+
+        if self._paging_threshold is not None and paging_rate > self._paging_threshold:
+            return True
+
+        if self._swap_threshold is not None and swap_rate > self._swap_threshold:
+            return True
+
+        return False
+
+# ###########################################################################
+# Editor directives
+# ###########################################################################
+
+# vim:sts=4:ts=4:sw=4:et
@@ -16,36 +16,253 @@
 #    You should have received a copy of the GNU General Public License
 #    along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-import os, re, subprocess
+import errno, os, socket, struct
 from logging import error, debug, info, warn
 
-# True if an network connection matches 
-def find_connection(netstat, regexes):
-    for regex in regexes:
-        for str in netstat:
-            if regex.search(str):
-                return True
+from .. import Netlink
+from ..StatFile import StatFile
+
+# From linux/sock_diag.h and linux/inet_diag.h
+SOCK_DIAG_BY_FAMILY = 20
+
+INET_DIAG_REQ_BYTECODE = 1
+
+INET_DIAG_INFO = 2
+
+INET_DIAG_BC_JMP  = 1
+INET_DIAG_BC_S_GE = 2
+INET_DIAG_BC_S_LE = 3
+INET_DIAG_BC_D_GE = 4
+INET_DIAG_BC_D_LE = 5
+INET_DIAG_BC_S_EQ = 11
+INET_DIAG_BC_D_EQ = 12
+
+TCP_ESTABLISHED = 1
+
+# struct inet_diag_req_v2 (with an empty inet_diag_sockid)
+INET_DIAG_REQ_V2 = struct.Struct("=BBBxI48x")
+
+# struct inet_diag_msg
+INET_DIAG_MSG = struct.Struct("=BBBBHH16s16sI8sIIIII")
+
+# bytes_acked and bytes_received from struct tcp_info (linux/tcp.h)
+TCP_INFO_BYTES = struct.Struct("=QQ")
+TCP_INFO_BYTES_OFFSET = 120
+
+# struct inet_diag_bc_op
+INET_DIAG_BC_OP = struct.Struct("=BBH")
+
+# Builds an inet_diag bytecode filter which accepts any socket with a local or
+# remote port in any of the given (first, last) port ranges.
+#
+# The filter is run by the kernel for each socket: each op jumps forward by
+# its "yes" offset if its condition is true or its "no" offset if it is false.
+# A socket is accepted if we jump to exactly the end of the filter, and
+# rejected if we jump past it.
+#
+def build_port_filter(ports):
+    blocks = []
+
+    for first, last in ports:
+        if first == last:
+            blocks.append([ (INET_DIAG_BC_S_EQ, first) ])
+            blocks.append([ (INET_DIAG_BC_D_EQ, first) ])
+        else:
+            blocks.append([ (INET_DIAG_BC_S_GE, first), (INET_DIAG_BC_S_LE, last) ])
+            blocks.append([ (INET_DIAG_BC_D_GE, first), (INET_DIAG_BC_D_LE, last) ])
+
+    # Each comparison is an op followed by a second op holding the port, each
+    # block ends with a jump to accept the socket. The final op rejects it.
+    total_len = sum(((len(block) * 2) + 1) * INET_DIAG_BC_OP.size for block in blocks) + INET_DIAG_BC_OP.size
+
+    bytecode = bytearray()
+
+    for block in blocks:
+        block_end = len(bytecode) + (((len(block) * 2) + 1) * INET_DIAG_BC_OP.size)
+
+        for code, port in block:
+            # On failure, skip to the next block.
+            bytecode += INET_DIAG_BC_OP.pack(code, (INET_DIAG_BC_OP.size * 2), block_end - len(bytecode))
+            bytecode += INET_DIAG_BC_OP.pack(0, 0, port)
+
+        bytecode += INET_DIAG_BC_OP.pack(INET_DIAG_BC_JMP, INET_DIAG_BC_OP.size, total_len - len(bytecode))
+
+    bytecode += INET_DIAG_BC_OP.pack(INET_DIAG_BC_JMP, INET_DIAG_BC_OP.size, INET_DIAG_BC_OP.size * 2)
+
+    return bytes(bytecode)
+
+# Returns the total number of bytes sent (and acknowledged) and received on a
+# connection from an inet_diag_msg payload, or None if it doesn't have the
+# INET_DIAG_INFO attribute.
+def parse_diag_bytes(payload):
+    for attr_type, attr in Netlink.iter_attrs(payload, INET_DIAG_MSG.size):
+        if attr_type == INET_DIAG_INFO and len(attr) >= (TCP_INFO_BYTES_OFFSET + TCP_INFO_BYTES.size):
+            bytes_acked, bytes_received = TCP_INFO_BYTES.unpack_from(attr, TCP_INFO_BYTES_OFFSET)
+            return bytes_acked + bytes_received
+
+    return None
+
+# Returns True if the contents of /proc/net/tcp or /proc/net/tcp6 list any
+# established connection with a local or remote port which is set in the
+# port bitmap.
+def find_proc_net_tcp(data, port_bitmap):
+    for line in data.splitlines()[1:]:
+        fields = line.split(None, 4)
+
+        if len(fields) < 4 or fields[3] != b"01":
+            continue
+
+        # Addresses are formatted as "ADDRESS:PORT" in hex.
+        local_port  = int(fields[1][-4:], 16)
+        remote_port = int(fields[2][-4:], 16)
+
+        if port_bitmap[local_port] or port_bitmap[remote_port]:
+            return True
+
     return False
 
 class TCPMonitor():
 
     # Initialise
-    def __init__(self, port_start, port_end):
+    #
+    # ports is a list of (first, last) port ranges, any established connection
+    # to or from a port in any of the ranges counts as activity.
+    #
+    # If min_bytes is given, a connection only counts if more than that many
+    # bytes were sent or received on it since the last check, so idle
+    # connections (e.g. an SSH session left open) don't.
+    #
+    def __init__(self, ports, min_bytes = None):
         self._type = "tcp"
         self._absent_seconds = 0
-        self._regexes = []
-        for port in range(port_start, port_end):
-            self._regexes.append(re.compile("^tcp.*\W.*:%s\W.*ESTABLISHED$" % port))
+        self._ports = ports
+        self._min_bytes = min_bytes
+
+        # Connection cookie => bytes sent/received at last check
+        self._connection_bytes = None
+
+        self._sock = None
+        self._seq = 0
+        self._buf = bytearray(65536)
+        self._request = {}
+
+        self._proc_files = None
+        self._port_bitmap = None
 
     # Check for connections
     def active(self):
-        ps = subprocess.getoutput("netstat -Wnt").splitlines()
-        if find_connection(ps, self._regexes):
-           return True
+        if self._sock is not None:
+            try:
+                return self._find_connections()
+
+            except OSError as e:
+                error("Unable to query TCP connections using sock_diag: %s, falling back to /proc/net/tcp" % str(e))
+
+                self._sock.close()
+                self._sock = None
+                self._init_proc()
+
+        for proc_file in self._proc_files:
+            data = proc_file.read()
+
+            if data is not None and find_proc_net_tcp(data, self._port_bitmap):
+                return True
+
         return False
 
     def start(self):
-        pass
+        bytecode = Netlink.pack_attr(INET_DIAG_REQ_BYTECODE, build_port_filter(self._ports))
+
+        for family in (socket.AF_INET, socket.AF_INET6):
+            ext = (1 << (INET_DIAG_INFO - 1)) if self._min_bytes is not None else 0
+            self._request[family] = INET_DIAG_REQ_V2.pack(family, socket.IPPROTO_TCP, ext, (1 << TCP_ESTABLISHED)) + bytecode
+
+        try:
+            self._sock = socket.socket(socket.AF_NETLINK, socket.SOCK_DGRAM | socket.SOCK_CLOEXEC, Netlink.NETLINK_SOCK_DIAG)
+
+        except OSError as e:
+            info("Unable to open sock_diag socket: %s, falling back to /proc/net/tcp" % str(e))
+            self._init_proc()
+
+    def stop(self):
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
+        if self._proc_files is not None:
+            for proc_file in self._proc_files:
+                proc_file.close()
+
+    def _init_proc(self):
+        if self._min_bytes is not None:
+            warn("Traffic on TCP connections can't be measured without sock_diag, any connection will count as activity")
+
+        self._proc_files = [ StatFile("/proc/net/tcp", 65536), StatFile("/proc/net/tcp6", 65536) ]
+
+        self._port_bitmap = bytearray(65536)
+        for first, last in self._ports:
+            self._port_bitmap[first:(last + 1)] = b"\x01" * (last - first + 1)
+
+    def _find_connections(self):
+        found = False
+
+        old_bytes = self._connection_bytes
+        new_bytes = {}
+
+        for family in (socket.AF_INET, socket.AF_INET6):
+            try:
+                for msg in self._dump(family):
+                    if self._min_bytes is None:
+                        found = True
+                        continue
+
+                    total_bytes = parse_diag_bytes(msg)
+                    if total_bytes is None:
+                        continue
+
+                    cookie = INET_DIAG_MSG.unpack_from(msg)[9]
+                    new_bytes[cookie] = total_bytes
+
+                    # Connections we haven't seen before were opened since the
+                    # last check, so all of their traffic counts (except on
+                    # the first check).
+                    if old_bytes is not None and (total_bytes - old_bytes.get(cookie, 0)) > self._min_bytes:
+                        found = True
+
+            except OSError as e:
+                # IPv6 is disabled.
+                if e.errno != errno.ENOENT or family != socket.AF_INET6:
+                    raise
+
+        # Only connections which are still open are carried forward.
+        if self._min_bytes is not None:
+            self._connection_bytes = new_bytes
+
+        return found
+
+    # Sends a request for established TCP connections matching our port filter
+    # and yields the inet_diag_msg payload of each one. The responses must be
+    # consumed in full.
+    def _dump(self, family):
+        self._seq += 1
+        self._sock.send(Netlink.pack_message(SOCK_DIAG_BY_FAMILY, Netlink.NLM_F_REQUEST | Netlink.NLM_F_DUMP, self._seq, self._request[family]))
+
+        while True:
+            length = self._sock.recv_into(self._buf)
+
+            for msg_type, msg_flags, payload in Netlink.iter_messages(memoryview(self._buf)[:length]):
+                if msg_type == Netlink.NLMSG_DONE:
+                    return
+
+                elif msg_type == Netlink.NLMSG_ERROR:
+                    code = Netlink.error_code(payload)
+                    if code != 0:
+                        raise OSError(-code, os.strerror(-code))
+
+                    return
+
+                elif msg_type == SOCK_DIAG_BY_FAMILY:
+                    yield payload
 
 # ###########################################################################
 # Editor directives
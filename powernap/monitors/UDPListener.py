@@ -0,0 +1,208 @@
+#    powernapd plugin helper - Shared UDP sockets
+#    Copyright (C) 2026 Daniel Collins <solemnwarning@solemnwarning.net>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, version 3 of the License.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import errno
+import ipaddress
+import os
+import select
+import socket
+import threading
+from logging import error, debug, info, warn
+
+from .. import BPF
+
+# Arbitrary cap on the number of packets to handle per poll, so we won't spin
+# processing packets forever.
+MAX_PACKETS_PER_POLL = 128
+
+# A UDP socket bound to a port, shared by all monitors listening on that port.
+#
+# Subscribers provide the following methods:
+#
+# udp_packet(packet, remote_addr) - Called for each packet received. packet is
+#                                   a memoryview which is only valid until the
+#                                   method returns.
+#
+# udp_filter()                    - Returns a list of filter blocks (see
+#                                   BPF.compile_filter()) matching the packets
+#                                   the subscriber wants, or None for all.
+#
+# Packets which no subscriber wants are dropped by the kernel, but since the
+# filter is shared, subscribers may still get packets only wanted by others.
+#
+# Packets are normally read when a subscriber calls poll() from its active()
+# method. A subscriber which needs to handle packets as soon as they arrive can
+# call start_thread(), after which packets are also read and passed to ALL
+# subscribers from a background thread.
+#
+class UDPListener:
+    def __init__(self, port):
+        self.port = port
+        self._subscribers = []
+
+        # Held while reading/dispatching packets or changing subscribers.
+        # Subscribers hold it too when taking what udp_packet() recorded, as
+        # udp_packet() may be called from the listener's thread.
+        self.lock = threading.RLock()
+        self._thread = None
+        self._wake_fd = None
+
+        self._buf = bytearray(65536)
+        self._view = memoryview(self._buf)
+
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+        try:
+            self._sock.bind(('', port))
+            self._sock.setblocking(False)
+        except:
+            self._sock.close()
+            raise
+
+    def subscribe(self, subscriber):
+        with self.lock:
+            self._subscribers.append(subscriber)
+            self.update_filter()
+
+    def unsubscribe(self, subscriber):
+        with self.lock:
+            self._subscribers.remove(subscriber)
+
+            if self._subscribers:
+                self.update_filter()
+                return
+
+            del _listeners[self.port]
+
+        if self._thread is not None:
+            os.eventfd_write(self._wake_fd, 1)
+            self._thread.join()
+            os.close(self._wake_fd)
+
+        self._sock.close()
+
+    # Starts reading packets from a background thread, if not already.
+    def start_thread(self):
+        if self._thread is None:
+            self._wake_fd = os.eventfd(0, os.EFD_CLOEXEC | os.EFD_NONBLOCK)
+            self._thread = threading.Thread(target = self._run, daemon = True)
+            self._thread.start()
+
+    def _run(self):
+        poll = select.poll()
+        poll.register(self._wake_fd, select.POLLIN)
+        poll.register(self._sock.fileno(), select.POLLIN)
+
+        while True:
+            for fd, e in poll.poll():
+                if fd == self._wake_fd:
+                    return
+
+            self.poll()
+
+    # Rebuilds the socket filter from the filters of all subscribers, must be
+    # called if the packets a subscriber wants change.
+    def update_filter(self):
+        with self.lock:
+            self._update_filter()
+
+    def _update_filter(self):
+        blocks = []
+
+        for subscriber in self._subscribers:
+            subscriber_blocks = subscriber.udp_filter()
+
+            if subscriber_blocks is None:
+                BPF.detach_filter(self._sock)
+                return
+
+            blocks += subscriber_blocks
+
+        try:
+            BPF.attach_filter(self._sock, BPF.compile_filter(blocks))
+
+        except (OSError, ValueError) as e:
+            warn("Unable to attach filter to UDP port %d: %s" % (self.port, str(e)))
+            BPF.detach_filter(self._sock)
+
+    # Reads any pending packets and passes them on to the subscribers.
+    def poll(self):
+        with self.lock:
+            self._poll()
+
+    def _poll(self):
+        for x in range(MAX_PACKETS_PER_POLL):
+            try:
+                length, remote_addr = self._sock.recvfrom_into(self._buf)
+
+            except OSError as e:
+                if e.errno != errno.EAGAIN:
+                    error("Read error on UDP port %d: %s" % (self.port, str(e)))
+
+                break
+
+            packet = self._view[:length]
+
+            for subscriber in self._subscribers:
+                # A failing subscriber mustn't stop the others (or our thread)
+                # from getting packets.
+                try:
+                    subscriber.udp_packet(packet, remote_addr)
+
+                except Exception as e:
+                    error("Error handling packet from %s on UDP port %d: %s" % (remote_addr[0], self.port, str(e)))
+
+    def sendto(self, data, remote_addr):
+        self._sock.sendto(data, remote_addr)
+
+# Returns the filter blocks restricted to packets from any of the given IPv4
+# networks (if any).
+def restrict_sources(blocks, sources):
+    if not sources:
+        return blocks
+
+    return [ block + [ BPF.match_ipv4_source(network) ] for block in blocks for network in sources ]
+
+# Returns true if a packet from remote_addr is from any of the given IPv4
+# networks (or no networks are given).
+def source_allowed(sources, remote_addr):
+    if not sources:
+        return True
+
+    addr = ipaddress.IPv4Address(remote_addr[0])
+
+    for network in sources:
+        if addr in network:
+            return True
+
+    return False
+
+_listeners = {}
+
+# Returns the UDPListener for a port, creating it if necessary. Raises OSError
+# if the port can't be bound.
+def get_udp_listener(port):
+    listener = _listeners.get(port)
+
+    if listener is None:
+        listener = _listeners[port] = UDPListener(port)
+
+    return listener
+
+# ###########################################################################
+# Editor directives
+# ###########################################################################
+
+# vim:sts=4:ts=4:sw=4:et
@@ -18,54 +18,55 @@
 #    You should have received a copy of the GNU General Public License
 #    along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-import time, errno
 from logging import error, debug, info, warn
 
+from .UDPListener import get_udp_listener, restrict_sources, source_allowed
+
 # Monitor plugin
 #   listen for data on a UDP socket (typically WOL packets)
 class UDPMonitor:
 
     # Initialise
-    def __init__ ( self, port ):
+    def __init__ ( self, port, sources = None ):
         self._type = "udp"
         self._port = port
+        self._sources = sources
         self._absent_seconds = 0
-        self._sock = None
+        self._listener = None
+        self._received = False
 
     def start ( self ):
       try:
-          self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-          self._sock.bind(('', self._port))
-          self._sock.setblocking(False)
+          self._listener = get_udp_listener(self._port)
+          self._listener.subscribe(self)
 
       except Exception as e:
           error("Error setting up socket on UDP port %d: %s" % (self._port, str(e)))
-          self._sock = None
+          self._listener = None
 
     def stop(self):
-        pass
+        if self._listener != None:
+            self._listener.unsubscribe(self)
+            self._listener = None
 
     def active(self):
-        active = False
-
-        if self._sock != None:
-            # Arbitrary cap on the number of packets to handle per tick, so
-            # we won't spin processing packets forever.
+        if self._listener == None:
+            return False
 
-            for x in range(128):
-                packet = None
-                remote_addr = None
+        with self._listener.lock:
+            self._listener.poll()
 
-                try:
-                    # Wait for data
-                    packet, remote_addr = self._sock.recvfrom(1024)
+            active = self._received
+            self._received = False
 
-                except OSError as e:
-                    if e.errno != errno.EAGAIN:
-                        error("Read error on UDP port %d: %s", (self._port, str(e)));
+        return active
 
-                    break
+    def udp_packet(self, packet, remote_addr):
+        if source_allowed(self._sources, remote_addr):
+            self._received = True
 
-                active = True
+    def udp_filter(self):
+        if self._sources:
+            return restrict_sources([ [] ], self._sources)
 
-        return active
+        return None
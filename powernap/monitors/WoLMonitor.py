@@ -17,94 +17,82 @@
 #    You should have received a copy of the GNU General Public License
 #    along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-import time, socket, os, re, struct, traceback, errno
+import re
 from logging import error, debug, info, warn
 
-def get_local_macs():
-    mac_addrs = []
-    #Using all network devices, it is also possible to define a specific one like eth for all devices starting with eth*
-    prefix = re.compile("")
-    dirs = os.listdir("/sys/class/net")
-    for iface in dirs:
-        # Obtain MAC address
-        f = None
-        address_path = "/sys/class/net/%s/address" % iface;
+from .. import BPF
+from .Interfaces import get_interface_inventory
+from .UDPListener import get_udp_listener, restrict_sources, source_allowed
 
-        try:
-            f = open(("/sys/class/net/%s/address" % iface), 'r')
-        except FileNotFoundError:
-            continue
-        except NotADirectoryError:
-            continue
-        except Exception as err:
-            error("Error opening %s: %s" % (err))
+# Length of a magic packet (sync stream and 16 copies of the MAC address).
+WOL_PACKET_LENGTH = 6 + (6 * 16)
 
-        mac = f.read()
-        f.close()
+# The sync stream followed by the same MAC address 16 times, anywhere within
+# the packet. Group 1 is the MAC address.
+WOL_PACKET = re.compile(rb"\xff{6}(.{6})\1{15}", re.DOTALL)
 
-        nonhex = re.compile('[^0-9a-fA-F]')
-        mac = nonhex.sub('', mac)
-
-        if len(mac) == 12:
-            mac_addrs.append(bytes.fromhex(mac))
-
-    return mac_addrs
-
-def wol_for_mac(mac):
-    return bytes.fromhex("FFFFFFFFFFFF") + (mac * 16)
+# Returns the MAC address a magic packet is addressed to, or None if the
+# packet doesn't contain one.
+def find_wol_mac(packet):
+    m = WOL_PACKET.search(packet)
+    return m.group(1) if m is not None else None
 
 # Monitor plugin
 #   listen for WoL data in a UDP socket. It compares if the data is specifically
 #   for any of the interfaces
+#
+#   The magic packet may be anywhere in the payload, which the socket filter
+#   can't search for, so the filter only drops packets too short to hold one.
 class WoLMonitor:
 
     # Initialise
-    def __init__ ( self, port ):
+    def __init__ ( self, port, sources = None ):
         self._type = "wol"
         self._port = port
+        self._sources = sources
         self._host = '' # Bind to all Interfaces
         self._absent_seconds = 0
-        self._sock = None
-
-        mac_addrs = get_local_macs()
-        self._wol_payloads = list(map(wol_for_mac, mac_addrs))
+        self._listener = None
+        self._received = False
+        self._interfaces = get_interface_inventory()
 
     def start ( self ):
       try:
-          self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-          self._sock.bind(('', self._port))
-          self._sock.setblocking(False)
+          self._listener = get_udp_listener(self._port)
+          self._listener.subscribe(self)
 
       except Exception as e:
           error("Error setting up socket on UDP port %d: %s" % (self._port, str(e)))
-          self._sock = None
+          self._listener = None
 
     def stop(self):
-        pass
+        if self._listener != None:
+            self._listener.unsubscribe(self)
+            self._listener = None
 
     def active(self):
-        active = False
+        if self._listener == None:
+            return False
+
+        self._interfaces.poll()
 
-        if self._sock != None:
-            # Arbitrary cap on the number of packets to handle per tick, so
-            # we won't spin processing packets forever.
+        with self._listener.lock:
+            self._listener.poll()
 
-            for x in range(128):
-                packet = None
-                remote_addr = None
+            active = self._received
+            self._received = False
 
-                try:
-                    # Wait for data
-                    packet, remote_addr = self._sock.recvfrom(1024)
+        return active
 
-                except OSError as e:
-                    if e.errno != errno.EAGAIN:
-                        error("Read error on UDP port %d: %s", (self._port, str(e)));
+    def udp_packet(self, packet, remote_addr):
+        if not source_allowed(self._sources, remote_addr):
+            return
 
-                    break
+        mac = find_wol_mac(packet)
 
-                for wol_payload in self._wol_payloads:
-                    if wol_payload in packet:
-                        active = True
+        if mac is not None and mac in self._interfaces.macs():
+            self._received = True
 
-        return active
+    # Only accept packets long enough to hold a magic packet (see above).
+    def udp_filter(self):
+        return restrict_sources([ [ BPF.match_min_length(BPF.UDP_PAYLOAD + WOL_PACKET_LENGTH) ] ], self._sources)
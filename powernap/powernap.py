@@ -20,7 +20,7 @@
 
 import sys, re, os
 
-from .monitors import ProcessMonitor, LoadMonitor, InputMonitor, TCPMonitor, UDPMonitor, IOMonitor, WoLMonitor, ConsoleMonitor, DiskMonitor, PowerWakeMonitor, LoggedInUsersMonitor
+from .monitors import AudioMonitor, ProcessMonitor, ProcessCPUMonitor, LoadMonitor, InputMonitor, TCPMonitor, UDPMonitor, IOMonitor, WoLMonitor, ConsoleMonitor, DiskMonitor, CgroupMonitor, CgroupPopulatedMonitor, InhibitMonitor, IRQMonitor, PathMonitor, NetMonitor, NFSServerMonitor, PressureMonitor, SystemIOMonitor, PowerWakeMonitor, LoggedInUsersMonitor
 from .ConfigReader import ConfigReader
 
 class PowerNap:
@@ -49,18 +49,29 @@ class PowerNap:
     def get_monitors(self):
         monitor = []
         for config in self.config["monitors"]:
+            if config["type"] == "audio":       p = AudioMonitor.AudioMonitor()
+            if config["type"] == "cgroup":      p = CgroupMonitor.CgroupMonitor(config["path"], config["resource"], config["threshold"])
+            if config["type"] == "cgroup-populated": p = CgroupPopulatedMonitor.CgroupPopulatedMonitor(config["path"])
             if config["type"] == "console":     p = ConsoleMonitor.ConsoleMonitor()
             if config["type"] == "disk":        p = DiskMonitor.DiskMonitor(config["device"])
+            if config["type"] == "inhibit":     p = InhibitMonitor.InhibitMonitor(config.get("directory", InhibitMonitor.DEFAULT_DIRECTORY))
+            if config["type"] == "irq":         p = IRQMonitor.IRQMonitor(config["regex"])
             if config["type"] == "keyboard":    p = InputMonitor.InputMonitor("kbd")
-            if config["type"] == "load":        p = LoadMonitor.LoadMonitor(config["threshold"])
+            if config["type"] == "load":        p = LoadMonitor.LoadMonitor(config["threshold"], config.get("mode") == "utilisation", config.get("percent", False), config.get("window"), config.get("per_cpu", False))
             if config["type"] == "mouse":       p = InputMonitor.InputMonitor("mice")
+            if config["type"] == "net":         p = NetMonitor.NetMonitor(config["regex"], config["threshold"], config.get("ignore_multicast", False))
+            if config["type"] == "nfsd":        p = NFSServerMonitor.NFSServerMonitor(config.get("threshold", 0))
+            if config["type"] == "path":        p = PathMonitor.PathMonitor(config["path"])
+            if config["type"] == "pressure":    p = PressureMonitor.PressureMonitor(config["resource"], config.get("kind", "some"), config.get("stall", PressureMonitor.DEFAULT_STALL), config.get("window", PressureMonitor.DEFAULT_WINDOW))
             if config["type"] == "process":     p = ProcessMonitor.ProcessMonitor(config["regex"])
-            if config["type"] == "process-io":  p = IOMonitor.IOMonitor(config["regex"])
-            if config["type"] == "powerwake":   p = PowerWakeMonitor.PowerWakeMonitor(config["port"])
-            if config["type"] == "tcp":         p = TCPMonitor.TCPMonitor(config["port"], config["port"])
-            if config["type"] == "udp":         p = UDPMonitor.UDPMonitor(config["port"])
+            if config["type"] == "process-cpu": p = ProcessCPUMonitor.ProcessCPUMonitor(config["regex"], config["threshold"])
+            if config["type"] == "process-io":  p = IOMonitor.IOMonitor(config["regex"], config.get("threshold", 0), config.get("window"))
+            if config["type"] == "powerwake":   p = PowerWakeMonitor.PowerWakeMonitor(config["port"], config.get("sources"))
+            if config["type"] == "system-io":   p = SystemIOMonitor.SystemIOMonitor(config.get("threshold"), config.get("device_threshold"), config.get("paging_threshold"), config.get("swap_threshold"), config.get("include"), config.get("exclude"))
+            if config["type"] == "tcp":         p = TCPMonitor.TCPMonitor(config["ports"], config.get("min_bytes"))
+            if config["type"] == "udp":         p = UDPMonitor.UDPMonitor(config["port"], config.get("sources"))
             if config["type"] == "users":       p = LoggedInUsersMonitor.LoggedInUsersMonitor(config["max_idle_secs"])
-            if config["type"] == "wol":         p = WoLMonitor.WoLMonitor(config["port"])
+            if config["type"] == "wol":         p = WoLMonitor.WoLMonitor(config["port"], config.get("sources"))
 
             monitor.append(p)
 
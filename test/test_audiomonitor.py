@@ -0,0 +1,26 @@
+import unittest
+
+from powernap.monitors.AudioMonitor import parse_pcm_status
+
+class TestAudioMonitorParseStatus(unittest.TestCase):
+	def runTest(self):
+		self.assertFalse(parse_pcm_status(b"closed\n"))
+		
+		self.assertTrue(parse_pcm_status(
+			b"state: RUNNING\n" +
+			b"owner_pid   : 1234\n" +
+			b"trigger_time: 100.000000000\n" +
+			b"tstamp      : 0.000000000\n" +
+			b"delay       : 1024\n" +
+			b"avail       : 3072\n" +
+			b"avail_max   : 3072\n" +
+			b"-----\n" +
+			b"hw_ptr      : 441000\n" +
+			b"appl_ptr    : 442024\n"))
+		
+		self.assertTrue(parse_pcm_status(b"state: DRAINING\nowner_pid   : 1234\n"))
+		self.assertFalse(parse_pcm_status(b"state: PREPARED\nowner_pid   : 1234\n"))
+		self.assertFalse(parse_pcm_status(b"state: PAUSED\nowner_pid   : 1234\n"))
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,36 @@
+import unittest
+
+from powernap.monitors.CgroupMonitor import parse_cpu_stat, parse_io_stat
+
+class TestCgroupMonitorParseCPUStat(unittest.TestCase):
+	def runTest(self):
+		self.assertEqual(parse_cpu_stat(
+			b"usage_usec 1234567\n"
+			b"user_usec 1000000\n"
+			b"system_usec 234567\n"
+			b"nr_periods 0\n"
+			b"nr_throttled 0\n"
+			b"throttled_usec 0\n"), 1234567)
+		
+		# Only the total counts
+		self.assertEqual(parse_cpu_stat(b"user_usec 10\nusage_usec 30\nsystem_usec 20\n"), 30)
+		
+		# Missing
+		self.assertIsNone(parse_cpu_stat(b"user_usec 10\nsystem_usec 20\n"))
+		self.assertIsNone(parse_cpu_stat(b""))
+
+class TestCgroupMonitorParseIOStat(unittest.TestCase):
+	def runTest(self):
+		self.assertEqual(parse_io_stat(
+			b"8:0 rbytes=1000 wbytes=2000 rios=10 wios=20 dbytes=0 dios=0\n"
+			b"253:1 rbytes=300 wbytes=40 rios=3 wios=4 dbytes=512 dios=1\n"), 3340)
+		
+		# Devices without any byte counters
+		self.assertEqual(parse_io_stat(b"8:0 rios=10 wios=20\n8:16 rbytes=5\n"), 5)
+		
+		# No I/O done by the cgroup yet
+		self.assertEqual(parse_io_stat(b""), 0)
+		self.assertEqual(parse_io_stat(b"\n"), 0)
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,99 @@
+import os
+import tempfile
+import unittest
+
+from powernap.monitors import CgroupPopulatedMonitor
+from powernap.monitors.CgroupPopulatedMonitor import parse_cgroup_events
+
+class TestCgroupPopulatedMonitorParseEvents(unittest.TestCase):
+	def runTest(self):
+		self.assertTrue(parse_cgroup_events(b"populated 1\nfrozen 0\n"))
+		self.assertFalse(parse_cgroup_events(b"populated 0\nfrozen 0\n"))
+		self.assertFalse(parse_cgroup_events(b"frozen 0\n"))
+		self.assertFalse(parse_cgroup_events(b""))
+
+class CgroupRootFixture:
+	def __init__(self):
+		self.tmpdir = tempfile.TemporaryDirectory()
+		self.old_root = CgroupPopulatedMonitor.CGROUP_ROOT
+		CgroupPopulatedMonitor.CGROUP_ROOT = self.tmpdir.name
+	
+	def close(self):
+		CgroupPopulatedMonitor.CGROUP_ROOT = self.old_root
+		self.tmpdir.cleanup()
+	
+	def write_events(self, path, populated):
+		with open(os.path.join(self.tmpdir.name, path, "cgroup.events"), "w") as f:
+			f.write("populated %d\nfrozen 0\n" % populated)
+
+class TestCgroupPopulatedMonitorTransitions(unittest.TestCase):
+	def runTest(self):
+		root = CgroupRootFixture()
+		
+		try:
+			os.mkdir(os.path.join(root.tmpdir.name, "foo"))
+			root.write_events("foo", 0)
+			
+			monitor = CgroupPopulatedMonitor.CgroupPopulatedMonitor("foo")
+			monitor.start()
+			
+			self.assertFalse(monitor.active())
+			
+			root.write_events("foo", 1)
+			self.assertTrue(monitor.active())
+			self.assertTrue(monitor.active())
+			
+			# Populated at some point since the last check
+			root.write_events("foo", 0)
+			self.assertTrue(monitor.active())
+			self.assertFalse(monitor.active())
+			
+			monitor.stop()
+		
+		finally:
+			root.close()
+
+class TestCgroupPopulatedMonitorCreated(unittest.TestCase):
+	def runTest(self):
+		root = CgroupRootFixture()
+		
+		try:
+			monitor = CgroupPopulatedMonitor.CgroupPopulatedMonitor("foo/bar")
+			monitor.start()
+			
+			self.assertFalse(monitor.active())
+			
+			os.mkdir(os.path.join(root.tmpdir.name, "foo"))
+			self.assertFalse(monitor.active())
+			
+			os.mkdir(os.path.join(root.tmpdir.name, "foo", "bar"))
+			root.write_events("foo/bar", 1)
+			self.assertTrue(monitor.active())
+			
+			monitor.stop()
+		
+		finally:
+			root.close()
+
+class TestCgroupPopulatedMonitorNotV2(unittest.TestCase):
+	def runTest(self):
+		root = CgroupRootFixture()
+		
+		try:
+			# Directory exists but has no cgroup.events (e.g. cgroup v1)
+			os.mkdir(os.path.join(root.tmpdir.name, "foo"))
+			
+			monitor = CgroupPopulatedMonitor.CgroupPopulatedMonitor("foo")
+			
+			with self.assertLogs(level = "ERROR"):
+				monitor.start()
+			
+			self.assertFalse(monitor.active())
+			
+			monitor.stop()
+		
+		finally:
+			root.close()
+
+if __name__ == '__main__':
+	unittest.main()
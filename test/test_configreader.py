@@ -1,6 +1,8 @@
+import ipaddress
 import re
 import tempfile
 import unittest
+from unittest import mock
 
 from powernap.ConfigReader import ConfigReader
 
@@ -71,10 +73,87 @@ class TestPowerNapSpecifyMonitors(unittest.TestCase):
 			{ "type": "powerwake", "port": 1234 },
 			{ "type": "process", "regex": re.compile("^/sbin/init foo") },
 			{ "type": "process-io", "regex": re.compile("samba") },
-			{ "type": "tcp", "port": 80 },
+			{ "type": "tcp", "ports": [ (80, 80) ] },
 			{ "type": "udp", "port": 53 },
 			{ "type": "wol", "port": 9 } ])
 
+class TestPowerNapCgroupMonitor(unittest.TestCase):
+	def runTest(self):
+		config = tempfile.NamedTemporaryFile()
+		config.file.write(
+			b"monitor cgroup system.slice/smbd.service io above 1M\n" +
+			b"monitor cgroup /machine.slice/ cpu above 5%\n")
+		config.file.flush()
+		
+		cr = ConfigReader([ "poweroff", "suspend", "powersave" ])
+		c = cr.read_config(config.name)
+		
+		self.assertEqual(c["monitors"], [
+			{ "type": "cgroup", "path": "system.slice/smbd.service", "resource": "io", "threshold": 1048576 },
+			{ "type": "cgroup", "path": "machine.slice", "resource": "cpu", "threshold": 5.0 } ])
+
+class TestPowerNapCgroupPopulatedMonitor(unittest.TestCase):
+	def runTest(self):
+		config = tempfile.NamedTemporaryFile()
+		config.file.write(
+			b"monitor cgroup machine.slice populated\n")
+		config.file.flush()
+		
+		cr = ConfigReader([ "poweroff", "suspend", "powersave" ])
+		c = cr.read_config(config.name)
+		
+		self.assertEqual(c["monitors"], [
+			{ "type": "cgroup-populated", "path": "machine.slice" } ])
+
+class TestPowerNapCgroupMonitorBadResource(unittest.TestCase):
+	def runTest(self):
+		config = tempfile.NamedTemporaryFile()
+		config.file.write(
+			b"monitor cgroup machine.slice memory above 1G\n")
+		config.file.flush()
+		
+		cr = ConfigReader([ "poweroff", "suspend", "powersave" ])
+		
+		with self.assertRaisesRegex(Exception, f"Expected 'cpu', 'io' or 'populated' after 'machine.slice' at {config.name} line 1") as e:
+			cr.read_config(config.name)
+
+class TestPowerNapCgroupMonitorBadPath(unittest.TestCase):
+	def runTest(self):
+		config = tempfile.NamedTemporaryFile()
+		config.file.write(
+			b"monitor cgroup ../etc cpu above 1%\n")
+		config.file.flush()
+		
+		cr = ConfigReader([ "poweroff", "suspend", "powersave" ])
+		
+		with self.assertRaisesRegex(Exception, f"Invalid cgroup path '../etc' at {config.name} line 1") as e:
+			cr.read_config(config.name)
+
+class TestPowerNapAudioMonitor(unittest.TestCase):
+	def runTest(self):
+		config = tempfile.NamedTemporaryFile()
+		config.file.write(
+			b"monitor audio\n")
+		config.file.flush()
+		
+		cr = ConfigReader([ "poweroff", "suspend", "powersave" ])
+		c = cr.read_config(config.name)
+		
+		self.assertEqual(c["monitors"], [
+			{ "type": "audio" } ])
+
+class TestPowerNapAudioMonitorParameters(unittest.TestCase):
+	def runTest(self):
+		config = tempfile.NamedTemporaryFile()
+		config.file.write(
+			b"monitor audio hw:0\n")
+		config.file.flush()
+		
+		cr = ConfigReader([ "poweroff", "suspend", "powersave" ])
+		
+		with self.assertRaisesRegex(Exception, f"Unexpected 'hw:0' after 'audio' at {config.name} line 1") as e:
+			cr.read_config(config.name)
+
 class TestPowerNapDiskMonitorNoDevice(unittest.TestCase):
 	def runTest(self):
 		config = tempfile.NamedTemporaryFile()
@@ -87,6 +166,58 @@ class TestPowerNapDiskMonitorNoDevice(unittest.TestCase):
 		with self.assertRaisesRegex(Exception, f"Expected device name after 'disk' at {config.name} line 1") as e:
 			cr.read_config(config.name)
 
+class TestPowerNapInhibitMonitor(unittest.TestCase):
+	def runTest(self):
+		config = tempfile.NamedTemporaryFile()
+		config.file.write(
+			b"monitor inhibit\n" +
+			b"monitor inhibit /var/lib/powernap/inhibit\n")
+		config.file.flush()
+		
+		cr = ConfigReader([ "poweroff", "suspend", "powersave" ])
+		c = cr.read_config(config.name)
+		
+		self.assertEqual(c["monitors"], [
+			{ "type": "inhibit" },
+			{ "type": "inhibit", "directory": "/var/lib/powernap/inhibit" } ])
+
+class TestPowerNapInhibitMonitorRelativePath(unittest.TestCase):
+	def runTest(self):
+		config = tempfile.NamedTemporaryFile()
+		config.file.write(
+			b"monitor inhibit inhibit.d\n")
+		config.file.flush()
+		
+		cr = ConfigReader([ "poweroff", "suspend", "powersave" ])
+		
+		with self.assertRaisesRegex(Exception, f"Expected an absolute directory path after 'inhibit' at {config.name} line 1") as e:
+			cr.read_config(config.name)
+
+class TestPowerNapIRQMonitor(unittest.TestCase):
+	def runTest(self):
+		config = tempfile.NamedTemporaryFile()
+		config.file.write(
+			b"monitor irq ^(i8042|xhci_hcd)$\n")
+		config.file.flush()
+		
+		cr = ConfigReader([ "poweroff", "suspend", "powersave" ])
+		c = cr.read_config(config.name)
+		
+		self.assertEqual(c["monitors"], [
+			{ "type": "irq", "regex": re.compile("^(i8042|xhci_hcd)$") } ])
+
+class TestPowerNapIRQMonitorNoRegex(unittest.TestCase):
+	def runTest(self):
+		config = tempfile.NamedTemporaryFile()
+		config.file.write(
+			b"monitor irq\n")
+		config.file.flush()
+		
+		cr = ConfigReader([ "poweroff", "suspend", "powersave" ])
+		
+		with self.assertRaisesRegex(Exception, f"Expected a regular expression after 'irq' at {config.name} line 1") as e:
+			cr.read_config(config.name)
+
 class TestPowerNapInputMonitorOptions(unittest.TestCase):
 	def runTest(self):
 		config = tempfile.NamedTemporaryFile()
@@ -99,6 +230,249 @@ class TestPowerNapInputMonitorOptions(unittest.TestCase):
 		with self.assertRaisesRegex(Exception, f"Unexpected 'stuff things' after 'keyboard' at {config.name} line 1") as e:
 			cr.read_config(config.name)
 
+class TestPowerNapLoadMonitorUtilisation(unittest.TestCase):
+	def runTest(self):
+		config = tempfile.NamedTemporaryFile()
+		config.file.write(
+			b"monitor load utilisation above 50%\n" +
+			b"monitor load utilisation above 1.5 window 1m\n" +
+			b"monitor load utilisation above 90% per-cpu window 30s\n")
+		config.file.flush()
+		
+		cr = ConfigReader([ "poweroff", "suspend", "powersave" ])
+		
+		with mock.patch("multiprocessing.cpu_count", return_value = 4):
+			c = cr.read_config(config.name)
+		
+		self.assertEqual(c["monitors"], [
+			{ "type": "load", "mode": "utilisation", "threshold": 50.0, "percent": True },
+			{ "type": "load", "mode": "utilisation", "threshold": 1.5, "window": 60 },
+			{ "type": "load", "mode": "utilisation", "threshold": 90.0, "percent": True, "per_cpu": True, "window": 30 } ])
+
+class TestPowerNapLoadMonitorUtilisationNoThreshold(unittest.TestCase):
+	def runTest(self):
+		config = tempfile.NamedTemporaryFile()
+		config.file.write(
+			b"monitor load utilisation\n")
+		config.file.flush()
+		
+		cr = ConfigReader([ "poweroff", "suspend", "powersave" ])
+		
+		with self.assertRaisesRegex(Exception, f"Expected 'above <percentage or number of cores>' after 'utilisation' at {config.name} line 1") as e:
+			cr.read_config(config.name)
+
+class TestPowerNapLoadMonitorUtilisationThresholdTooHigh(unittest.TestCase):
+	def runTest(self):
+		cr = ConfigReader([ "poweroff", "suspend", "powersave" ])
+		
+		for threshold, message in [
+			("4",    "Threshold must be below the number of CPUs \\(4\\)"),
+			("4.5",  "Threshold must be below the number of CPUs \\(4\\)"),
+			("n",    "Threshold must be below the number of CPUs \\(4\\)"),
+			("100%", "Threshold must be below 100%") ]:
+			
+			config = tempfile.NamedTemporaryFile()
+			config.file.write(("monitor load utilisation above %s\n" % threshold).encode("ascii"))
+			config.file.flush()
+			
+			with self.assertRaisesRegex(Exception, f"{message} at {config.name} line 1") as e, mock.patch("multiprocessing.cpu_count", return_value = 4):
+				cr.read_config(config.name)
+		
+		config = tempfile.NamedTemporaryFile()
+		config.file.write(b"monitor load utilisation above 3.5\nmonitor load utilisation above 99.5%\n")
+		config.file.flush()
+		
+		with mock.patch("multiprocessing.cpu_count", return_value = 4):
+			c = cr.read_config(config.name)
+		
+		self.assertEqual(c["monitors"], [
+			{ "type": "load", "mode": "utilisation", "threshold": 3.5 },
+			{ "type": "load", "mode": "utilisation", "threshold": 99.5, "percent": True } ])
+
+class TestPowerNapLoadMonitorUtilisationPerCPUThreshold(unittest.TestCase):
+	def runTest(self):
+		cr = ConfigReader([ "poweroff", "suspend", "powersave" ])
+		
+		for threshold, message in [
+			("1.5", "Threshold must be below 1 core with 'per-cpu'"),
+			("1",   "Threshold must be below 1 core with 'per-cpu'"),
+			("n",   "Threshold must be below 1 core with 'per-cpu'"),
+			("100%", "Threshold must be below 100% with 'per-cpu'") ]:
+			
+			config = tempfile.NamedTemporaryFile()
+			config.file.write(("monitor load utilisation above %s per-cpu\n" % threshold).encode("ascii"))
+			config.file.flush()
+			
+			with self.assertRaisesRegex(Exception, f"{message} at {config.name} line 1") as e:
+				cr.read_config(config.name)
+		
+		config = tempfile.NamedTemporaryFile()
+		config.file.write(b"monitor load utilisation above 0.75 per-cpu\n")
+		config.file.flush()
+		
+		c = cr.read_config(config.name)
+		
+		self.assertEqual(c["monitors"], [
+			{ "type": "load", "mode": "utilisation", "threshold": 0.75, "per_cpu": True } ])
+
+class TestPowerNapLoadMonitorUtilisationUnknownOption(unittest.TestCase):
+	def runTest(self):
+		config = tempfile.NamedTemporaryFile()
+		config.file.write(
+			b"monitor load utilisation above 50% per-core\n")
+		config.file.flush()
+		
+		cr = ConfigReader([ "poweroff", "suspend", "powersave" ])
+		
+		with self.assertRaisesRegex(Exception, f"Unknown option per-core for 'load' at {config.name} line 1") as e:
+			cr.read_config(config.name)
+
+class TestPowerNapNetMonitor(unittest.TestCase):
+	def runTest(self):
+		config = tempfile.NamedTemporaryFile()
+		config.file.write(
+			b"monitor net ^eth0$ above 64k\n" +
+			b"monitor net ^(en|wl) above 1MB/s ignore-multicast\n")
+		config.file.flush()
+		
+		cr = ConfigReader([ "poweroff", "suspend", "powersave" ])
+		c = cr.read_config(config.name)
+		
+		self.assertEqual(c["monitors"], [
+			{ "type": "net", "regex": re.compile("^eth0$"), "threshold": 65536 },
+			{ "type": "net", "regex": re.compile("^(en|wl)"), "threshold": 1048576, "ignore_multicast": True } ])
+
+class TestPowerNapNetMonitorNoThreshold(unittest.TestCase):
+	def runTest(self):
+		config = tempfile.NamedTemporaryFile()
+		config.file.write(
+			b"monitor net ^eth0$\n")
+		config.file.flush()
+		
+		cr = ConfigReader([ "poweroff", "suspend", "powersave" ])
+		
+		with self.assertRaisesRegex(Exception, f"Expected '<regex> above <rate>' after 'net' at {config.name} line 1") as e:
+			cr.read_config(config.name)
+
+class TestPowerNapNetMonitorNoRegex(unittest.TestCase):
+	def runTest(self):
+		config = tempfile.NamedTemporaryFile()
+		config.file.write(
+			b"monitor net above 64k\n")
+		config.file.flush()
+		
+		cr = ConfigReader([ "poweroff", "suspend", "powersave" ])
+		
+		with self.assertRaisesRegex(Exception, f"Expected a regular expression after 'net' at {config.name} line 1") as e:
+			cr.read_config(config.name)
+
+class TestPowerNapNFSServerMonitor(unittest.TestCase):
+	def runTest(self):
+		config = tempfile.NamedTemporaryFile()
+		config.file.write(
+			b"monitor nfsd\n" +
+			b"monitor nfsd above 5/s\n")
+		config.file.flush()
+		
+		cr = ConfigReader([ "poweroff", "suspend", "powersave" ])
+		c = cr.read_config(config.name)
+		
+		self.assertEqual(c["monitors"], [
+			{ "type": "nfsd" },
+			{ "type": "nfsd", "threshold": 5.0 } ])
+
+class TestPowerNapNFSServerMonitorBadThreshold(unittest.TestCase):
+	def runTest(self):
+		config = tempfile.NamedTemporaryFile()
+		config.file.write(
+			b"monitor nfsd 5\n")
+		config.file.flush()
+		
+		cr = ConfigReader([ "poweroff", "suspend", "powersave" ])
+		
+		with self.assertRaisesRegex(Exception, f"Expected 'above <operations per second>' after 'nfsd' at {config.name} line 1") as e:
+			cr.read_config(config.name)
+
+class TestPowerNapPathMonitor(unittest.TestCase):
+	def runTest(self):
+		config = tempfile.NamedTemporaryFile()
+		config.file.write(
+			b"monitor path /srv\n" +
+			b"monitor path /srv/media/TV Shows\n")
+		config.file.flush()
+		
+		cr = ConfigReader([ "poweroff", "suspend", "powersave" ])
+		c = cr.read_config(config.name)
+		
+		self.assertEqual(c["monitors"], [
+			{ "type": "path", "path": "/srv" },
+			{ "type": "path", "path": "/srv/media/TV Shows" } ])
+
+class TestPowerNapPathMonitorNoPath(unittest.TestCase):
+	def runTest(self):
+		config = tempfile.NamedTemporaryFile()
+		config.file.write(
+			b"monitor path\n")
+		config.file.flush()
+		
+		cr = ConfigReader([ "poweroff", "suspend", "powersave" ])
+		
+		with self.assertRaisesRegex(Exception, f"Expected an absolute directory path after 'path' at {config.name} line 1") as e:
+			cr.read_config(config.name)
+
+class TestPowerNapPortMonitorSources(unittest.TestCase):
+	def runTest(self):
+		config = tempfile.NamedTemporaryFile()
+		config.file.write(
+			b"monitor powerwake from 192.168.0.0/24\n" +
+			b"monitor wol port 9 from 10.0.0.0/8,192.168.1.5\n" +
+			b"monitor udp port 53 from 172.16.0.1/12\n")
+		config.file.flush()
+		
+		cr = ConfigReader([ "poweroff", "suspend", "powersave" ])
+		c = cr.read_config(config.name)
+		
+		self.assertEqual(c["monitors"], [
+			{ "type": "powerwake", "port": 57748, "sources": [ ipaddress.ip_network("192.168.0.0/24") ] },
+			{ "type": "wol", "port": 9, "sources": [ ipaddress.ip_network("10.0.0.0/8"), ipaddress.ip_network("192.168.1.5/32") ] },
+			{ "type": "udp", "port": 53, "sources": [ ipaddress.ip_network("172.16.0.0/12") ] } ])
+
+class TestPowerNapPortMonitorBadSource(unittest.TestCase):
+	def runTest(self):
+		config = tempfile.NamedTemporaryFile()
+		config.file.write(
+			b"monitor wol port 9 from 10.0.0.0/33\n")
+		config.file.flush()
+		
+		cr = ConfigReader([ "poweroff", "suspend", "powersave" ])
+		
+		with self.assertRaisesRegex(Exception, f"Invalid network '10.0.0.0/33' after 'from' at {config.name} line 1") as e:
+			cr.read_config(config.name)
+
+class TestPowerNapPortMonitorIPv6Source(unittest.TestCase):
+	def runTest(self):
+		config = tempfile.NamedTemporaryFile()
+		config.file.write(
+			b"monitor udp port 53 from fe80::/64\n")
+		config.file.flush()
+		
+		cr = ConfigReader([ "poweroff", "suspend", "powersave" ])
+		
+		with self.assertRaisesRegex(Exception, f"Only IPv4 networks are supported after 'from' at {config.name} line 1") as e:
+			cr.read_config(config.name)
+
+class TestPowerNapUDPMonitorSourceWithoutPort(unittest.TestCase):
+	def runTest(self):
+		config = tempfile.NamedTemporaryFile()
+		config.file.write(
+			b"monitor udp from 10.0.0.0/8\n")
+		config.file.flush()
+		
+		cr = ConfigReader([ "poweroff", "suspend", "powersave" ])
+		
+		with self.assertRaisesRegex(Exception, f"Expected 'port <port number>' after 'udp' at {config.name} line 1") as e:
+			cr.read_config(config.name)
+
 class TestPowerNapPWMonitorNoPortKeyword(unittest.TestCase):
 	def runTest(self):
 		config = tempfile.NamedTemporaryFile()
@@ -135,6 +509,260 @@ class TestPowerNapPWMonitorOutOfRangePort(unittest.TestCase):
 		with self.assertRaisesRegex(Exception, f"Invalid port number 1000000 at {config.name} line 1") as e:
 			cr.read_config(config.name)
 
+class TestPowerNapProcessCPUMonitor(unittest.TestCase):
+	def runTest(self):
+		config = tempfile.NamedTemporaryFile()
+		config.file.write(
+			b"monitor process-cpu ^/usr/bin/worker --queue jobs above 25%\n" +
+			b"monitor process-cpu ffmpeg above 2.5\n")
+		config.file.flush()
+		
+		cr = ConfigReader([ "poweroff", "suspend", "powersave" ])
+		c = cr.read_config(config.name)
+		
+		self.assertEqual(c["monitors"], [
+			{ "type": "process-cpu", "regex": re.compile("^/usr/bin/worker --queue jobs"), "threshold": 25.0 },
+			{ "type": "process-cpu", "regex": re.compile("ffmpeg"), "threshold": 2.5 } ])
+
+class TestPowerNapProcessCPUMonitorNoThreshold(unittest.TestCase):
+	def runTest(self):
+		config = tempfile.NamedTemporaryFile()
+		config.file.write(
+			b"monitor process-cpu ffmpeg\n")
+		config.file.flush()
+		
+		cr = ConfigReader([ "poweroff", "suspend", "powersave" ])
+		
+		with self.assertRaisesRegex(Exception, f"Expected '<regular expression> above <percentage>' after 'process-cpu' at {config.name} line 1") as e:
+			cr.read_config(config.name)
+
+class TestPowerNapProcessCPUMonitorBadThreshold(unittest.TestCase):
+	def runTest(self):
+		config = tempfile.NamedTemporaryFile()
+		config.file.write(
+			b"monitor process-cpu ffmpeg above half\n")
+		config.file.flush()
+		
+		cr = ConfigReader([ "poweroff", "suspend", "powersave" ])
+		
+		with self.assertRaisesRegex(Exception, f"Expected a percentage \\(e.g. 50%\\) after 'above' at {config.name} line 1") as e:
+			cr.read_config(config.name)
+
+class TestPowerNapProcessIOMonitorThreshold(unittest.TestCase):
+	def runTest(self):
+		config = tempfile.NamedTemporaryFile()
+		config.file.write(
+			b"monitor process-io ^/usr/sbin/smbd -D above 64k\n" +
+			b"monitor process-io nfsd above 1.5MB/s window 1m\n" +
+			b"monitor process-io rsync window 30s\n")
+		config.file.flush()
+		
+		cr = ConfigReader([ "poweroff", "suspend", "powersave" ])
+		c = cr.read_config(config.name)
+		
+		self.assertEqual(c["monitors"], [
+			{ "type": "process-io", "regex": re.compile("^/usr/sbin/smbd -D"), "threshold": 65536 },
+			{ "type": "process-io", "regex": re.compile("nfsd"), "threshold": 1572864, "window": 60 },
+			{ "type": "process-io", "regex": re.compile("rsync"), "window": 30 } ])
+
+class TestPowerNapProcessIOMonitorBadThreshold(unittest.TestCase):
+	def runTest(self):
+		config = tempfile.NamedTemporaryFile()
+		config.file.write(
+			b"monitor process-io samba above lots\n")
+		config.file.flush()
+		
+		cr = ConfigReader([ "poweroff", "suspend", "powersave" ])
+		
+		with self.assertRaisesRegex(Exception, f"Expected a rate \\(e.g. 64k or 1MB/s\\) after 'above' at {config.name} line 1") as e:
+			cr.read_config(config.name)
+
+class TestPowerNapProcessIOMonitorNoRegex(unittest.TestCase):
+	def runTest(self):
+		config = tempfile.NamedTemporaryFile()
+		config.file.write(
+			b"monitor process-io above 64k\n")
+		config.file.flush()
+		
+		cr = ConfigReader([ "poweroff", "suspend", "powersave" ])
+		
+		with self.assertRaisesRegex(Exception, f"Expected a regular expression after 'process-io' at {config.name} line 1") as e:
+			cr.read_config(config.name)
+
+class TestPowerNapSystemIOMonitor(unittest.TestCase):
+	def runTest(self):
+		config = tempfile.NamedTemporaryFile()
+		config.file.write(
+			b"monitor system-io\n" +
+			b"monitor system-io above 1M device-above 256k swap-above 4k exclude ^(loop|dm-)\n" +
+			b"monitor system-io include ^sd[b-d]$ paging-above 64k\n")
+		config.file.flush()
+		
+		cr = ConfigReader([ "poweroff", "suspend", "powersave" ])
+		c = cr.read_config(config.name)
+		
+		self.assertEqual(c["monitors"], [
+			{ "type": "system-io" },
+			{ "type": "system-io", "threshold": 1048576, "device_threshold": 262144, "swap_threshold": 4096, "exclude": re.compile("^(loop|dm-)") },
+			{ "type": "system-io", "include": re.compile("^sd[b-d]$"), "paging_threshold": 65536 } ])
+
+class TestPowerNapSystemIOMonitorUnknownOption(unittest.TestCase):
+	def runTest(self):
+		config = tempfile.NamedTemporaryFile()
+		config.file.write(
+			b"monitor system-io below 1M\n")
+		config.file.flush()
+		
+		cr = ConfigReader([ "poweroff", "suspend", "powersave" ])
+		
+		with self.assertRaisesRegex(Exception, f"Unknown option below for 'system-io' at {config.name} line 1") as e:
+			cr.read_config(config.name)
+
+class TestPowerNapSystemIOMonitorDuplicateOption(unittest.TestCase):
+	def runTest(self):
+		config = tempfile.NamedTemporaryFile()
+		config.file.write(
+			b"monitor system-io above 1M above 2M\n")
+		config.file.flush()
+		
+		cr = ConfigReader([ "poweroff", "suspend", "powersave" ])
+		
+		with self.assertRaisesRegex(Exception, f"Duplicate above options for 'system-io' at {config.name} line 1") as e:
+			cr.read_config(config.name)
+
+class TestPowerNapPressureMonitor(unittest.TestCase):
+	def runTest(self):
+		config = tempfile.NamedTemporaryFile()
+		config.file.write(
+			b"monitor pressure cpu\n" +
+			b"monitor pressure io full\n" +
+			b"monitor pressure memory 100ms per 2s\n" +
+			b"monitor pressure cpu some 500us per 0.5s\n")
+		config.file.flush()
+		
+		cr = ConfigReader([ "poweroff", "suspend", "powersave" ])
+		c = cr.read_config(config.name)
+		
+		self.assertEqual(c["monitors"], [
+			{ "type": "pressure", "resource": "cpu" },
+			{ "type": "pressure", "resource": "io", "kind": "full" },
+			{ "type": "pressure", "resource": "memory", "stall": 100000, "window": 2000000 },
+			{ "type": "pressure", "resource": "cpu", "kind": "some", "stall": 500, "window": 500000 } ])
+
+class TestPowerNapPressureMonitorBadResource(unittest.TestCase):
+	def runTest(self):
+		config = tempfile.NamedTemporaryFile()
+		config.file.write(
+			b"monitor pressure disk\n")
+		config.file.flush()
+		
+		cr = ConfigReader([ "poweroff", "suspend", "powersave" ])
+		
+		with self.assertRaisesRegex(Exception, f"Expected 'cpu', 'io' or 'memory' after 'pressure' at {config.name} line 1") as e:
+			cr.read_config(config.name)
+
+class TestPowerNapPressureMonitorBadDuration(unittest.TestCase):
+	def runTest(self):
+		config = tempfile.NamedTemporaryFile()
+		config.file.write(
+			b"monitor pressure cpu 150 per 1s\n")
+		config.file.flush()
+		
+		cr = ConfigReader([ "poweroff", "suspend", "powersave" ])
+		
+		with self.assertRaisesRegex(Exception, f"Expected a time duration \\(e.g. 150ms\\) after 'cpu' at {config.name} line 1") as e:
+			cr.read_config(config.name)
+
+class TestPowerNapPressureMonitorBadWindow(unittest.TestCase):
+	def runTest(self):
+		config = tempfile.NamedTemporaryFile()
+		config.file.write(
+			b"monitor pressure cpu 150ms per 20s\n")
+		config.file.flush()
+		
+		cr = ConfigReader([ "poweroff", "suspend", "powersave" ])
+		
+		with self.assertRaisesRegex(Exception, f"Window must be between 500ms and 10s at {config.name} line 1") as e:
+			cr.read_config(config.name)
+
+class TestPowerNapTCPMonitorPortList(unittest.TestCase):
+	def runTest(self):
+		config = tempfile.NamedTemporaryFile()
+		config.file.write(
+			b"monitor tcp port 22,80,8000-8100\n" +
+			b"monitor tcp port 0-65535\n")
+		config.file.flush()
+		
+		cr = ConfigReader([ "poweroff", "suspend", "powersave" ])
+		c = cr.read_config(config.name)
+		
+		self.assertEqual(c["monitors"], [
+			{ "type": "tcp", "ports": [ (22, 22), (80, 80), (8000, 8100) ] },
+			{ "type": "tcp", "ports": [ (0, 65535) ] } ])
+
+class TestPowerNapTCPMonitorMinBytes(unittest.TestCase):
+	def runTest(self):
+		config = tempfile.NamedTemporaryFile()
+		config.file.write(
+			b"monitor tcp port 22 min-bytes 4k\n" +
+			b"monitor tcp port 5432 min-bytes 100\n")
+		config.file.flush()
+		
+		cr = ConfigReader([ "poweroff", "suspend", "powersave" ])
+		c = cr.read_config(config.name)
+		
+		self.assertEqual(c["monitors"], [
+			{ "type": "tcp", "ports": [ (22, 22) ], "min_bytes": 4096 },
+			{ "type": "tcp", "ports": [ (5432, 5432) ], "min_bytes": 100 } ])
+
+class TestPowerNapTCPMonitorBadMinBytes(unittest.TestCase):
+	def runTest(self):
+		config = tempfile.NamedTemporaryFile()
+		config.file.write(
+			b"monitor tcp port 22 min-bytes lots\n")
+		config.file.flush()
+		
+		cr = ConfigReader([ "poweroff", "suspend", "powersave" ])
+		
+		with self.assertRaisesRegex(Exception, f"Expected a size \\(e.g. 4k or 1MB\\) after 'min-bytes' at {config.name} line 1") as e:
+			cr.read_config(config.name)
+
+class TestPowerNapTCPMonitorNoPort(unittest.TestCase):
+	def runTest(self):
+		config = tempfile.NamedTemporaryFile()
+		config.file.write(
+			b"monitor tcp\n")
+		config.file.flush()
+		
+		cr = ConfigReader([ "poweroff", "suspend", "powersave" ])
+		
+		with self.assertRaisesRegex(Exception, f"Expected 'port <port numbers>' after 'tcp' at {config.name} line 1") as e:
+			cr.read_config(config.name)
+
+class TestPowerNapTCPMonitorBadRange(unittest.TestCase):
+	def runTest(self):
+		config = tempfile.NamedTemporaryFile()
+		config.file.write(
+			b"monitor tcp port 22,8100-8000\n")
+		config.file.flush()
+		
+		cr = ConfigReader([ "poweroff", "suspend", "powersave" ])
+		
+		with self.assertRaisesRegex(Exception, f"Invalid port range 8100-8000 at {config.name} line 1") as e:
+			cr.read_config(config.name)
+
+class TestPowerNapTCPMonitorOutOfRangePort(unittest.TestCase):
+	def runTest(self):
+		config = tempfile.NamedTemporaryFile()
+		config.file.write(
+			b"monitor tcp port 22,65536\n")
+		config.file.flush()
+		
+		cr = ConfigReader([ "poweroff", "suspend", "powersave" ])
+		
+		with self.assertRaisesRegex(Exception, f"Invalid port number 65536 at {config.name} line 1") as e:
+			cr.read_config(config.name)
+
 class TestPowerNapUsersMonitor(unittest.TestCase):
 	def runTest(self):
 		config = tempfile.NamedTemporaryFile()
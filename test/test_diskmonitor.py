@@ -0,0 +1,92 @@
+import unittest
+
+from powernap.monitors import DiskMonitor
+
+class FakeDiskStats:
+	def __init__(self):
+		self.devices = {}
+	
+	def read(self, max_age = None):
+		return self.devices
+
+class FakeDrive:
+	def __init__(self, spinning):
+		self.spinning = spinning
+		self.queries = 0
+	
+	def query_power_mode(self, path):
+		self.queries += 1
+		return self.spinning
+
+class TestDiskMonitorCounters(unittest.TestCase):
+	def runTest(self):
+		stats = FakeDiskStats()
+		stats.devices = { "sdz": (10, 100) }
+		
+		drive = FakeDrive(True)
+		
+		m = DiskMonitor.DiskMonitor("sdz", stats, drive.query_power_mode)
+		m.start()
+		
+		# First tick asks the drive.
+		self.assertTrue(m.active())
+		self.assertEqual(drive.queries, 1)
+		
+		# Quiet, but drive was recently seen spinning.
+		self.assertTrue(m.active())
+		self.assertEqual(drive.queries, 1)
+		
+		# Counters changing doesn't need a query.
+		stats.devices = { "sdz": (11, 108) }
+		self.assertTrue(m.active())
+		self.assertEqual(drive.queries, 1)
+		
+		# Drive goes into standby, noticed once the query interval passes.
+		drive.spinning = False
+		m._known_at -= DiskMonitor.POWER_QUERY_INTERVAL
+		
+		self.assertFalse(m.active())
+		self.assertEqual(drive.queries, 2)
+		
+		# Drive isn't asked again while the counters are quiet.
+		m._known_at -= DiskMonitor.POWER_QUERY_INTERVAL
+		
+		self.assertFalse(m.active())
+		self.assertEqual(drive.queries, 2)
+		
+		# Any I/O means it is spinning again.
+		stats.devices = { "sdz": (12, 116) }
+		self.assertTrue(m.active())
+		self.assertEqual(drive.queries, 2)
+
+class TestDiskMonitorUnsupported(unittest.TestCase):
+	def runTest(self):
+		stats = FakeDiskStats()
+		stats.devices = { "sdz": (10, 100) }
+		
+		drive = FakeDrive(None)
+		
+		m = DiskMonitor.DiskMonitor("sdz", stats, drive.query_power_mode)
+		m.start()
+		
+		self.assertFalse(m.active())
+		
+		stats.devices = { "sdz": (11, 108) }
+		self.assertTrue(m.active())
+		
+		self.assertFalse(m.active())
+		self.assertEqual(drive.queries, 1)
+
+class TestDiskMonitorMissing(unittest.TestCase):
+	def runTest(self):
+		stats = FakeDiskStats()
+		drive = FakeDrive(True)
+		
+		m = DiskMonitor.DiskMonitor("sdz", stats, drive.query_power_mode)
+		m.start()
+		
+		self.assertFalse(m.active())
+		self.assertEqual(drive.queries, 0)
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,129 @@
+import fcntl
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from powernap.monitors.InhibitMonitor import InhibitMonitor
+
+class InhibitFixture:
+	def __init__(self):
+		self.tmpdir = tempfile.TemporaryDirectory()
+		self.monitor = InhibitMonitor(self.tmpdir.name)
+	
+	def close(self):
+		self.monitor.stop()
+		self.tmpdir.cleanup()
+	
+	def path(self, name):
+		return os.path.join(self.tmpdir.name, name)
+	
+	def lock(self, name):
+		fd = os.open(self.path(name), os.O_RDWR | os.O_CREAT)
+		fcntl.flock(fd, fcntl.LOCK_EX)
+		
+		return fd
+
+class TestInhibitMonitorLockHeld(unittest.TestCase):
+	def runTest(self):
+		f = InhibitFixture()
+		
+		try:
+			f.monitor.start()
+			self.assertFalse(f.monitor.active())
+			
+			fd = f.lock("job.lock")
+			self.assertTrue(f.monitor.active())
+			self.assertTrue(f.monitor.active())
+			
+			os.close(fd)
+			self.assertFalse(f.monitor.active())
+		
+		finally:
+			f.close()
+
+class TestInhibitMonitorLockFileNotLocked(unittest.TestCase):
+	def runTest(self):
+		f = InhibitFixture()
+		
+		try:
+			open(f.path("job.lock"), "w").close()
+			
+			f.monitor.start()
+			self.assertFalse(f.monitor.active())
+		
+		finally:
+			f.close()
+
+class TestInhibitMonitorLockPreExisting(unittest.TestCase):
+	def runTest(self):
+		f = InhibitFixture()
+		
+		try:
+			open(f.path("job.lock"), "w").close()
+			
+			f.monitor.start()
+			self.assertFalse(f.monitor.active())
+			
+			# Taking a lock on an existing file (without opening it again)
+			# doesn't generate any inotify events.
+			fd = os.open(f.path("job.lock"), os.O_RDONLY)
+			f.monitor.active()
+			
+			fcntl.flock(fd, fcntl.LOCK_EX)
+			self.assertTrue(f.monitor.active())
+			
+			fcntl.flock(fd, fcntl.LOCK_UN)
+			self.assertFalse(f.monitor.active())
+			
+			os.close(fd)
+		
+		finally:
+			f.close()
+
+class TestInhibitMonitorLockedBeforeStart(unittest.TestCase):
+	def runTest(self):
+		f = InhibitFixture()
+		
+		try:
+			fd = f.lock("job.lock")
+			
+			f.monitor.start()
+			self.assertTrue(f.monitor.active())
+			
+			os.unlink(f.path("job.lock"))
+			self.assertFalse(f.monitor.active())
+			
+			os.close(fd)
+		
+		finally:
+			f.close()
+
+class TestInhibitMonitorExpiry(unittest.TestCase):
+	def runTest(self):
+		f = InhibitFixture()
+		
+		try:
+			f.monitor.start()
+			
+			open(f.path("forever"), "w").close()
+			self.assertTrue(f.monitor.active())
+			
+			os.unlink(f.path("forever"))
+			self.assertFalse(f.monitor.active())
+			
+			open(f.path("maintenance"), "w").close()
+			expires = time.time() + 3600
+			os.utime(f.path("maintenance"), (expires, expires))
+			
+			self.assertTrue(f.monitor.active())
+			
+			with mock.patch("time.time", return_value = expires + 1):
+				self.assertFalse(f.monitor.active())
+		
+		finally:
+			f.close()
+
+if __name__ == '__main__':
+	unittest.main()
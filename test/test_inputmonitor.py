@@ -0,0 +1,188 @@
+import os
+import tempfile
+import time
+import unittest
+
+from powernap.monitors.InputMonitor import InputMonitor
+
+# Opens a FIFO standing in for an input device for writing, once the monitor
+# has opened it for reading.
+def open_device(path):
+	for x in range(50):
+		try:
+			return os.open(path, os.O_WRONLY | os.O_NONBLOCK)
+		except OSError:
+			time.sleep(0.1)
+	
+	raise Exception("Device %s was never opened" % path)
+
+def wait_active(monitor):
+	for x in range(50):
+		if monitor.active():
+			return True
+		
+		time.sleep(0.1)
+	
+	return False
+
+class TestInputMonitorHotplug(unittest.TestCase):
+	def runTest(self):
+		with tempfile.TemporaryDirectory() as tmpdir:
+			input_dir = os.path.join(tmpdir, "input")
+			
+			# Directory doesn't exist yet
+			monitor = InputMonitor(os.path.join(input_dir, "^event"))
+			monitor.start()
+			
+			try:
+				os.mkdir(input_dir)
+				os.mkfifo(os.path.join(input_dir, "event0"))
+				os.mkfifo(os.path.join(input_dir, "mouse0"))
+				
+				event0 = open_device(os.path.join(input_dir, "event0"))
+				
+				self.assertFalse(monitor.active())
+				
+				os.write(event0, b"x" * 24)
+				self.assertTrue(wait_active(monitor))
+				self.assertFalse(monitor.active())
+				
+				# Device added later
+				os.mkfifo(os.path.join(input_dir, "event1"))
+				event1 = open_device(os.path.join(input_dir, "event1"))
+				
+				os.write(event1, b"x" * 24)
+				self.assertTrue(wait_active(monitor))
+				
+				# Non-matching device is never opened
+				with self.assertRaises(OSError):
+					os.open(os.path.join(input_dir, "mouse0"), os.O_WRONLY | os.O_NONBLOCK)
+				
+				os.close(event0)
+				os.close(event1)
+			
+			finally:
+				monitor.stop()
+
+class TestInputMonitorCoalesce(unittest.TestCase):
+	def runTest(self):
+		with tempfile.TemporaryDirectory() as tmpdir:
+			os.mkfifo(os.path.join(tmpdir, "event0"))
+			
+			monitor = InputMonitor(os.path.join(tmpdir, "^event"))
+			monitor.start()
+			
+			try:
+				event0 = open_device(os.path.join(tmpdir, "event0"))
+				device = monitor._multiplexer._paths[os.path.join(tmpdir, "event0")]
+				
+				os.write(event0, b"x" * 24)
+				
+				for x in range(50):
+					if not device.armed:
+						break
+					
+					time.sleep(0.1)
+				
+				# Device isn't listened to (or read) until the next tick.
+				self.assertFalse(device.armed)
+				os.write(event0, b"x" * 240)
+				
+				self.assertTrue(monitor.active())
+				
+				for x in range(50):
+					if device.armed:
+						break
+					
+					time.sleep(0.1)
+				
+				# Input from before the tick was discarded.
+				self.assertTrue(device.armed)
+				time.sleep(0.2)
+				self.assertFalse(monitor.active())
+				
+				os.write(event0, b"x" * 24)
+				self.assertTrue(wait_active(monitor))
+				
+				os.close(event0)
+			
+			finally:
+				monitor.stop()
+
+class TestInputMonitorNotDevices(unittest.TestCase):
+	def runTest(self):
+		with tempfile.TemporaryDirectory() as tmpdir:
+			# Can be opened, but not watched with epoll.
+			os.mkdir(os.path.join(tmpdir, "event-dir"))
+			open(os.path.join(tmpdir, "event-file"), "w").close()
+			
+			os.mkfifo(os.path.join(tmpdir, "event0"))
+			
+			with self.assertLogs(level = "WARNING") as logs:
+				monitor = InputMonitor(os.path.join(tmpdir, "^event"))
+				monitor.start()
+				
+				try:
+					event0 = open_device(os.path.join(tmpdir, "event0"))
+					
+					for x in range(50):
+						if len(logs.output) >= 2:
+							break
+						
+						time.sleep(0.1)
+					
+					self.assertEqual(len(logs.output), 2)
+					self.assertEqual(set(monitor._multiplexer._paths), { os.path.join(tmpdir, "event0") })
+					
+					os.write(event0, b"x" * 24)
+					self.assertTrue(wait_active(monitor))
+					
+					os.close(event0)
+				
+				finally:
+					monitor.stop()
+
+class FailingInputMonitor(InputMonitor):
+	def input_received(self, device):
+		raise Exception("Oops")
+
+class TestInputMonitorFailingDevice(unittest.TestCase):
+	def runTest(self):
+		with tempfile.TemporaryDirectory() as tmpdir:
+			os.mkfifo(os.path.join(tmpdir, "bad0"))
+			os.mkfifo(os.path.join(tmpdir, "event0"))
+			
+			bad_monitor = FailingInputMonitor(os.path.join(tmpdir, "^bad"))
+			monitor = InputMonitor(os.path.join(tmpdir, "^event"))
+			
+			bad_monitor.start()
+			monitor.start()
+			
+			try:
+				bad0 = open_device(os.path.join(tmpdir, "bad0"))
+				event0 = open_device(os.path.join(tmpdir, "event0"))
+				
+				with self.assertLogs(level = "ERROR"):
+					os.write(bad0, b"x" * 24)
+					
+					for x in range(50):
+						if os.path.join(tmpdir, "bad0") not in monitor._multiplexer._paths:
+							break
+						
+						time.sleep(0.1)
+				
+				# The failing device is dropped, the others are still read.
+				self.assertNotIn(os.path.join(tmpdir, "bad0"), monitor._multiplexer._paths)
+				
+				os.write(event0, b"x" * 24)
+				self.assertTrue(wait_active(monitor))
+				
+				os.close(bad0)
+				os.close(event0)
+			
+			finally:
+				bad_monitor.stop()
+				monitor.stop()
+
+if __name__ == '__main__':
+	unittest.main()
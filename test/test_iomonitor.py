@@ -0,0 +1,129 @@
+import math
+import re
+import unittest
+from unittest import mock
+
+from powernap.monitors.IOMonitor import IOMonitor
+
+# PIDs above the kernel's limit, so they can't match a real process.
+PID_A = 5000001
+PID_B = 5000002
+
+class FakeProcessTable:
+	def __init__(self):
+		self.processes = {}
+	
+	def scan(self):
+		return self.processes
+
+# Fake processes named "smbd" with their read_bytes/write_bytes counters.
+class FakeProcesses:
+	def __init__(self):
+		self.table = FakeProcessTable()
+		self.counts = {}
+	
+	def set_process(self, pid, starttime, read_bytes, write_bytes):
+		self.table.processes[pid] = (starttime, "smbd")
+		self.counts[pid] = (read_bytes, write_bytes)
+	
+	def remove_process(self, pid):
+		del self.table.processes[pid]
+		del self.counts[pid]
+	
+	def monitor(self, threshold = 0, window = None):
+		return IOMonitor(re.compile("^smbd$"), threshold, window, self.table, self.counts.get)
+
+def io_rate_at(monitor, now):
+	with mock.patch("time.monotonic", return_value = now):
+		return monitor.get_io_rate()
+
+def active_at(monitor, now):
+	with mock.patch("time.monotonic", return_value = now):
+		return monitor.active()
+
+class TestIOMonitorCount(unittest.TestCase):
+	def runTest(self):
+		procs = FakeProcesses()
+		procs.set_process(PID_A, 1000, 100, 200)
+		procs.set_process(PID_B, 1000, 0, 0)
+		
+		monitor = procs.monitor()
+		
+		# First sample is only a baseline
+		self.assertEqual(monitor.get_io_count(), 0)
+		
+		procs.set_process(PID_A, 1000, 150, 300)
+		procs.set_process(PID_B, 1000, 1, 0)
+		self.assertEqual(monitor.get_io_count(), 151)
+		
+		self.assertEqual(monitor.get_io_count(), 0)
+
+class TestIOMonitorEviction(unittest.TestCase):
+	def runTest(self):
+		procs = FakeProcesses()
+		procs.set_process(PID_A, 1000, 5000, 5000)
+		procs.set_process(PID_B, 1000, 0, 0)
+		
+		monitor = procs.monitor()
+		self.assertEqual(monitor.get_io_count(), 0)
+		
+		# Processes which have gone away are forgotten.
+		procs.remove_process(PID_B)
+		self.assertEqual(monitor.get_io_count(), 0)
+		self.assertEqual(set(monitor._iocounts), { PID_A })
+		
+		# PID reused by a new process which has done less IO, which mustn't
+		# be counted as a (negative) difference.
+		procs.set_process(PID_A, 2000, 10, 10)
+		self.assertEqual(monitor.get_io_count(), 0)
+		
+		procs.set_process(PID_A, 2000, 15, 10)
+		self.assertEqual(monitor.get_io_count(), 5)
+
+class TestIOMonitorRate(unittest.TestCase):
+	def runTest(self):
+		procs = FakeProcesses()
+		procs.set_process(PID_A, 1000, 0, 0)
+		
+		monitor = procs.monitor(1000)
+		self.assertFalse(active_at(monitor, 100.0))
+		
+		# 1024 bytes/sec over 2 seconds
+		procs.set_process(PID_A, 1000, 1024, 1024)
+		self.assertTrue(active_at(monitor, 102.0))
+		
+		# 900 bytes/sec over 2 seconds
+		procs.set_process(PID_A, 1000, 1924, 1924)
+		self.assertFalse(active_at(monitor, 104.0))
+
+class TestIOMonitorWindow(unittest.TestCase):
+	def runTest(self):
+		procs = FakeProcesses()
+		procs.set_process(PID_A, 1000, 0, 0)
+		
+		monitor = procs.monitor(0, 10)
+		self.assertEqual(io_rate_at(monitor, 100.0), 0.0)
+		
+		# 1000 bytes/sec for one time constant gets the average ~63% of the way
+		procs.set_process(PID_A, 1000, 10000, 0)
+		self.assertAlmostEqual(io_rate_at(monitor, 110.0), 1000.0 * (1.0 - math.exp(-1.0)))
+		
+		# Once the IO stops, the average decays, then drops to exactly zero
+		# rather than approaching it forever.
+		now = 120.0
+		self.assertTrue(active_at(monitor, now))
+		
+		for i in range(10):
+			now += 10.0
+			if not active_at(monitor, now):
+				break
+		
+		self.assertEqual(monitor._rate, 0.0)
+		self.assertFalse(active_at(monitor, now + 10.0))
+		
+		# Any IO at all counts again.
+		procs.set_process(PID_A, 1000, 10001, 0)
+		self.assertTrue(active_at(monitor, now + 20.0))
+
+if __name__ == '__main__':
+	unittest.main()
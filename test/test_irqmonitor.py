@@ -0,0 +1,21 @@
+import re
+import unittest
+
+from powernap.monitors.IRQMonitor import match_actions, parse_per_cpu_count
+
+class TestIRQMonitorMatchActions(unittest.TestCase):
+	def runTest(self):
+		regex = re.compile("^(i8042|keyboard|mouse)$")
+		
+		self.assertTrue(match_actions(regex, "i8042\n"))
+		self.assertTrue(match_actions(regex, "ehci_hcd:usb1,i8042\n"))
+		self.assertFalse(match_actions(regex, "ehci_hcd:usb1\n"))
+		self.assertFalse(match_actions(regex, "\n"))
+
+class TestIRQMonitorParsePerCPUCount(unittest.TestCase):
+	def runTest(self):
+		self.assertEqual(parse_per_cpu_count(b"0,12,3,0\n"), 15)
+		self.assertEqual(parse_per_cpu_count(b"7\n"), 7)
+
+if __name__ == '__main__':
+	unittest.main()
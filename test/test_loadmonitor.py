@@ -0,0 +1,23 @@
+import unittest
+
+from powernap.monitors.LoadMonitor import parse_proc_stat
+
+class TestLoadMonitorParseProcStat(unittest.TestCase):
+	def runTest(self):
+		stats = (
+			b"cpu  100 10 50 800 40 5 5 30 0 0\n" +
+			b"cpu0 60 10 30 380 20 5 5 15 0 0\n" +
+			b"cpu1 40 0 20 420 20 0 0 15 0 0\n" +
+			b"intr 12345 0 0\n" +
+			b"ctxt 67890\n")
+		
+		self.assertEqual(parse_proc_stat(stats), {
+			"cpu": (170, 1010) })
+		
+		self.assertEqual(parse_proc_stat(stats, True), {
+			"cpu":  (170, 1010),
+			"cpu0": (110, 510),
+			"cpu1": (60, 500) })
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,46 @@
+import os
+import re
+import tempfile
+import unittest
+from unittest import mock
+
+from powernap.monitors import NetMonitor
+from powernap.monitors.NetMonitor import traffic_bytes
+
+class TestNetMonitorTrafficBytes(unittest.TestCase):
+	def runTest(self):
+		old = [ 1000, 2000, 10, 2 ]
+		new = [ 5000, 3000, 20, 6 ]
+		
+		self.assertEqual(traffic_bytes(old, new, False), 5000)
+		
+		# 4 of the 10 packets received were multicast, so 40% of the bytes
+		# received are discounted.
+		self.assertEqual(traffic_bytes(old, new, True), 2400 + 1000)
+		
+		# Nothing received
+		self.assertEqual(traffic_bytes(old, [ 1000, 3000, 10, 2 ], True), 1000)
+
+class TestNetMonitorMatchCache(unittest.TestCase):
+	def runTest(self):
+		with tempfile.TemporaryDirectory() as tmpdir, mock.patch.object(NetMonitor, "SYS_CLASS_NET", tmpdir):
+			monitor = NetMonitor.NetMonitor(re.compile("^eth"), 0)
+			
+			for name in [ "lo", "veth1", "veth2" ]:
+				os.mkdir(os.path.join(tmpdir, name))
+			
+			monitor.active()
+			self.assertEqual(monitor._matches, { "lo": False, "veth1": False, "veth2": False })
+			
+			# Removed interfaces are forgotten
+			os.rmdir(os.path.join(tmpdir, "veth1"))
+			os.rmdir(os.path.join(tmpdir, "veth2"))
+			os.mkdir(os.path.join(tmpdir, "veth3"))
+			
+			monitor.active()
+			self.assertEqual(monitor._matches, { "lo": False, "veth3": False })
+			
+			monitor.stop()
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,25 @@
+import unittest
+
+from powernap.monitors.NFSServerMonitor import parse_nfsd_stats
+
+class TestNFSServerMonitorParseStats(unittest.TestCase):
+	def runTest(self):
+		stats = (
+			b"rc 0 12 345\n" +
+			b"fh 0 0 0 0 0\n" +
+			b"io 1048576 2097152\n" +
+			b"th 8 0 0.000 0.000 0.000 0.000 0.000 0.000 0.000 0.000 0.000 0.000\n" +
+			b"net 400 0 400 3\n" +
+			b"rpc 400 0 0 0 0\n" +
+			b"proc3 22 100 1 2 3 0 0 0 0 0 0 0 0 0 0 0 0 0 0 0 0 0 4\n" +
+			b"proc4 2 7 200\n" +
+			b"proc4ops 72 0 0 0 5 0 0 0 0 0 6 0 0 0 0 0 0 0 0 0 0 0 0 0 0 0 0 0 0 0 0 50 0 0 0 0 0 0 0 0 0 0 0 0 0 0 0 0 0 0 0 0 0 0 150 0 0 0 0 0 0 0 0 0 0 0 0 0 0 0 0 0 0\n")
+		
+		# proc3: 1 + 2 + 3 + 4 (NULL ignored)
+		# proc4ops: ACCESS (3) + GETATTR (9) (RENEW and SEQUENCE ignored)
+		self.assertEqual(parse_nfsd_stats(stats), 10 + 11)
+		
+		self.assertEqual(parse_nfsd_stats(b""), 0)
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,104 @@
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from powernap.monitors import PathMonitor
+
+def no_fanotify():
+	raise PermissionError(1, "Operation not permitted")
+
+def wait_for(condition):
+	for x in range(50):
+		if condition():
+			return True
+		
+		time.sleep(0.1)
+	
+	return False
+
+def wait_active(monitor):
+	return wait_for(monitor.active)
+
+# Waits for the monitor's thread to start listening again after a tick.
+def wait_rearmed(monitor):
+	return wait_for(lambda: not monitor._rearm_inotify)
+
+def write_file(path):
+	with open(path, "a") as f:
+		f.write("x")
+
+class TestPathMonitorInotify(unittest.TestCase):
+	def runTest(self):
+		with tempfile.TemporaryDirectory() as tmpdir:
+			monitor = PathMonitor.PathMonitor(tmpdir)
+			
+			with mock.patch.object(PathMonitor, "Fanotify", no_fanotify):
+				monitor.start()
+			
+			try:
+				self.assertIsNotNone(monitor._inotify)
+				self.assertFalse(monitor.active())
+				
+				write_file(os.path.join(tmpdir, "foo"))
+				self.assertTrue(wait_active(monitor))
+				
+				# Re-armed on the monitor's thread
+				self.assertTrue(wait_rearmed(monitor))
+				self.assertFalse(monitor.active())
+				
+				# New directories are watched too, and us reading them to add
+				# the watches doesn't count as an access.
+				os.mkdir(os.path.join(tmpdir, "sub"))
+				self.assertTrue(wait_for(lambda: os.path.join(tmpdir, "sub") in list(monitor._watches.values())))
+				self.assertFalse(monitor.active())
+				
+				write_file(os.path.join(tmpdir, "sub", "bar"))
+				self.assertTrue(wait_active(monitor))
+			
+			finally:
+				monitor.stop()
+
+class TestPathMonitorOncePerTick(unittest.TestCase):
+	def runTest(self):
+		with tempfile.TemporaryDirectory() as tmpdir:
+			monitor = PathMonitor.PathMonitor(tmpdir)
+			
+			with mock.patch.object(PathMonitor, "Fanotify", no_fanotify):
+				monitor.start()
+			
+			try:
+				write_file(os.path.join(tmpdir, "foo"))
+				
+				# Stopped listening after the first access.
+				self.assertTrue(wait_for(lambda: not monitor._armed))
+				
+				for x in range(100):
+					write_file(os.path.join(tmpdir, "foo"))
+				
+				# All the accesses count as one, and the backlog from before
+				# re-arming isn't reported at the next tick.
+				self.assertTrue(monitor.active())
+				self.assertTrue(wait_rearmed(monitor))
+				self.assertFalse(monitor.active())
+			
+			finally:
+				monitor.stop()
+
+class TestPathMonitorNotMountPoint(unittest.TestCase):
+	def runTest(self):
+		with tempfile.TemporaryDirectory() as tmpdir:
+			# fanotify would watch the whole mount the directory is on.
+			monitor = PathMonitor.PathMonitor(tmpdir)
+			monitor.start()
+			
+			try:
+				self.assertIsNone(monitor._fanotify)
+				self.assertIsNotNone(monitor._inotify)
+			
+			finally:
+				monitor.stop()
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,81 @@
+import socket
+import time
+import unittest
+
+from powernap.monitors.PowerWakeMonitor import PowerWakeMonitor
+
+NOT_A_WOL_PACKET = b"Not really a WoL packet."
+
+def request(nonce):
+	return (b"PWERWAKE" + nonce.to_bytes(4, "little") + b"\xff" * 6 + NOT_A_WOL_PACKET * 4)
+
+class TestPowerWakeMonitorResponder(unittest.TestCase):
+	def runTest(self):
+		monitor = PowerWakeMonitor(0)
+		monitor.start()
+		
+		try:
+			port = monitor._listener._sock.getsockname()[1]
+			
+			sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+			sock.settimeout(5.0)
+			
+			# Replies are sent without waiting for active() to be called.
+			for x in range(3):
+				sock.sendto(request(1234), ("127.0.0.1", port))
+				self.assertEqual(sock.recv(64), b"PWERWAKF" + (1234).to_bytes(4, "little"))
+			
+			# Retransmissions of the same request only count once.
+			self.assertTrue(monitor.active())
+			
+			sock.sendto(request(1234), ("127.0.0.1", port))
+			sock.recv(64)
+			
+			self.assertFalse(monitor.active())
+			
+			sock.sendto(request(5678), ("127.0.0.1", port))
+			self.assertEqual(sock.recv(64), b"PWERWAKF" + (5678).to_bytes(4, "little"))
+			
+			self.assertTrue(monitor.active())
+			
+			sock.close()
+		
+		finally:
+			monitor.stop()
+
+class TestPowerWakeMonitorReplyFails(unittest.TestCase):
+	def runTest(self):
+		monitor = PowerWakeMonitor(0)
+		monitor.start()
+		
+		try:
+			port = monitor._listener._sock.getsockname()[1]
+			
+			def sendto(data, remote_addr):
+				raise OSError(101, "Network is unreachable")
+			
+			monitor._listener.sendto = sendto
+			
+			sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+			
+			with self.assertLogs(level = "ERROR") as logs:
+				sock.sendto(request(1234), ("127.0.0.1", port))
+				
+				for x in range(50):
+					if logs.output:
+						break
+					
+					time.sleep(0.1)
+			
+			self.assertIn("Unable to reply to PowerWake request", logs.output[0])
+			
+			# The request still counts
+			self.assertTrue(monitor.active())
+			
+			sock.close()
+		
+		finally:
+			monitor.stop()
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,90 @@
+import errno
+import os
+import select
+import tempfile
+import unittest
+from unittest import mock
+
+from powernap.monitors import PressureMonitor
+
+class FakePoll:
+	def __init__(self, events):
+		self.events = events
+	
+	def poll(self, timeout):
+		return self.events
+
+class TestPressureMonitorNoFile(unittest.TestCase):
+	def runTest(self):
+		with tempfile.TemporaryDirectory() as tmpdir:
+			with mock.patch.object(PressureMonitor, "PRESSURE_ROOT", tmpdir):
+				monitor = PressureMonitor.PressureMonitor("cpu")
+			
+			with self.assertLogs(level = "ERROR") as logs:
+				monitor.start()
+			
+			self.assertIn("Unable to register trigger 'some 150000 1000000'", logs.output[0])
+			
+			self.assertIsNone(monitor.fileno())
+			self.assertFalse(monitor.active())
+			
+			monitor.stop()
+
+class TestPressureMonitorTriggerRejected(unittest.TestCase):
+	def runTest(self):
+		with tempfile.TemporaryDirectory() as tmpdir:
+			open(os.path.join(tmpdir, "memory"), "w").close()
+			
+			with mock.patch.object(PressureMonitor, "PRESSURE_ROOT", tmpdir):
+				monitor = PressureMonitor.PressureMonitor("memory", "full", 100000, 1000000)
+			
+			def write(fd, data):
+				raise OSError(errno.EINVAL, os.strerror(errno.EINVAL))
+			
+			with self.assertLogs(level = "ERROR") as logs, mock.patch("os.write", write):
+				monitor.start()
+			
+			self.assertIn("check the window is valid", logs.output[0])
+			
+			# The file isn't left open
+			self.assertIsNone(monitor.fileno())
+			self.assertFalse(monitor.active())
+
+class TestPressureMonitorTriggered(unittest.TestCase):
+	def runTest(self):
+		with tempfile.TemporaryDirectory() as tmpdir:
+			path = os.path.join(tmpdir, "io")
+			open(path, "w").close()
+			
+			with mock.patch.object(PressureMonitor, "PRESSURE_ROOT", tmpdir):
+				monitor = PressureMonitor.PressureMonitor("io", "some", 50000, 2000000)
+			
+			monitor.start()
+			
+			try:
+				with open(path, "rb") as f:
+					self.assertEqual(f.read(), b"some 50000 2000000\0")
+				
+				fd = monitor.fileno()
+				self.assertIsNotNone(fd)
+				
+				monitor._poll = FakePoll([])
+				self.assertFalse(monitor.active())
+				
+				monitor._poll = FakePoll([ (fd, select.POLLPRI) ])
+				self.assertTrue(monitor.active())
+				
+				# Other events (e.g. POLLIN on a regular file) aren't a trigger
+				monitor._poll = FakePoll([ (fd, select.POLLIN) ])
+				self.assertFalse(monitor.active())
+				
+				monitor._poll = FakePoll([ (fd, select.POLLERR | select.POLLPRI) ])
+				self.assertTrue(monitor.active())
+			
+			finally:
+				monitor.stop()
+			
+			self.assertIsNone(monitor.fileno())
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,167 @@
+import errno
+import os
+import re
+import tempfile
+import unittest
+from unittest import mock
+
+from powernap.monitors.ProcessCPUMonitor import ProcessCPUMonitor, CLOCK_TICKS
+
+class FakeProcessTable:
+	def __init__(self):
+		self.processes = {}
+	
+	def scan(self):
+		return self.processes
+
+# A fake /proc with processes which can be started, stopped and updated.
+class FakeProc:
+	def __init__(self):
+		self.tmpdir = tempfile.TemporaryDirectory()
+		self.table = FakeProcessTable()
+	
+	def close(self):
+		self.tmpdir.cleanup()
+	
+	def set_process(self, pid, starttime, utime, stime):
+		fields = [ "S" ] + [ "0" ] * 19
+		fields[14 - 3] = str(utime)
+		fields[15 - 3] = str(stime)
+		fields[22 - 3] = str(starttime)
+		
+		os.makedirs(os.path.join(self.tmpdir.name, str(pid)), exist_ok = True)
+		
+		# Written in place, as the monitor keeps the file open.
+		with open(os.path.join(self.tmpdir.name, str(pid), "stat"), "w") as f:
+			f.write("%d (worker) %s\n" % (pid, " ".join(fields)))
+		
+		self.table.processes[pid] = (starttime, "worker")
+	
+	# Makes reads of an open stat file fail the way /proc/<pid>/stat does
+	# after the process exits.
+	def exit_process(self, monitor, pid):
+		exited_fd = monitor._cputimes[pid].stat_file._fd
+		real_pread = os.pread
+		
+		def pread(fd, n, offset):
+			if fd == exited_fd:
+				raise OSError(errno.ESRCH, os.strerror(errno.ESRCH))
+			
+			return real_pread(fd, n, offset)
+		
+		os.unlink(os.path.join(self.tmpdir.name, str(pid), "stat"))
+		
+		return mock.patch("os.pread", pread)
+	
+	def monitor(self, threshold = 0):
+		return ProcessCPUMonitor(re.compile("worker"), threshold, self.table, lambda pid, comm: comm, self.tmpdir.name)
+
+class TestProcessCPUMonitorTicks(unittest.TestCase):
+	def runTest(self):
+		proc = FakeProc()
+		
+		try:
+			proc.set_process(10, 1000, 100, 50)
+			proc.set_process(11, 1000, 5, 5)
+			
+			monitor = proc.monitor()
+			
+			# First sample is only a baseline
+			self.assertEqual(monitor.get_cpu_ticks(), 0)
+			
+			proc.set_process(10, 1000, 130, 60)
+			proc.set_process(11, 1000, 6, 5)
+			self.assertEqual(monitor.get_cpu_ticks(), 41)
+			
+			self.assertEqual(monitor.get_cpu_ticks(), 0)
+			
+			monitor.stop()
+		
+		finally:
+			proc.close()
+
+class TestProcessCPUMonitorPIDReuse(unittest.TestCase):
+	def runTest(self):
+		proc = FakeProc()
+		
+		try:
+			proc.set_process(10, 1000, 500, 500)
+			
+			monitor = proc.monitor()
+			self.assertEqual(monitor.get_cpu_ticks(), 0)
+			
+			# PID reused by a new process which has used less CPU time, which
+			# mustn't be counted as a (negative) difference.
+			proc.set_process(10, 2000, 10, 10)
+			self.assertEqual(monitor.get_cpu_ticks(), 0)
+			
+			proc.set_process(10, 2000, 15, 10)
+			self.assertEqual(monitor.get_cpu_ticks(), 5)
+			
+			monitor.stop()
+		
+		finally:
+			proc.close()
+
+class TestProcessCPUMonitorExit(unittest.TestCase):
+	def runTest(self):
+		proc = FakeProc()
+		
+		try:
+			proc.set_process(10, 1000, 100, 100)
+			proc.set_process(11, 1000, 100, 100)
+			
+			monitor = proc.monitor()
+			self.assertEqual(monitor.get_cpu_ticks(), 0)
+			
+			# Process 10 exits after the process table was read, so reading
+			# its stat file fails.
+			proc.set_process(11, 1000, 110, 100)
+			
+			with proc.exit_process(monitor, 10):
+				self.assertEqual(monitor.get_cpu_ticks(), 10)
+			
+			self.assertNotIn(10, monitor._cputimes)
+			
+			# Process 11 is gone from the table too.
+			del proc.table.processes[11]
+			
+			self.assertEqual(monitor.get_cpu_ticks(), 0)
+			self.assertEqual(monitor._cputimes, {})
+			
+			monitor.stop()
+		
+		finally:
+			proc.close()
+
+class TestProcessCPUMonitorThreshold(unittest.TestCase):
+	def runTest(self):
+		proc = FakeProc()
+		
+		try:
+			proc.set_process(10, 1000, 0, 0)
+			
+			monitor = proc.monitor(50)
+			
+			with mock.patch("time.monotonic", return_value = 100.0):
+				self.assertFalse(monitor.active())
+			
+			# 40% of one CPU over 2 seconds
+			proc.set_process(10, 1000, int(CLOCK_TICKS * 0.8), 0)
+			
+			with mock.patch("time.monotonic", return_value = 102.0):
+				self.assertFalse(monitor.active())
+			
+			# 60% of one CPU over 2 seconds
+			proc.set_process(10, 1000, int(CLOCK_TICKS * 2.0), 0)
+			
+			with mock.patch("time.monotonic", return_value = 104.0):
+				self.assertTrue(monitor.active())
+			
+			monitor.stop()
+		
+		finally:
+			proc.close()
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,155 @@
+import errno
+import os
+import re
+import unittest
+
+from powernap.monitors.ProcConnector import ProcConnector, PROC_EVENT, FORK_DATA, EXEC_DATA, EXIT_DATA, PROC_EVENT_FORK, PROC_EVENT_EXEC, PROC_EVENT_EXIT
+from powernap.monitors.ProcessMonitor import ProcessMonitor
+from powernap.monitors.ProcessTable import read_args
+
+class FakeMatcher:
+	def __init__(self, pids, during_scan = None):
+		self.pids = pids
+		self.during_scan = during_scan
+	
+	def find_pids(self):
+		if self.during_scan is not None:
+			self.during_scan()
+		
+		return list(self.pids)
+
+class FakeConnector:
+	def __init__(self):
+		self.failed = False
+
+def make_monitor(regex, matcher):
+	monitor = ProcessMonitor(re.compile(regex))
+	monitor._matcher = matcher
+	
+	# Pretend the proc connector is running, events are fed in directly.
+	monitor._connector = FakeConnector()
+	
+	return monitor
+
+class TestProcessMonitorEvents(unittest.TestCase):
+	def runTest(self):
+		monitor = make_monitor("^qemu", FakeMatcher([ 100 ]))
+		monitor.process_resync()
+		
+		self.assertTrue(monitor.active())
+		
+		# Children of matching processes count until they exec something else
+		monitor.process_fork(100, 101)
+		monitor.process_exit(100)
+		self.assertTrue(monitor.active())
+		
+		monitor.process_exec(101, "/bin/sh -c true")
+		self.assertFalse(monitor.active())
+		
+		# Children of other processes don't
+		monitor.process_fork(1, 102)
+		self.assertFalse(monitor.active())
+		
+		# A matching process which exits before the next check still counts
+		monitor.process_exec(102, "qemu-system-x86_64 -m 1G")
+		monitor.process_exit(102)
+		self.assertTrue(monitor.active())
+		self.assertFalse(monitor.active())
+
+class TestProcessMonitorEventsDuringResync(unittest.TestCase):
+	def runTest(self):
+		monitor = None
+		
+		def during_scan():
+			# The process exits after the scan has seen it.
+			monitor.process_exit(100)
+			
+			# A new one starts after the scan has gone past it.
+			monitor.process_exec(200, "qemu-system-x86_64")
+		
+		monitor = make_monitor("^qemu", FakeMatcher([ 100 ], during_scan))
+		monitor.process_resync()
+		
+		self.assertEqual(monitor._pids, { 200 })
+		
+		monitor.process_exit(200)
+		monitor.active()
+		self.assertFalse(monitor.active())
+
+class RecordingSubscriber:
+	def __init__(self):
+		self.events = []
+	
+	def process_fork(self, parent_pid, child_pid):
+		self.events.append(("fork", parent_pid, child_pid))
+	
+	def process_exec(self, pid, args):
+		self.events.append(("exec", pid, args))
+	
+	def process_exit(self, pid):
+		self.events.append(("exit", pid))
+
+class TestProcConnectorHandleEvent(unittest.TestCase):
+	def runTest(self):
+		subscriber = RecordingSubscriber()
+		
+		# Don't open the netlink socket
+		connector = ProcConnector.__new__(ProcConnector)
+		connector._subscribers = [ subscriber ]
+		
+		def event(what, data):
+			connector._handle_event(PROC_EVENT.pack(what, 0, 0) + data)
+		
+		# New process (parent pid 10 is a thread of process 9)
+		event(PROC_EVENT_FORK, FORK_DATA.pack(10, 9, 20, 20))
+		
+		# New thread, ignored
+		event(PROC_EVENT_FORK, FORK_DATA.pack(20, 20, 21, 20))
+		
+		pid = os.getpid()
+		event(PROC_EVENT_EXEC, EXEC_DATA.pack(pid, pid))
+		
+		# Thread exiting, ignored
+		event(PROC_EVENT_EXIT, EXIT_DATA.pack(21, 20))
+		event(PROC_EVENT_EXIT, EXIT_DATA.pack(20, 20))
+		
+		self.assertEqual(subscriber.events, [
+			("fork", 9, 20),
+			("exec", pid, read_args(pid)),
+			("exit", 20),
+		])
+
+class FailingSocket:
+	def __init__(self):
+		self.closed = False
+	
+	def recv_into(self, buf):
+		raise OSError(errno.EBADF, os.strerror(errno.EBADF))
+	
+	def close(self):
+		self.closed = True
+
+class TestProcConnectorReadError(unittest.TestCase):
+	def runTest(self):
+		connector = ProcConnector.__new__(ProcConnector)
+		connector.failed = False
+		connector._sock = FailingSocket()
+		
+		monitor = make_monitor("^qemu", FakeMatcher([ 100 ]))
+		monitor._connector = connector
+		connector._subscribers = [ monitor ]
+		
+		with self.assertLogs(level = "ERROR"):
+			connector.run()
+		
+		self.assertTrue(connector.failed)
+		self.assertTrue(connector._sock.closed)
+		
+		# No more events will arrive, so the monitor scans /proc instead.
+		self.assertTrue(monitor.active())
+		
+		monitor._matcher.pids = []
+		self.assertFalse(monitor.active())
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,59 @@
+import re
+import unittest
+
+from powernap.monitors.ProcessTable import ProcessMatcher, parse_stat, STAT_STARTTIME
+
+class FakeProcessTable:
+	def __init__(self):
+		self.processes = {}
+	
+	def scan(self):
+		return self.processes
+
+class TestProcessTableParseStat(unittest.TestCase):
+	def runTest(self):
+		comm, fields = parse_stat(b"1234 (tmux: server) S 1 1234 1234 0 -1 4194560 1012 0 0 0 71 52 0 0 20 0 1 0 3021 9330688 1057 18446744073709551615\n")
+		
+		self.assertEqual(comm, "tmux: server")
+		self.assertEqual(fields[0], b"S")
+		self.assertEqual(int(fields[STAT_STARTTIME]), 3021)
+		
+		comm, fields = parse_stat(b"99 (a) b (c)) R 1 2 3\n")
+		
+		self.assertEqual(comm, "a) b (c)")
+		self.assertEqual(fields[0], b"R")
+
+class TestProcessMatcherCache(unittest.TestCase):
+	def runTest(self):
+		reads = []
+		
+		def read_text(pid, comm):
+			reads.append(pid)
+			return comm
+		
+		table = FakeProcessTable()
+		matcher = ProcessMatcher(re.compile("^qemu"), read_text, table)
+		
+		table.processes = { 1: (100, "init"), 2: (200, "qemu-system-x86") }
+		self.assertEqual(matcher.find_pids(), [ 2 ])
+		self.assertEqual(reads, [ 1, 2 ])
+		reads.clear()
+		
+		# Nothing changed, so nothing should be re-read.
+		self.assertEqual(matcher.find_pids(), [ 2 ])
+		self.assertEqual(reads, [])
+		
+		# PID 2 exits and is reused by a different process, PID 3 starts.
+		table.processes = { 1: (100, "init"), 2: (300, "bash"), 3: (310, "qemu-img") }
+		self.assertEqual(matcher.find_pids(), [ 3 ])
+		self.assertEqual(reads, [ 2, 3 ])
+		reads.clear()
+		
+		# PID 3 exits and is evicted from the cache.
+		table.processes = { 1: (100, "init"), 2: (300, "bash") }
+		self.assertEqual(matcher.find_pids(), [])
+		self.assertEqual(reads, [])
+		self.assertEqual(sorted(matcher._matches.keys()), [ 1, 2 ])
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,32 @@
+import unittest
+
+from powernap.monitors.DiskStats import parse_diskstats
+from powernap.monitors.SystemIOMonitor import parse_vmstat, PAGE_SIZE
+
+class TestSystemIOMonitorParseDiskStats(unittest.TestCase):
+	def runTest(self):
+		stats = (
+			b"   7       0 loop0 10 0 80 1 0 0 0 0 0 4 1 0 0 0 0 0 0\n" +
+			b"   8       0 sda 100 20 3000 40 200 30 5000 60 0 90 100 0 0 0 0 0 0\n" +
+			b"   8       1 sda1 50 10 1000 20 25 5 400 10 0 30 30\n" +
+			b"   8      16 sdb 1 2 3\n")
+		
+		self.assertEqual(parse_diskstats(stats), {
+			"loop0": (10, 80),
+			"sda":   (300, 8000),
+			"sda1":  (75, 1400) })
+
+class TestSystemIOMonitorParseVMStat(unittest.TestCase):
+	def runTest(self):
+		stats = (
+			b"nr_free_pages 12345\n" +
+			b"pgpgin 100\n" +
+			b"pgpgout 28\n" +
+			b"pswpin 3\n" +
+			b"pswpout 4\n" +
+			b"pgpgoutclean 99\n")
+		
+		self.assertEqual(parse_vmstat(stats), (128 * 1024, 7 * PAGE_SIZE))
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,84 @@
+import struct
+import unittest
+
+from powernap import Netlink
+from powernap.monitors.TCPMonitor import build_port_filter, find_proc_net_tcp, parse_diag_bytes, INET_DIAG_MSG
+
+# Runs an inet_diag bytecode filter like the kernel's inet_diag_bc_run()
+def run_filter(bytecode, sport, dport):
+	offset = 0
+	
+	while offset < len(bytecode):
+		code, yes, no = struct.unpack_from("=BBH", bytecode, offset)
+		
+		if code == 1: # JMP
+			result = False
+		else:
+			port = struct.unpack_from("=BBH", bytecode, offset + 4)[2]
+			
+			result = {
+				2:  sport >= port, # S_GE
+				3:  sport <= port, # S_LE
+				4:  dport >= port, # D_GE
+				5:  dport <= port, # D_LE
+				11: sport == port, # S_EQ
+				12: dport == port, # D_EQ
+			}[code]
+		
+		offset += yes if result else no
+	
+	return offset == len(bytecode)
+
+class TestTCPMonitorPortFilter(unittest.TestCase):
+	def runTest(self):
+		bytecode = build_port_filter([ (22, 22), (8000, 8100) ])
+		
+		self.assertTrue(run_filter(bytecode, 22, 50000))
+		self.assertTrue(run_filter(bytecode, 50000, 22))
+		self.assertTrue(run_filter(bytecode, 8000, 50000))
+		self.assertTrue(run_filter(bytecode, 50000, 8050))
+		self.assertTrue(run_filter(bytecode, 50000, 8100))
+		
+		self.assertFalse(run_filter(bytecode, 21, 50000))
+		self.assertFalse(run_filter(bytecode, 50000, 23))
+		self.assertFalse(run_filter(bytecode, 7999, 8101))
+
+class TestTCPMonitorProcNetTCP(unittest.TestCase):
+	def runTest(self):
+		data = (
+			b"  sl  local_address rem_address   st tx_queue rx_queue tr tm->when retrnsmt   uid  timeout inode\n" +
+			b"   0: 00000000:0016 00000000:0000 0A 00000000:00000000 00:00000000 00000000     0        0 1234 1 0000000000000000 100 0 0 10 0\n" +
+			b"   1: 0100007F:C350 0100007F:1F90 06 00000000:00000000 00:00000000 00000000     0        0 0 1 0000000000000000 100 0 0 10 0\n" +
+			b"   2: 0100007F:C351 0100007F:1F41 01 00000000:00000000 00:00000000 00000000     0        0 1235 1 0000000000000000 100 0 0 10 0\n")
+		
+		bitmap = bytearray(65536)
+		
+		# Only listening on 22
+		bitmap[22] = 1
+		self.assertFalse(find_proc_net_tcp(data, bitmap))
+		
+		# Only in TIME_WAIT on 8080
+		bitmap[8080] = 1
+		self.assertFalse(find_proc_net_tcp(data, bitmap))
+		
+		# Established to 8001
+		bitmap[8001] = 1
+		self.assertTrue(find_proc_net_tcp(data, bitmap))
+
+class TestTCPMonitorParseDiagBytes(unittest.TestCase):
+	def runTest(self):
+		msg = INET_DIAG_MSG.pack(2, 1, 0, 0, 22, 50000, b"", b"", 0, b"", 0, 0, 0, 0, 0)
+		
+		tcp_info = bytearray(232)
+		struct.pack_into("=QQ", tcp_info, 120, 1000, 234)
+		
+		self.assertEqual(parse_diag_bytes(msg + Netlink.pack_attr(1, b"\0" * 8) + Netlink.pack_attr(2, bytes(tcp_info))), 1234)
+		
+		# No INET_DIAG_INFO
+		self.assertEqual(parse_diag_bytes(msg), None)
+		
+		# tcp_info from an old kernel without the byte counters
+		self.assertEqual(parse_diag_bytes(msg + Netlink.pack_attr(2, bytes(tcp_info[:104]))), None)
+
+if __name__ == '__main__':
+	unittest.main()
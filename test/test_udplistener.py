@@ -0,0 +1,177 @@
+import socket
+import time
+import unittest
+
+from powernap import BPF
+from powernap.monitors import UDPListener
+from powernap.monitors.UDPListener import get_udp_listener
+from powernap.monitors.UDPMonitor import UDPMonitor
+
+class RecordingSubscriber:
+	def __init__(self, prefix = None):
+		self.packets = []
+		self.prefix = prefix
+	
+	def udp_packet(self, packet, remote_addr):
+		self.packets.append(bytes(packet))
+	
+	def udp_filter(self):
+		if self.prefix is None:
+			return None
+		
+		return [ BPF.match_bytes(BPF.UDP_PAYLOAD, self.prefix) ]
+
+class TestUDPListenerShared(unittest.TestCase):
+	def runTest(self):
+		a = RecordingSubscriber()
+		b = RecordingSubscriber()
+		
+		listener = get_udp_listener(0)
+		listener.subscribe(a)
+		
+		self.assertIs(get_udp_listener(0), listener)
+		get_udp_listener(0).subscribe(b)
+		
+		port = listener._sock.getsockname()[1]
+		
+		sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+		sock.sendto(b"hello", ("127.0.0.1", port))
+		sock.sendto(b"world!", ("127.0.0.1", port))
+		sock.close()
+		
+		time.sleep(0.1)
+		listener.poll()
+		
+		self.assertEqual(a.packets, [ b"hello", b"world!" ])
+		self.assertEqual(b.packets, [ b"hello", b"world!" ])
+		
+		listener.unsubscribe(a)
+		listener.unsubscribe(b)
+		
+		# Socket is closed once the last subscriber goes away.
+		self.assertNotIn(0, UDPListener._listeners)
+
+class TestUDPListenerFilter(unittest.TestCase):
+	def runTest(self):
+		a = RecordingSubscriber(b"hello")
+		b = RecordingSubscriber(b"PWERWAKE")
+		
+		listener = get_udp_listener(0)
+		listener.subscribe(a)
+		listener.subscribe(b)
+		
+		port = listener._sock.getsockname()[1]
+		
+		sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+		sock.sendto(b"hello world", ("127.0.0.1", port))
+		sock.sendto(b"goodbye", ("127.0.0.1", port))
+		sock.sendto(b"PWERWAKE", ("127.0.0.1", port))
+		sock.sendto(b"PWER", ("127.0.0.1", port))
+		
+		time.sleep(0.1)
+		listener.poll()
+		
+		# Both subscribers see packets wanted by either.
+		self.assertEqual(a.packets, [ b"hello world", b"PWERWAKE" ])
+		self.assertEqual(b.packets, [ b"hello world", b"PWERWAKE" ])
+		
+		# Filter is removed when a subscriber wants everything.
+		c = RecordingSubscriber()
+		listener.subscribe(c)
+		
+		sock.sendto(b"goodbye", ("127.0.0.1", port))
+		sock.close()
+		
+		time.sleep(0.1)
+		listener.poll()
+		
+		self.assertEqual(c.packets, [ b"goodbye" ])
+		
+		listener.unsubscribe(a)
+		listener.unsubscribe(b)
+		listener.unsubscribe(c)
+
+class TestUDPListenerThread(unittest.TestCase):
+	def runTest(self):
+		monitor = UDPMonitor(0)
+		monitor.start()
+		
+		try:
+			listener = monitor._listener
+			listener.start_thread()
+			
+			port = listener._sock.getsockname()[1]
+			sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+			
+			# Packets aren't passed to subscribers while the lock is held, so
+			# none can be lost between reading and clearing a flag.
+			with listener.lock:
+				sock.sendto(b"hello", ("127.0.0.1", port))
+				time.sleep(0.1)
+				
+				self.assertFalse(monitor._received)
+			
+			for x in range(50):
+				if monitor._received:
+					break
+				
+				time.sleep(0.1)
+			
+			# Received by the thread without active() being called.
+			self.assertTrue(monitor._received)
+			
+			self.assertTrue(monitor.active())
+			self.assertFalse(monitor.active())
+			
+			sock.close()
+		
+		finally:
+			monitor.stop()
+
+class FailingSubscriber(RecordingSubscriber):
+	def udp_packet(self, packet, remote_addr):
+		raise OSError(1, "Operation not permitted")
+
+class TestUDPListenerFailingSubscriber(unittest.TestCase):
+	def runTest(self):
+		a = FailingSubscriber()
+		b = RecordingSubscriber()
+		
+		listener = get_udp_listener(0)
+		listener.subscribe(a)
+		listener.subscribe(b)
+		listener.start_thread()
+		
+		try:
+			port = listener._sock.getsockname()[1]
+			sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+			
+			with self.assertLogs(level = "ERROR"):
+				sock.sendto(b"hello", ("127.0.0.1", port))
+				
+				for x in range(50):
+					if b.packets:
+						break
+					
+					time.sleep(0.1)
+			
+			sock.sendto(b"world", ("127.0.0.1", port))
+			
+			for x in range(50):
+				if len(b.packets) == 2:
+					break
+				
+				time.sleep(0.1)
+			
+			# Thread is still running after a subscriber raised
+			self.assertTrue(listener._thread.is_alive())
+			self.assertEqual(b.packets, [ b"hello", b"world" ])
+			
+			sock.close()
+		
+		finally:
+			listener.unsubscribe(a)
+			listener.unsubscribe(b)
+
+if __name__ == '__main__':
+	unittest.main()
@@ -1,168 +1,142 @@
+import os
+import struct
+import tempfile
+import time
 import unittest
 
 #import logging
 #logging.basicConfig(level=logging.DEBUG)
 
-from powernap.monitors.LoggedInUsersMonitor import LoggedInUsersMonitor
+from powernap.monitors.LoggedInUsersMonitor import LoggedInUsersMonitor, parse_utmp
 
-class TestLoggedInUsersMonitorNoUsers(unittest.TestCase):
-	def runTest(self):
-		monitor = LoggedInUsersMonitor(None)
-		
-		w_output = ""
-		
-		self.assertEqual(monitor._check_w_output(w_output), False)
+# Larger than the kernel's maximum PID, so never a running process.
+DEAD_PID = 4194305
 
-class TestLoggedInUsersMonitorConsoleUser(unittest.TestCase):
-	def runTest(self):
-		monitor = LoggedInUsersMonitor(None)
-		
-		w_output = "root     tty1     -                 2days -bash"
-		
-		self.assertEqual(monitor._check_w_output(w_output), True)
+def utmp_record(ut_type, pid, line, user, host = ""):
+	record = struct.pack("=hxxi32s4s32s256s", ut_type, pid, line.encode(), b"", user.encode(), host.encode())
+	return record + (b"\0" * (384 - len(record)))
 
-class TestLoggedInUsersMonitorShortIdleConsoleUser(unittest.TestCase):
-	def runTest(self):
-		monitor = LoggedInUsersMonitor(259200) # 3 days
+class UtmpFixture:
+	def __init__(self, records, ttys):
+		self.dir = tempfile.TemporaryDirectory()
+		self.utmp = os.path.join(self.dir.name, "utmp")
+		self.dev = os.path.join(self.dir.name, "dev")
 		
-		w_output = "root     tty1     -                 2days -bash"
-		
-		self.assertEqual(monitor._check_w_output(w_output), True)
-
-class TestLoggedInUsersMonitorLongIdleConsoleUser(unittest.TestCase):
-	def runTest(self):
-		monitor = LoggedInUsersMonitor(86400) # 1 day
+		with open(self.utmp, "wb") as f:
+			f.write(b"".join(records))
 		
-		w_output = "root     tty1     -                 2days -bash"
+		now = time.time()
 		
-		self.assertEqual(monitor._check_w_output(w_output), False)
+		for tty, idle_secs in ttys.items():
+			path = os.path.join(self.dev, tty)
+			os.makedirs(os.path.dirname(path), exist_ok = True)
+			open(path, "w").close()
+			os.utime(path, (now - idle_secs, now))
+	
+	def monitor(self, max_idle_secs):
+		return LoggedInUsersMonitor(max_idle_secs, self.utmp, self.dev)
 
-class TestLoggedInUsersMonitorX11User(unittest.TestCase):
+class TestLoggedInUsersMonitorParseUtmp(unittest.TestCase):
 	def runTest(self):
-		monitor = LoggedInUsersMonitor(None)
+		data = (
+			utmp_record(2, 0, "~", "reboot") +
+			utmp_record(6, 1234, "tty2", "LOGIN") +
+			utmp_record(7, 2345, "tty1", "root") +
+			utmp_record(8, 3456, "pts/0", "") +
+			utmp_record(7, 4567, "pts/2", "solemnwarning", "172.24.128.21"))
 		
-		w_output = "solemnwa console  :0                8days -:0"
+		self.assertEqual(parse_utmp(data), [
+			("root", "tty1", 2345),
+			("solemnwarning", "pts/2", 4567) ])
 		
-		self.assertEqual(monitor._check_w_output(w_output), True)
+		# Partial record at the end is ignored
+		self.assertEqual(parse_utmp(data[:-1]), [
+			("root", "tty1", 2345) ])
 
-class TestLoggedInUsersMonitorRemoteUsers(unittest.TestCase):
+class TestLoggedInUsersMonitorNoUsers(unittest.TestCase):
 	def runTest(self):
-		monitor = LoggedInUsersMonitor(None)
-		
-		w_output = '''
-solemnwa pts/2    172.24.128.21    44:29  screen -dUx i
-solemnwa pts/1    :pts/2:S.0       44:29  irssi
-solemnwa pts/3    172.24.128.21    18:49m screen -dUx r
-solemnwa pts/0    :pts/3:S.0       18:49m SCREEN -dmUS rss newsbeuter
-'''
+		fixture = UtmpFixture([ utmp_record(6, os.getpid(), "tty1", "LOGIN") ], { "tty1": 0 })
+		monitor = fixture.monitor(None)
 		
-		self.assertEqual(monitor._check_w_output(w_output), True)
+		self.assertEqual(monitor.active(), False)
 
-class TestLoggedInUsersMonitorRemoteSomeIdle(unittest.TestCase):
+class TestLoggedInUsersMonitorNoUtmp(unittest.TestCase):
 	def runTest(self):
-		monitor = LoggedInUsersMonitor(3600) # 1 hour
-		
-		w_output = '''
-solemnwa pts/2    172.24.128.21    44:29  screen -dUx i
-solemnwa pts/1    :pts/2:S.0       44:29  irssi
-solemnwa pts/3    172.24.128.21    18:49m screen -dUx r
-solemnwa pts/0    :pts/3:S.0       18:49m SCREEN -dmUS rss newsbeuter
-'''
+		monitor = LoggedInUsersMonitor(None, "/nonexistent/utmp")
 		
-		self.assertEqual(monitor._check_w_output(w_output), True)
+		self.assertEqual(monitor.active(), False)
 
-class TestLoggedInUsersMonitorRemoteAllIdle(unittest.TestCase):
+class TestLoggedInUsersMonitorConsoleUser(unittest.TestCase):
 	def runTest(self):
-		monitor = LoggedInUsersMonitor(60) # 1 minute
+		fixture = UtmpFixture([ utmp_record(7, os.getpid(), "tty1", "root") ], { "tty1": 172800 })
+		monitor = fixture.monitor(None)
 		
-		w_output = '''
-solemnwa pts/2    172.24.128.21    44:29  screen -dUx i
-solemnwa pts/1    :pts/2:S.0       44:29  irssi
-solemnwa pts/3    172.24.128.21    18:49m screen -dUx r
-solemnwa pts/0    :pts/3:S.0       18:49m SCREEN -dmUS rss newsbeuter
-'''
-		
-		self.assertEqual(monitor._check_w_output(w_output), False)
+		self.assertEqual(monitor.active(), True)
 
-class TestLoggedInUsersMonitorSecondsIdle(unittest.TestCase):
+class TestLoggedInUsersMonitorShortIdleConsoleUser(unittest.TestCase):
 	def runTest(self):
-		monitor = LoggedInUsersMonitor(30) # 30 seconds
+		fixture = UtmpFixture([ utmp_record(7, os.getpid(), "tty1", "root") ], { "tty1": 172800 }) # 2 days
+		monitor = fixture.monitor(259200) # 3 days
 		
-		w_output = '''
-solemnwa pts/2    172.24.128.21    45.00s screen -dUx i
-'''
-		
-		self.assertEqual(monitor._check_w_output(w_output), False)
+		self.assertEqual(monitor.active(), True)
 
-class TestLoggedInUsersMonitorSecondsNotIdle(unittest.TestCase):
+class TestLoggedInUsersMonitorLongIdleConsoleUser(unittest.TestCase):
 	def runTest(self):
-		monitor = LoggedInUsersMonitor(30) # 30 seconds
+		fixture = UtmpFixture([ utmp_record(7, os.getpid(), "tty1", "root") ], { "tty1": 172800 }) # 2 days
+		monitor = fixture.monitor(86400) # 1 day
 		
-		w_output = '''
-solemnwa pts/2    172.24.128.21    1.00s  screen -dUx i
-'''
-		
-		self.assertEqual(monitor._check_w_output(w_output), True)
+		self.assertEqual(monitor.active(), False)
 
-class TestLoggedInUsersMonitorMinutesIdle(unittest.TestCase):
+class TestLoggedInUsersMonitorRemoteSomeIdle(unittest.TestCase):
 	def runTest(self):
-		monitor = LoggedInUsersMonitor(600) # 10 minutes
+		fixture = UtmpFixture([
+			utmp_record(7, os.getpid(), "pts/2", "solemnwarning", "172.24.128.21"),
+			utmp_record(7, os.getpid(), "pts/3", "solemnwarning", "172.24.128.21"),
+		], { "pts/2": 2669, "pts/3": 67740 })
 		
-		w_output = '''
-solemnwa pts/2    172.24.128.21    15:30  screen -dUx i
-'''
+		monitor = fixture.monitor(3600) # 1 hour
 		
-		self.assertEqual(monitor._check_w_output(w_output), False)
+		self.assertEqual(monitor.active(), True)
 
-class TestLoggedInUsersMonitorMinutesNotIdle(unittest.TestCase):
+class TestLoggedInUsersMonitorRemoteAllIdle(unittest.TestCase):
 	def runTest(self):
-		monitor = LoggedInUsersMonitor(600) # 10 minutes
+		fixture = UtmpFixture([
+			utmp_record(7, os.getpid(), "pts/2", "solemnwarning", "172.24.128.21"),
+			utmp_record(7, os.getpid(), "pts/3", "solemnwarning", "172.24.128.21"),
+		], { "pts/2": 2669, "pts/3": 67740 })
 		
-		w_output = '''
-solemnwa pts/2    172.24.128.21    05:30  screen -dUx i
-'''
+		monitor = fixture.monitor(60) # 1 minute
 		
-		self.assertEqual(monitor._check_w_output(w_output), True)
+		self.assertEqual(monitor.active(), False)
 
-class TestLoggedInUsersMonitorHoursIdle(unittest.TestCase):
+class TestLoggedInUsersMonitorDeadSession(unittest.TestCase):
 	def runTest(self):
-		monitor = LoggedInUsersMonitor(43200) # 12 hours
-		
-		w_output = '''
-solemnwa pts/2    172.24.128.21    15:30m screen -dUx i
-'''
+		fixture = UtmpFixture([ utmp_record(7, DEAD_PID, "pts/2", "solemnwarning") ], { "pts/2": 0 })
+		monitor = fixture.monitor(None)
 		
-		self.assertEqual(monitor._check_w_output(w_output), False)
+		self.assertEqual(monitor.active(), False)
 
-class TestLoggedInUsersMonitorHoursNotIdle(unittest.TestCase):
+class TestLoggedInUsersMonitorMissingTty(unittest.TestCase):
 	def runTest(self):
-		monitor = LoggedInUsersMonitor(43200) # 12 hours
+		fixture = UtmpFixture([ utmp_record(7, os.getpid(), ":0", "solemnwarning") ], {})
+		monitor = fixture.monitor(None)
 		
-		w_output = '''
-solemnwa pts/2    172.24.128.21    05:30m screen -dUx i
-'''
-		
-		self.assertEqual(monitor._check_w_output(w_output), True)
+		self.assertEqual(monitor.active(), False)
 
-class TestLoggedInUsersMonitorDaysIdle(unittest.TestCase):
+class TestLoggedInUsersMonitorUtmpChanged(unittest.TestCase):
 	def runTest(self):
-		monitor = LoggedInUsersMonitor(432000) # 5 days
+		fixture = UtmpFixture([], { "pts/2": 0 })
+		monitor = fixture.monitor(None)
 		
-		w_output = '''
-solemnwa pts/2    172.24.128.21     6days screen -dUx i
-'''
+		self.assertEqual(monitor.active(), False)
 		
-		self.assertEqual(monitor._check_w_output(w_output), False)
-
-class TestLoggedInUsersMonitorDaysNotIdle(unittest.TestCase):
-	def runTest(self):
-		monitor = LoggedInUsersMonitor(432000) # 5 days
+		with open(fixture.utmp, "wb") as f:
+			f.write(utmp_record(7, os.getpid(), "pts/2", "solemnwarning"))
 		
-		w_output = '''
-solemnwa pts/2    172.24.128.21     3days screen -dUx i
-'''
+		# Make sure the modification time changes
+		os.utime(fixture.utmp, ns = (0, os.stat(fixture.utmp).st_mtime_ns + 1000000))
 		
-		self.assertEqual(monitor._check_w_output(w_output), True)
+		self.assertEqual(monitor.active(), True)
 
 if __name__ == '__main__':
 	unittest.main()
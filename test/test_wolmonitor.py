@@ -0,0 +1,252 @@
+import errno
+import ipaddress
+import os
+import socket
+import time
+import unittest
+from unittest import mock
+
+from powernap import Netlink
+from powernap.monitors.Interfaces import IFINFOMSG, IFLA_ADDRESS, IFLA_IFNAME, RTM_NEWLINK, RTM_DELLINK, InterfaceInventory, parse_link_message
+from powernap.monitors.UDPMonitor import UDPMonitor
+from powernap.monitors.WoLMonitor import WoLMonitor, find_wol_mac
+
+MAC = bytes.fromhex("0123456789ab")
+
+class TestWoLMonitorFindMAC(unittest.TestCase):
+	def runTest(self):
+		self.assertEqual(find_wol_mac(b"\xff" * 6 + MAC * 16), MAC)
+		
+		# Magic packet within a larger payload
+		self.assertEqual(find_wol_mac(memoryview(b"\xff\xffjunk" + b"\xff" * 6 + MAC * 16 + b"password")), MAC)
+		
+		# MAC address starting with FF
+		self.assertEqual(find_wol_mac(b"\xff" * 6 + (b"\xff" + MAC[1:]) * 16), b"\xff" + MAC[1:])
+		
+		self.assertIsNone(find_wol_mac(b"\xff" * 6 + MAC * 15))
+		self.assertIsNone(find_wol_mac(b"\xff" * 6 + MAC * 15 + bytes.fromhex("0123456789ac")))
+		self.assertIsNone(find_wol_mac(b""))
+
+class FakeInventory:
+	def subscribe(self, subscriber):
+		pass
+	
+	def unsubscribe(self, subscriber):
+		pass
+	
+	def poll(self):
+		pass
+	
+	def macs(self):
+		return frozenset([ MAC ])
+
+# Sends payloads to a monitor's port, returning the first one which got past
+# the socket filter.
+def first_received(listener, payloads):
+	port = listener._sock.getsockname()[1]
+	
+	sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+	sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+	
+	for payload in payloads:
+		sock.sendto(payload, ("127.0.0.1", port))
+	
+	sock.close()
+	
+	for x in range(50):
+		try:
+			return listener._sock.recv(65536, socket.MSG_DONTWAIT | socket.MSG_PEEK)
+		except BlockingIOError:
+			time.sleep(0.1)
+	
+	return None
+
+MAGIC_PACKET = b"\xff" * 6 + MAC * 16
+
+class TestWoLMonitorFilter(unittest.TestCase):
+	def runTest(self):
+		monitor = WoLMonitor(0, [ ipaddress.IPv4Network("127.0.0.0/8") ])
+		monitor._interfaces = FakeInventory()
+		monitor.start()
+		
+		try:
+			# Packets too short to be a magic packet are dropped.
+			self.assertEqual(first_received(monitor._listener, [ b"hello", MAGIC_PACKET[:-1], MAGIC_PACKET ]), MAGIC_PACKET)
+			self.assertTrue(monitor.active())
+			
+			# Magic packet after other data, or followed by a SecureOn password
+			for payload in [ b"\xff\xffjunk" + MAGIC_PACKET, MAGIC_PACKET + b"secret" ]:
+				self.assertEqual(first_received(monitor._listener, [ payload ]), payload)
+				self.assertTrue(monitor.active())
+			
+			# Not our MAC address
+			payload = b"\xff" * 6 + bytes.fromhex("0123456789ac") * 16
+			self.assertEqual(first_received(monitor._listener, [ payload ]), payload)
+			self.assertFalse(monitor.active())
+		
+		finally:
+			monitor.stop()
+
+class TestWoLMonitorSharedFilter(unittest.TestCase):
+	def runTest(self):
+		wol = WoLMonitor(0)
+		wol._interfaces = FakeInventory()
+		wol.start()
+		
+		try:
+			listener = wol._listener
+			
+			# A short packet doesn't stop the kernel trying other subscribers'
+			# filters after the WoL one.
+			udp = UDPMonitor(listener.port, [ ipaddress.IPv4Network("127.0.0.0/8") ])
+			udp.start()
+			
+			try:
+				self.assertEqual(first_received(listener, [ b"hi" ]), b"hi")
+				self.assertTrue(udp.active())
+				self.assertFalse(wol.active())
+			
+			finally:
+				udp.stop()
+		
+		finally:
+			wol.stop()
+
+class TestInterfacesParseLinkMessage(unittest.TestCase):
+	def runTest(self):
+		payload = (IFINFOMSG.pack(socket.AF_UNSPEC, 1, 4, 0, 0)
+			+ Netlink.pack_attr(IFLA_IFNAME, b"eth0\0")
+			+ Netlink.pack_attr(IFLA_ADDRESS, MAC))
+		
+		self.assertEqual(parse_link_message(payload), (4, "eth0", MAC))
+		
+		# Loopback has an all-zero address
+		payload = (IFINFOMSG.pack(socket.AF_UNSPEC, 772, 1, 0, 0)
+			+ Netlink.pack_attr(IFLA_IFNAME, b"lo\0")
+			+ Netlink.pack_attr(IFLA_ADDRESS, b"\0" * 6))
+		
+		self.assertEqual(parse_link_message(payload), (1, "lo", None))
+		
+		# Tunnels may have no address or a different length
+		payload = (IFINFOMSG.pack(socket.AF_UNSPEC, 768, 7, 0, 0)
+			+ Netlink.pack_attr(IFLA_IFNAME, b"tun0\0")
+			+ Netlink.pack_attr(IFLA_ADDRESS, b"\x0a\x00\x00\x01"))
+		
+		self.assertEqual(parse_link_message(payload), (7, "tun0", None))
+
+MAC2 = bytes.fromhex("0123456789ac")
+MAC3 = bytes.fromhex("0123456789ad")
+
+def link_message(msg_type, index, name, mac):
+	return Netlink.pack_message(msg_type, 0, 0, IFINFOMSG.pack(socket.AF_UNSPEC, 1, index, 0, 0)
+		+ Netlink.pack_attr(IFLA_IFNAME, name + b"\0")
+		+ Netlink.pack_attr(IFLA_ADDRESS, mac))
+
+DUMP_DONE = Netlink.pack_message(Netlink.NLMSG_DONE, 0, 0, b"")
+
+# Stands in for the rtnetlink socket, recv() returns (or raises) each of the
+# queued items in turn.
+class FakeNetlinkSocket:
+	def __init__(self, queue):
+		self.queue = queue
+		self.closed = False
+	
+	def setsockopt(self, level, option, value):
+		pass
+	
+	def bind(self, addr):
+		pass
+	
+	def send(self, data):
+		return len(data)
+	
+	def recv(self, size, flags = 0):
+		if not self.queue:
+			raise BlockingIOError(errno.EAGAIN, os.strerror(errno.EAGAIN))
+		
+		item = self.queue.pop(0)
+		
+		if isinstance(item, Exception):
+			raise item
+		
+		return item
+	
+	def close(self):
+		self.closed = True
+
+class InterfacesSubscriber:
+	def __init__(self):
+		self.changes = 0
+	
+	def interfaces_changed(self):
+		self.changes += 1
+
+def make_inventory(sock):
+	with mock.patch("socket.socket", return_value = sock):
+		return InterfaceInventory()
+
+class TestInterfaceInventoryEvents(unittest.TestCase):
+	def runTest(self):
+		sock = FakeNetlinkSocket([ link_message(RTM_NEWLINK, 2, b"eth0", MAC) + DUMP_DONE ])
+		inventory = make_inventory(sock)
+		
+		subscriber = InterfacesSubscriber()
+		inventory.subscribe(subscriber)
+		
+		self.assertEqual(inventory.macs(), frozenset([ MAC ]))
+		
+		# Interface added
+		sock.queue.append(link_message(RTM_NEWLINK, 3, b"eth1", MAC2))
+		inventory.poll()
+		
+		self.assertEqual(inventory.macs(), frozenset([ MAC, MAC2 ]))
+		self.assertEqual(subscriber.changes, 1)
+		
+		# Interface renamed, same MAC addresses
+		sock.queue.append(link_message(RTM_NEWLINK, 3, b"lan1", MAC2))
+		inventory.poll()
+		
+		self.assertEqual(subscriber.changes, 1)
+		
+		# Interface removed
+		sock.queue.append(link_message(RTM_DELLINK, 2, b"eth0", MAC))
+		inventory.poll()
+		
+		self.assertEqual(inventory.macs(), frozenset([ MAC2 ]))
+		self.assertEqual(subscriber.changes, 2)
+
+class TestInterfaceInventoryOverflow(unittest.TestCase):
+	def runTest(self):
+		sock = FakeNetlinkSocket([ link_message(RTM_NEWLINK, 2, b"eth0", MAC) + DUMP_DONE ])
+		inventory = make_inventory(sock)
+		
+		subscriber = InterfacesSubscriber()
+		inventory.subscribe(subscriber)
+		
+		# Events were lost, so the interfaces are listed again.
+		sock.queue += [
+			OSError(errno.ENOBUFS, os.strerror(errno.ENOBUFS)),
+			link_message(RTM_NEWLINK, 3, b"eth1", MAC2) + DUMP_DONE ]
+		
+		inventory.poll()
+		
+		self.assertEqual(inventory.macs(), frozenset([ MAC2 ]))
+		self.assertEqual(subscriber.changes, 1)
+		
+		# Listing them fails too, so we fall back to /sys/class/net.
+		sock.queue += [
+			OSError(errno.ENOBUFS, os.strerror(errno.ENOBUFS)),
+			OSError(errno.ENOBUFS, os.strerror(errno.ENOBUFS)) ]
+		
+		with mock.patch("powernap.monitors.Interfaces.get_local_macs", return_value = [ MAC3 ]), self.assertLogs(level = "WARNING"):
+			inventory.poll()
+		
+		self.assertTrue(sock.closed)
+		self.assertEqual(inventory.macs(), frozenset([ MAC3 ]))
+		self.assertEqual(subscriber.changes, 2)
+		
+		inventory.poll()
+		self.assertEqual(subscriber.changes, 2)
+
+if __name__ == '__main__':
+	unittest.main()